@@ -0,0 +1,161 @@
+import hashlib
+import json
+import sqlite3
+import time
+from urllib.parse import urlparse
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# SQLite-Datei, in der der Crawl-Cache gespeichert wird
+CACHE_DB_FILE = "crawl_cache.sqlite"
+
+# Wie lange (in Sekunden) ein Cache-Eintrag ohne erneute Anfrage als aktuell gilt.
+# Danach wird die Seite mit If-None-Match / If-Modified-Since erneut angefragt.
+CONTENT_TYPE_TTL = {
+    'news': 1 * 24 * 3600,       # Newsroom, Presse, Blog: täglich prüfen
+    'product': 7 * 24 * 3600,    # Produkte und Lösungen: wöchentlich
+    'about': 30 * 24 * 3600,     # Über uns, Geschichte, Mission: monatlich
+    'default': 7 * 24 * 3600,
+}
+
+# Wie lange die Erkenntnis "diese Domain hat keinen Cookie-Banner" gilt, bevor erneut geprüft wird
+NO_BANNER_TTL = 30 * 24 * 3600
+
+# Gespeicherte Cookie-Strategie für Domains ohne Banner
+NO_BANNER = ''
+
+# Schlüsselwörter im URL-Pfad, über die der Inhaltstyp einer Seite bestimmt wird.
+# Die Reihenfolge ist wichtig: 'news' hat Vorrang (z.B. /company/news).
+CONTENT_TYPE_KEYWORDS = {
+    'news': ['news', 'press', 'presse', 'nachrichten', 'aktuelles', 'blog', 'stories', 'insights', 'media'],
+    'product': ['product', 'produkte', 'solution', 'lösungen', 'service', 'dienstleistungen',
+                'platform', 'plattform', 'technology', 'technologie'],
+    'about': ['about', 'über-uns', 'company', 'unternehmen', 'mission', 'history', 'geschichte',
+              'profile', 'profil', 'who-we-are'],
+}
+
+# ==============================================================================
+# 2. HILFSFUNKTIONEN
+# ==============================================================================
+
+def classify_content_type(url):
+    """Ordnet eine URL anhand ihres Pfades einem Inhaltstyp (news, product, about, default) zu."""
+    path = urlparse(url).path.lower()
+    for content_type, keywords in CONTENT_TYPE_KEYWORDS.items():
+        if any(keyword in path for keyword in keywords):
+            return content_type
+    return 'default'
+
+def text_hash(text):
+    """SHA-256 des extrahierten Textes, um unveränderte Inhalte zu erkennen."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+# ==============================================================================
+# 3. CACHE
+# ==============================================================================
+
+class CrawlCache:
+    """
+    Persistenter Cache pro URL: Validatoren (ETag, Last-Modified), Abrufzeit, Hash und
+    Ergebnis der Extraktion (Text und Links). Damit kann ein erneuter Lauf bedingte Anfragen
+    stellen und bei 304 bzw. unverändertem Text die gespeicherte Extraktion wiederverwenden.
+    """
+
+    def __init__(self, db_file=CACHE_DB_FILE):
+        self.conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url           TEXT PRIMARY KEY,
+                final_url     TEXT,
+                content_type  TEXT,
+                etag          TEXT,
+                last_modified TEXT,
+                fetched_at    REAL,
+                text_hash     TEXT,
+                main_text     TEXT,
+                links         TEXT,
+                tier          TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS cookie_strategies (
+                domain     TEXT PRIMARY KEY,
+                selector   TEXT,
+                updated_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def get(self, url):
+        """Liefert den Cache-Eintrag einer URL als Dictionary oder None."""
+        cursor = self.conn.execute("SELECT * FROM pages WHERE url = ?", (url,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        entry = dict(zip([column[0] for column in cursor.description], row))
+        entry['links'] = json.loads(entry['links']) if entry['links'] else []
+        return entry
+
+    def is_fresh(self, entry):
+        """Prüft, ob der Eintrag noch innerhalb der TTL seines Inhaltstyps liegt."""
+        ttl = CONTENT_TYPE_TTL.get(entry['content_type'], CONTENT_TYPE_TTL['default'])
+        return time.time() - entry['fetched_at'] < ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Header für eine bedingte Anfrage auf Basis der gespeicherten Validatoren."""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, result):
+        """
+        Speichert das Ergebnis eines Abrufs. Gibt True zurück, wenn sich der extrahierte
+        Text gegenüber dem bisherigen Eintrag geändert hat (oder die URL neu ist).
+        """
+        new_hash = text_hash(result['main_text'])
+        previous = self.conn.execute("SELECT text_hash FROM pages WHERE url = ?", (url,)).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, result['final_url'], classify_content_type(url), result.get('etag'),
+             result.get('last_modified'), time.time(), new_hash, result['main_text'],
+             json.dumps(result['links'], ensure_ascii=False), result['tier'])
+        )
+        self.conn.commit()
+        return previous is None or previous[0] != new_hash
+
+    def touch(self, url, etag=None, last_modified=None):
+        """Setzt nach einer 304-Antwort die Abrufzeit (und ggf. neue Validatoren) zurück."""
+        self.conn.execute(
+            "UPDATE pages SET fetched_at = ?, etag = COALESCE(?, etag), "
+            "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+            (time.time(), etag, last_modified, url)
+        )
+        self.conn.commit()
+
+    def load_cookie_strategies(self):
+        """
+        Liefert die gelernten Cookie-Strategien als Dictionary Domain -> XPath-Selektor.
+        NO_BANNER steht für "kein Banner"; solche Einträge verfallen nach NO_BANNER_TTL.
+        """
+        rows = self.conn.execute(
+            "SELECT domain, selector FROM cookie_strategies WHERE selector != ? OR updated_at > ?",
+            (NO_BANNER, time.time() - NO_BANNER_TTL)
+        )
+        return dict(rows.fetchall())
+
+    def set_cookie_strategy(self, domain, selector):
+        """Speichert den funktionierenden Selektor einer Domain (oder NO_BANNER)."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO cookie_strategies VALUES (?, ?, ?)",
+            (domain, selector, time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,286 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# SQLite-Datei mit Job-Queue und Seiten-Journal
+QUEUE_DB_FILE = "crawl_queue.sqlite"
+
+# Wie lange ein Worker eine Firma exklusiv bearbeiten darf, ohne ein Lebenszeichen zu senden
+LEASE_SECONDS = 300
+
+# Abstand zwischen zwei Heartbeats eines Workers
+HEARTBEAT_SECONDS = LEASE_SECONDS / 5
+
+# Nach so vielen abgebrochenen Versuchen wird eine Firma als 'failed' markiert
+MAX_ATTEMPTS = 3
+
+# ==============================================================================
+# 2. JOB-QUEUE
+# ==============================================================================
+
+def make_worker_id(suffix=''):
+    """Eindeutige Worker-ID aus Rechnername und Prozess-ID (auch über mehrere Maschinen)."""
+    return f"{socket.gethostname()}:{os.getpid()}{suffix}"
+
+class CrawlQueue:
+    """
+    Lokale, SQLite-basierte Job-Queue für den Crawler.
+
+    Jede Firma ist ein Job, den ein Worker für LEASE_SECONDS least und per Heartbeat verlängert.
+    Stirbt ein Worker, läuft die Lease ab und ein anderer Worker übernimmt die Firma. Jede
+    besuchte Seite wird zusammen mit den neu gefundenen Links im Journal festgehalten, sodass
+    die Übernahme mitten in der Firma fortsetzt statt von vorne zu beginnen.
+
+    Mehrere Prozesse (auch auf verschiedenen Rechnern mit gemeinsamem Dateisystem) können
+    dieselbe Datei nutzen. Es wird bewusst der klassische Rollback-Journal-Modus verwendet,
+    da WAL auf Netzlaufwerken nicht funktioniert.
+    """
+
+    def __init__(self, db_file=QUEUE_DB_FILE):
+        self.conn = sqlite3.connect(db_file, timeout=60, check_same_thread=False, isolation_level=None)
+        # Eine Verbindung wird von mehreren Threads (asyncio.to_thread) genutzt
+        self._lock = threading.Lock()
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS companies (
+                ticker        TEXT PRIMARY KEY,
+                company       TEXT,
+                base_domain   TEXT,
+                position      INTEGER,
+                state         TEXT DEFAULT 'pending',
+                lease_owner   TEXT,
+                lease_expires REAL,
+                attempts      INTEGER DEFAULT 0,
+                updated_at    REAL
+            );
+            CREATE TABLE IF NOT EXISTS frontier (
+                ticker TEXT,
+                url    TEXT,
+                score  REAL,
+                state  TEXT DEFAULT 'pending',
+                PRIMARY KEY (ticker, url)
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                ticker      TEXT,
+                url         TEXT,
+                seq         INTEGER,
+                status      TEXT,
+                record      TEXT,
+                fingerprint TEXT,
+                duplicate   INTEGER,
+                fetched_at  REAL,
+                PRIMARY KEY (ticker, url)
+            );
+        """)
+
+    def _transaction(self, callback):
+        """Führt `callback(cursor)` in einer exklusiven Schreibtransaktion aus."""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = callback(cursor)
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return result
+
+    # --- Firmen-Jobs -------------------------------------------------------------
+
+    def enqueue_companies(self, jobs, reset=False):
+        """Legt Jobs (Firma, Ticker, Basis-Domain) an. Mit `reset` werden alle Fortschritte verworfen."""
+        def callback(cursor):
+            if reset:
+                cursor.execute("DELETE FROM companies")
+                cursor.execute("DELETE FROM frontier")
+                cursor.execute("DELETE FROM pages")
+            for position, (company, ticker, base_domain) in enumerate(jobs):
+                cursor.execute(
+                    "INSERT OR IGNORE INTO companies (ticker, company, base_domain, position, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (ticker, company, base_domain, position, time.time())
+                )
+        self._transaction(callback)
+
+    def lease_company(self, worker_id, lease_seconds=LEASE_SECONDS):
+        """
+        Least die nächste offene Firma (oder eine, deren Lease abgelaufen ist).
+        Gibt (Firma, Ticker, Basis-Domain) zurück oder None, wenn nichts mehr zu tun ist.
+        """
+        def callback(cursor):
+            now = time.time()
+            # Firmen, die zu oft abgebrochen sind, endgültig aussortieren
+            cursor.execute(
+                "UPDATE companies SET state = 'failed', updated_at = ? "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, MAX_ATTEMPTS)
+            )
+            row = cursor.execute(
+                "SELECT ticker, company, base_domain FROM companies "
+                "WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY position LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            cursor.execute(
+                "UPDATE companies SET state = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE ticker = ?",
+                (worker_id, now + lease_seconds, now, row[0])
+            )
+            return row[1], row[0], row[2]
+        return self._transaction(callback)
+
+    def heartbeat(self, ticker, worker_id, lease_seconds=LEASE_SECONDS):
+        """Verlängert die Lease. Gibt False zurück, wenn die Lease inzwischen einem anderen Worker gehört."""
+        def callback(cursor):
+            cursor.execute(
+                "UPDATE companies SET lease_expires = ?, updated_at = ? "
+                "WHERE ticker = ? AND lease_owner = ? AND state = 'leased'",
+                (time.time() + lease_seconds, time.time(), ticker, worker_id)
+            )
+            return cursor.rowcount == 1
+        return self._transaction(callback)
+
+    def finish_company(self, ticker, worker_id, state='done'):
+        """Schließt eine Firma ab ('done') oder gibt sie nach einem Fehler frei ('pending')."""
+        def callback(cursor):
+            if state == 'pending':
+                # Nach zu vielen Versuchen nicht erneut freigeben
+                cursor.execute(
+                    "UPDATE companies SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                    "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                    "WHERE ticker = ? AND lease_owner = ?",
+                    (MAX_ATTEMPTS, time.time(), ticker, worker_id)
+                )
+            else:
+                cursor.execute(
+                    "UPDATE companies SET state = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                    "WHERE ticker = ? AND lease_owner = ?",
+                    (state, time.time(), ticker, worker_id)
+                )
+        self._transaction(callback)
+
+    def counts(self):
+        """Anzahl der Firmen pro Zustand (pending, leased, done, failed)."""
+        with self._lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM companies GROUP BY state").fetchall())
+
+    # --- Frontier und Seiten-Journal ---------------------------------------------
+
+    @staticmethod
+    def _holds_lease(cursor, ticker, worker_id):
+        """Prüft innerhalb der laufenden Transaktion, ob die Lease der Firma noch dem Worker gehört."""
+        return cursor.execute(
+            "SELECT 1 FROM companies WHERE ticker = ? AND lease_owner = ? AND state = 'leased'",
+            (ticker, worker_id)
+        ).fetchone() is not None
+
+    def add_frontier(self, ticker, worker_id, scored_urls):
+        """
+        Nimmt URLs mit Score in die persistente Frontier einer Firma auf (bzw. erhöht den Score).
+        Gibt False zurück (ohne zu schreiben), wenn die Lease nicht mehr dem Worker gehört.
+        """
+        def callback(cursor):
+            if not self._holds_lease(cursor, ticker, worker_id):
+                return False
+            cursor.executemany(
+                "INSERT INTO frontier (ticker, url, score) VALUES (?, ?, ?) "
+                "ON CONFLICT (ticker, url) DO UPDATE SET score = MAX(score, excluded.score)",
+                [(ticker, url, score) for url, score in scored_urls]
+            )
+            return True
+        return self._transaction(callback)
+
+    def journal_page(self, ticker, worker_id, url, status, record=None, fingerprint=None, duplicate=False,
+                     new_links=()):
+        """
+        Hält eine besuchte Seite fest: Ergebnis (Datensatz für die JSON-Datei oder None), Fingerprint
+        und die auf ihr gefundenen Links. Alles in einer Transaktion, damit der Stand konsistent bleibt.
+        Nur solange der Worker die Lease hält (in derselben Transaktion geprüft): sonst hat ein anderer
+        Worker die Firma übernommen, es wird nichts geschrieben und False zurückgegeben.
+        """
+        def callback(cursor):
+            if not self._holds_lease(cursor, ticker, worker_id):
+                return False
+            # Fortlaufend über MAX statt COUNT: ein erneut journalisiertes URL ersetzt seine Zeile,
+            # die Anzahl wächst dann nicht und eine Nummer wäre doppelt vergeben
+            seq = cursor.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM pages WHERE ticker = ?", (ticker,)
+            ).fetchone()[0]
+            cursor.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (ticker, url, seq, str(status),
+                 json.dumps(record, ensure_ascii=False) if record else None,
+                 # Als Text speichern, da SQLite-Integer vorzeichenbehaftet sind
+                 str(fingerprint) if fingerprint is not None else None,
+                 int(duplicate), time.time())
+            )
+            cursor.execute(
+                "INSERT INTO frontier (ticker, url, score, state) VALUES (?, ?, 0, 'done') "
+                "ON CONFLICT (ticker, url) DO UPDATE SET state = 'done'",
+                (ticker, url)
+            )
+            cursor.executemany(
+                "INSERT INTO frontier (ticker, url, score) VALUES (?, ?, ?) "
+                "ON CONFLICT (ticker, url) DO UPDATE SET score = MAX(score, excluded.score)",
+                [(ticker, link_url, score) for link_url, score in new_links]
+            )
+            return True
+        return self._transaction(callback)
+
+    def load_progress(self, ticker):
+        """
+        Liefert den bisherigen Stand einer Firma: Liste der journalisierten Seiten
+        (URL, Datensatz, Fingerprint, Duplikat) in Besuchsreihenfolge und die noch offenen
+        Frontier-URLs mit Score.
+        """
+        with self._lock:
+            pages = [
+                (url, json.loads(record) if record else None,
+                 int(fingerprint) if fingerprint is not None else None, bool(duplicate))
+                for url, record, fingerprint, duplicate in self.conn.execute(
+                    "SELECT url, record, fingerprint, duplicate FROM pages WHERE ticker = ? ORDER BY seq",
+                    (ticker,)
+                )
+            ]
+            pending = self.conn.execute(
+                "SELECT url, score FROM frontier WHERE ticker = ? AND state = 'pending'", (ticker,)
+            ).fetchall()
+        return pages, pending
+
+    def close(self):
+        self.conn.close()
+
+class CompanyJournal:
+    """Bindet Queue, Firma und Worker zusammen und merkt sich, ob die Lease verloren ging."""
+
+    def __init__(self, queue, ticker, worker_id):
+        self.queue = queue
+        self.ticker = ticker
+        self.worker_id = worker_id
+        self.lease_lost = False
+
+    def load_progress(self):
+        return self.queue.load_progress(self.ticker)
+
+    def add_frontier(self, scored_urls):
+        if not self.queue.add_frontier(self.ticker, self.worker_id, scored_urls):
+            self.lease_lost = True
+
+    def record_page(self, url, status, record=None, fingerprint=None, duplicate=False, new_links=()):
+        if not self.queue.journal_page(self.ticker, self.worker_id, url, status, record, fingerprint,
+                                       duplicate, new_links):
+            self.lease_lost = True
+
+    def heartbeat(self):
+        if not self.queue.heartbeat(self.ticker, self.worker_id):
+            self.lease_lost = True
+        return not self.lease_lost
@@ -0,0 +1,162 @@
+import argparse
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# JSONL-Datei, in die pro gecrawlter Seite ein Datensatz mit den Phasen-Zeiten geschrieben wird
+TIMING_LOG_FILE = "crawl_timings.jsonl"
+
+# Anzahl der langsamsten Domains im Bericht
+SLOWEST_DOMAINS_IN_REPORT = 10
+
+# ==============================================================================
+# 2. ZEITMESSUNG PRO SEITE
+# ==============================================================================
+
+class PageTimer:
+    """
+    Misst die Phasen eines Seitenabrufs (z.B. 'http_fetch', 'goto', 'cookie_banner',
+    'js_wait', 'extract', 'link_harvest'). Mehrfach gemessene Phasen werden aufsummiert.
+    """
+
+    def __init__(self, ticker, url):
+        self.ticker = ticker
+        self.url = url
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        self.phases = {}
+        self.status = None
+        self.tier = None
+        self.bytes = 0
+        self.text_chars = 0
+
+    @contextmanager
+    def span(self, phase):
+        """Kontextmanager, der die Dauer des Blocks der Phase `phase` zuschlägt."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[phase] = self.phases.get(phase, 0.0) + time.monotonic() - start
+
+    def to_record(self):
+        """Datensatz für die JSONL-Datei."""
+        return {
+            'ts': self.started_at,
+            'ticker': self.ticker,
+            'url': self.url,
+            'domain': urlparse(self.url).netloc,
+            'status': self.status,
+            'tier': self.tier,
+            'bytes': self.bytes,
+            'text_chars': self.text_chars,
+            'total': round(time.monotonic() - self._start, 4),
+            'phases': {phase: round(seconds, 4) for phase, seconds in self.phases.items()},
+        }
+
+class TimingLog:
+    """Schreibt die Datensätze aller Seiten eines Laufs als JSONL und behält sie für den Bericht."""
+
+    def __init__(self, path=TIMING_LOG_FILE):
+        self.path = path
+        self.records = []
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, timer):
+        record = timer.to_record()
+        self.records.append(record)
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+# ==============================================================================
+# 3. AUSWERTUNG
+# ==============================================================================
+
+def load_timings(path=TIMING_LOG_FILE):
+    """Liest alle Datensätze aus einer Timing-JSONL-Datei."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(values, q):
+    """Perzentil nach der Nearest-Rank-Methode (q zwischen 0 und 100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))  # aufrunden
+    return ordered[int(rank) - 1]
+
+def summarize_timings(records):
+    """Verdichtet die Datensätze zu p50/p95 pro Phase, langsamsten Domains und Seiten pro Sekunde."""
+    phase_values = defaultdict(list)
+    domain_totals = defaultdict(lambda: [0.0, 0])
+    tiers = defaultdict(int)
+    for record in records:
+        for phase, seconds in record['phases'].items():
+            phase_values[phase].append(seconds)
+        domain_totals[record['domain']][0] += record['total']
+        domain_totals[record['domain']][1] += 1
+        tiers[record['tier'] or 'skip'] += 1
+
+    if records:
+        wall_time = max(r['ts'] + r['total'] for r in records) - min(r['ts'] for r in records)
+    else:
+        wall_time = 0.0
+
+    slowest_domains = sorted(domain_totals.items(), key=lambda item: item[1][0], reverse=True)
+    return {
+        'pages': len(records),
+        'wall_seconds': wall_time,
+        'pages_per_second': len(records) / wall_time if wall_time > 0 else 0.0,
+        'bytes': sum(r['bytes'] for r in records),
+        'tiers': dict(tiers),
+        'phases': {
+            phase: {
+                'count': len(values),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'total': sum(values),
+            }
+            for phase, values in phase_values.items()
+        },
+        'slowest_domains': [
+            {'domain': domain, 'seconds': total, 'pages': count, 'avg': total / count}
+            for domain, (total, count) in slowest_domains[:SLOWEST_DOMAINS_IN_REPORT]
+        ],
+    }
+
+def print_timing_report(records):
+    """Gibt den Timing-Bericht auf der Konsole aus."""
+    summary = summarize_timings(records)
+    print("\n--- TIMING-BERICHT ---")
+    print(f"Seiten: {summary['pages']} in {summary['wall_seconds']:.1f} s "
+          f"({summary['pages_per_second']:.2f} Seiten/s, {summary['bytes'] / 1e6:.1f} MB)")
+    print("Stufen: " + ", ".join(f"{tier}={count}" for tier, count in sorted(summary['tiers'].items())))
+
+    print(f"\n{'Phase':<16}{'Anzahl':>8}{'p50 [s]':>10}{'p95 [s]':>10}{'Summe [s]':>12}")
+    phases = sorted(summary['phases'].items(), key=lambda item: item[1]['total'], reverse=True)
+    for phase, stats in phases:
+        print(f"{phase:<16}{stats['count']:>8}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['total']:>12.1f}")
+
+    print("\nLangsamste Domains:")
+    for entry in summary['slowest_domains']:
+        print(f"   {entry['domain']:<40} {entry['seconds']:>8.1f} s  {entry['pages']:>3} Seiten  Ø {entry['avg']:.2f} s")
+
+# ==============================================================================
+# 4. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wertet die Timing-Datei des Crawlers aus.")
+    parser.add_argument('path', nargs='?', default=TIMING_LOG_FILE, help="JSONL-Datei mit den Timing-Datensätzen")
+    args = parser.parse_args()
+
+    print_timing_report(load_timings(args.path))
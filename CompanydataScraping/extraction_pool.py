@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import trafilatura
+from lxml import etree, html as lxml_html
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Anzahl der Prozesse für die Text-Extraktion (ein Kern bleibt für Browser und Event-Loop frei)
+DEFAULT_EXTRACT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Wie viele HTML-Dokumente pro Extraktions-Prozess höchstens gleichzeitig in der Pipeline
+# liegen dürfen. Darüber hinaus warten die Crawler, bis wieder Platz ist (Backpressure).
+PENDING_PER_WORKER = 2
+
+# ==============================================================================
+# 2. EXTRAKTION (läuft im Worker-Prozess)
+# ==============================================================================
+
+def extract_main_text(html_content):
+    """Extrahiert den Haupttext einer Seite mit trafilatura."""
+    return trafilatura.extract(html_content, include_comments=False, favor_precision=True)
+
+def extract_links_from_html(html_content):
+    """Liest alle Links (href, Linktext) aus statischem HTML, ohne Browser."""
+    try:
+        document = lxml_html.fromstring(html_content)
+    except (etree.ParserError, ValueError):
+        return []
+    return [(a.get('href'), a.text_content()) for a in document.iter('a') if a.get('href')]
+
+def extract_page(html_content, with_links=True):
+    """
+    Extrahiert Haupttext und (optional) Links eines HTML-Dokuments. Gibt (Text, Links) zurück;
+    die Links werden nur gelesen, wenn überhaupt Text gefunden wurde.
+    Muss auf Modulebene stehen, damit sie an die Worker-Prozesse übergeben werden kann.
+    """
+    main_text = extract_main_text(html_content)
+    links = extract_links_from_html(html_content) if with_links and main_text else []
+    return main_text, links
+
+# ==============================================================================
+# 3. PROZESS-POOL MIT BACKPRESSURE
+# ==============================================================================
+
+class ExtractionPool:
+    """
+    Verlagert die CPU-lastige Extraktion (lxml-Parsing in trafilatura) aus der Event-Loop in
+    einen Prozess-Pool. Während ein Dokument extrahiert wird, navigieren die übrigen Crawler
+    weiter. Ein Semaphor begrenzt die Zahl der Dokumente in der Pipeline, damit der Speicher
+    bei langsamer Extraktion nicht mit rohem HTML vollläuft.
+
+    Mit workers=0 wird direkt in der Event-Loop extrahiert (altes Verhalten).
+    """
+
+    def __init__(self, workers=DEFAULT_EXTRACT_WORKERS, max_pending=None):
+        self.workers = workers
+        self._executor = None
+        if workers > 0:
+            # 'spawn' statt 'fork': der Hauptprozess hält bereits Threads und den Playwright-Treiber
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        self._max_pending = max_pending or max(1, workers) * PENDING_PER_WORKER
+        self._slots = None
+
+    async def extract(self, html_content, timer=None, with_links=True):
+        """Extrahiert (Text, Links) eines Dokuments; wartet, solange die Pipeline voll ist."""
+        span = timer.span if timer else (lambda phase: nullcontext())
+        if self._executor is None:
+            with span('extract'):
+                return extract_page(html_content, with_links)
+
+        if self._slots is None:
+            # Erst hier anlegen, damit der Semaphor zur laufenden Event-Loop gehört
+            self._slots = asyncio.Semaphore(self._max_pending)
+        with span('extract_wait'):
+            await self._slots.acquire()
+        try:
+            with span('extract'):
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, extract_page, html_content, with_links
+                )
+        finally:
+            self._slots.release()
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
@@ -0,0 +1,90 @@
+import hashlib
+import re
+from collections import defaultdict
+
+import numpy as np
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Anzahl Wörter pro Shingle für den SimHash
+SHINGLE_SIZE = 3
+
+# Zwei Texte gelten als Beinahe-Duplikate, wenn sich ihre 64-Bit-Fingerprints
+# in höchstens so vielen Bits unterscheiden
+MAX_HAMMING_DISTANCE = 3
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# ==============================================================================
+# 2. FINGERPRINT
+# ==============================================================================
+
+def _stable_hash64(value):
+    """Stabiler 64-Bit-Hash (unabhängig von PYTHONHASHSEED, damit Fingerprints vergleichbar bleiben)."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def simhash(text):
+    """
+    64-Bit-SimHash eines Textes über Wort-Shingles. Ähnliche Texte (z.B. gleiche Seite mit
+    anderem Datum oder anderer Navigation) haben Fingerprints mit kleinem Hamming-Abstand.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) >= SHINGLE_SIZE:
+        shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    else:
+        shingles = set(words)
+    if not shingles:
+        return 0
+
+    hashes = np.fromiter((_stable_hash64(shingle) for shingle in shingles), dtype='<u8', count=len(shingles))
+    # Bits aller Shingle-Hashes auf einmal auszählen: Bit i ist im Fingerprint gesetzt,
+    # wenn es in der Mehrheit der Shingles gesetzt ist
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(majority, bitorder='little').tobytes(), 'little')
+
+def hamming_distance(a, b):
+    return (a ^ b).bit_count()
+
+# ==============================================================================
+# 3. INDEX
+# ==============================================================================
+
+class SimHashIndex:
+    """
+    Kompakter Index von Fingerprints für die Suche nach Beinahe-Duplikaten.
+
+    Der Fingerprint wird in max_distance + 1 Bänder zerlegt. Bei höchstens max_distance
+    abweichenden Bits stimmt mindestens ein Band exakt überein (Schubfachprinzip), daher
+    muss nur in den Buckets mit gleichem Bandwert gesucht werden.
+    """
+
+    def __init__(self, max_distance=MAX_HAMMING_DISTANCE):
+        self.max_distance = max_distance
+        self.num_bands = max_distance + 1
+        self.band_bits = 64 // self.num_bands
+        self._buckets = [defaultdict(list) for _ in range(self.num_bands)]
+        self._size = 0
+
+    def _band_values(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (band * self.band_bits)) & mask for band in range(self.num_bands)]
+
+    def find(self, fingerprint):
+        """Liefert den Schlüssel eines Beinahe-Duplikats oder None."""
+        for band, value in enumerate(self._band_values(fingerprint)):
+            for other_fingerprint, key in self._buckets[band].get(value, ()):
+                if hamming_distance(fingerprint, other_fingerprint) <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, fingerprint, key):
+        """Nimmt einen Fingerprint mit einem Schlüssel (z.B. der URL) in den Index auf."""
+        for band, value in enumerate(self._band_values(fingerprint)):
+            self._buckets[band][value].append((fingerprint, key))
+        self._size += 1
+
+    def __len__(self):
+        return self._size
@@ -1,21 +1,37 @@
+import argparse
+import asyncio
+import heapq
+import itertools
 import os
 import json
 import re
 import time
-from collections import deque
+from collections import Counter
 from urllib.parse import urljoin, urlparse
 
 import pandas as pd
-import trafilatura
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+import requests
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from requests.adapters import HTTPAdapter
+
+from crawl_cache import CACHE_DB_FILE, NO_BANNER, CrawlCache
+from crawl_queue import HEARTBEAT_SECONDS, CompanyJournal, CrawlQueue, make_worker_id
+from crawl_timing import TIMING_LOG_FILE, PageTimer, TimingLog, print_timing_report
+from extraction_pool import DEFAULT_EXTRACT_WORKERS, ExtractionPool
+from near_duplicates import SimHashIndex, simhash
+from sitemap_discovery import discover_seed_urls, fetch_robots
 
 # ==============================================================================
 # 1. KONSTANTEN UND KONFIGURATION
 # ==============================================================================
 
-# Maximale Anzahl von Unterseiten, die pro Firma gecrawlt werden sollen
+# Maximale Anzahl von Unterseiten, die pro Firma gecrawlt werden sollen.
+# Beinahe-Duplikate zählen nicht mit, damit das Budget neuen Inhalten zugutekommt.
 MAX_PAGES_PER_COMPANY = 25
 
+# Harte Obergrenze der Abrufe pro Firma, auch wenn viele Seiten Duplikate sind
+MAX_FETCHES_PER_COMPANY = 2 * MAX_PAGES_PER_COMPANY
+
 # Verzeichnis, in dem die JSON-Dateien mit den extrahierten Daten gespeichert werden
 OUTPUT_DIR = "crawled_company_data"
 
@@ -44,12 +60,87 @@ URL_BLOCKLIST = [
 # Pfad zur Eingabedatei
 INPUT_CSV_FILE = '/Users/lania/VSCode/DataScience/WikiNasdaq_100_constituents.csv'
 
+# Anzahl der Firmen, die parallel (jeweils in einem eigenen Browser-Kontext) gecrawlt werden
+DEFAULT_CONCURRENCY = 1
+
+# Mindestabstand in Sekunden zwischen zwei Anfragen an dieselbe Domain.
+# Ersetzt die globalen Pausen: jede Website sieht weiterhin dieselbe Anfragerate,
+# unabhängig davon, wie viele Firmen gleichzeitig gecrawlt werden.
+DOMAIN_MIN_INTERVAL = 1.0
+
+# User-Agent für alle Browser-Kontexte
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Alle Schlüsselwörter als ein vorkompilierter Ausdruck. Bindestriche in Schlüsselwörtern
+# ('über-uns', 'who-we-are') passen sowohl auf '-' als auch auf Leerzeichen.
+RELEVANCE_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(
+        re.escape(keyword).replace(r'\-', r'[\s-]')
+        for keyword in sorted(set(RELEVANT_KEYWORDS), key=len, reverse=True)
+    ) + r')\b'
+)
+
+# Mindestlänge des extrahierten Textes, damit eine Seite als relevant gilt.
+# Liefert der HTTP-Abruf weniger Text, wird die Seite im Browser nachgeladen.
+MIN_TEXT_LENGTH = 150
+
+# Timeout und Verbindungspool für den einfachen HTTP-Abruf (Stufe 1)
+HTTP_TIMEOUT = 15
+HTTP_POOL_SIZE = 20
+
+# Muster, die darauf hindeuten, dass eine Seite erst per JavaScript gerendert wird
+JS_REQUIRED_PATTERN = re.compile(
+    r'enable javascript|javascript (?:is )?(?:required|disabled)|'
+    r'<div id="(?:root|app|__next)"[^>]*>\s*</div>',
+    re.IGNORECASE
+)
+
+# Liste von Selektoren und Texten, die auf Cookie-Buttons hindeuten
+# XPath wird verwendet, um eine case-insensitive Suche nach Text zu ermöglichen
+COOKIE_SELECTORS = [
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'akzeptieren')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'zustimmen')]",
+    "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'verstanden')]",
+    "//button[@id='onetrust-accept-btn-handler']", # Häufig verwendete ID
+]
+
+# Prüft alle Cookie-Selektoren in einem einzigen Aufruf im Browser und liefert
+# [Selektor-Index, Treffer-Index] des ersten sichtbaren Buttons oder null
+FIND_VISIBLE_BUTTON_JS = """
+xpaths => {
+    for (let i = 0; i < xpaths.length; i++) {
+        const result = document.evaluate(xpaths[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (let j = 0; j < result.snapshotLength; j++) {
+            const element = result.snapshotItem(j);
+            const rect = element.getBoundingClientRect();
+            const style = window.getComputedStyle(element);
+            if (rect.width > 0 && rect.height > 0 && style.visibility !== 'hidden' && style.display !== 'none') {
+                return [i, j];
+            }
+        }
+    }
+    return null;
+}
+"""
+
+# Spezifische Start-URLs für problematische Seiten, um direkt relevantere Bereiche anzusteuern
+OVERRIDE_DOMAINS = {
+    "AMZN": "https://www.aboutamazon.com/news",
+    "NFLX": "https://about.netflix.com/en/news",
+    "ABNB": "https://news.airbnb.com/"
+}
+
 # ==============================================================================
 # 2. HILFSFUNKTIONEN
 # ==============================================================================
 
 def save_data_to_json(data_list, ticker, company_name):
-    """Speichert die Liste der extrahierten Texte in einer unternehmensspezifischen JSON-Datei."""
+    """
+    Speichert die Liste der extrahierten Texte in einer unternehmensspezifischen JSON-Datei.
+    Ist der Inhalt identisch mit der vorhandenen Datei, wird nichts geschrieben.
+    """
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
@@ -58,6 +149,15 @@ def save_data_to_json(data_list, ticker, company_name):
     filename = f"{ticker}_{safe_company_name}.json"
     filepath = os.path.join(OUTPUT_DIR, filename)
 
+    if os.path.exists(filepath):
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                if json.load(f) == data_list:
+                    print(f"\n[INFO] Daten für {company_name} unverändert, {filepath} wird nicht überschrieben.")
+                    return
+        except (IOError, ValueError):
+            pass
+
     try:
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data_list, f, ensure_ascii=False, indent=4)
@@ -89,40 +189,383 @@ def get_fallback_domain(company_name):
     print(f"   -> Generierte Fallback-Domain: {domain}")
     return domain
 
-def handle_cookie_banner(page):
-    """Versucht, gängige Cookie-Banner zu finden und zu akzeptieren."""
-    # Liste von Selektoren und Texten, die auf Cookie-Buttons hindeuten
-    # XPath wird verwendet, um eine case-insensitive Suche nach Text zu ermöglichen
-    cookie_selectors = [
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'accept')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'agree')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'akzeptieren')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'zustimmen')]",
-        "//button[contains(translate(., 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'verstanden')]",
-        "//button[@id='onetrust-accept-btn-handler']", # Häufig verwendete ID
-    ]
-
-    for selector in cookie_selectors:
-        try:
-            # Finde den ersten sichtbaren Button, der dem Selector entspricht
-            button = page.locator(selector).first
-            if button.is_visible(timeout=1000):
-                button.click(timeout=2000)
-                print("   [INFO] Cookie-Banner akzeptiert.")
-                page.wait_for_timeout(1500)  # Kurze Pause, damit die Seite nach dem Klick neu laden kann
-                return # Beenden, da der Banner behandelt wurde
-        except Exception:
-            # Button nicht gefunden oder nicht klickbar, einfach weitermachen
-            continue
+async def handle_cookie_banner(page, consent_state, resources):
+    """
+    Versucht, gängige Cookie-Banner zu finden und zu akzeptieren.
+
+    Pro Browser-Kontext wird jede Domain nur einmal geprüft (`consent_state`), da die
+    Zustimmung danach in den Cookies des Kontexts liegt. Der zuletzt funktionierende Selektor
+    einer Domain (oder die Erkenntnis, dass es keinen Banner gibt) wird über Läufe hinweg gemerkt.
+    """
+    domain = urlparse(page.url).netloc
+    if domain in consent_state:
+        return
+    consent_state.add(domain)
+
+    strategy = resources.cookie_strategies.get(domain)
+    if strategy == NO_BANNER:
+        return
+
+    # Den gelernten Selektor zuerst prüfen, danach alle übrigen
+    candidates = COOKIE_SELECTORS
+    if strategy:
+        candidates = [strategy] + [selector for selector in COOKIE_SELECTORS if selector != strategy]
+
+    try:
+        match = await page.evaluate(FIND_VISIBLE_BUTTON_JS, candidates)
+    except Exception:
+        # Seite hat während der Prüfung navigiert o.ä., beim nächsten Mal erneut versuchen
+        consent_state.discard(domain)
+        return
+
+    if match is None:
+        resources.remember_cookie_strategy(domain, NO_BANNER)
+        return
+
+    selector_index, match_index = match
+    button = page.locator(f"xpath={candidates[selector_index]}").nth(match_index)
+    try:
+        await button.click(timeout=2000)
+    except Exception:
+        # Button nicht klickbar, einfach weitermachen
+        return
+    print("   [INFO] Cookie-Banner akzeptiert.")
+    resources.remember_cookie_strategy(domain, candidates[selector_index])
+    try:
+        # Statt fester Pause nur so lange warten, bis der Banner verschwunden ist
+        await button.wait_for(state='hidden', timeout=1500)
+    except Exception:
+        pass
+
+def create_http_session(pool_size=HTTP_POOL_SIZE):
+    """Erstellt eine HTTP-Session mit Keep-Alive-Verbindungspool für den statischen Abruf."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9,de;q=0.8',
+    })
+    return session
+
+def looks_like_js_page(html_content):
+    """Erkennt Seiten, deren Inhalt erst per JavaScript nachgeladen wird (App-Shells, noscript-Hinweise)."""
+    return bool(JS_REQUIRED_PATTERN.search(html_content))
+
+class FetchTierStats:
+    """Zählt, wie viele Seiten per HTTP bzw. Browser geladen wurden und wie lange das dauerte."""
+
+    def __init__(self):
+        self.http_pages = 0
+        self.http_seconds = 0.0
+        self.browser_pages = 0
+        self.browser_seconds = 0.0
+        self.escalations = Counter()
+        self.cache_fresh = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.sitemap_seeds = 0
+        self.robots_blocked = 0
+        self.duplicates_in_company = 0
+        self.duplicates_across_companies = 0
+
+    def report(self):
+        """Gibt die Statistik pro Abruf-Stufe und die geschätzte eingesparte Browser-Zeit aus."""
+        total = self.http_pages + self.browser_pages
+        print("\n--- ABRUF-STATISTIK ---")
+        print(f"Seiten gesamt:        {total + self.cache_fresh + self.not_modified}")
+        print(f"Aus Cache (frisch):   {self.cache_fresh}")
+        print(f"304 Not Modified:     {self.not_modified}")
+        print(f"Neu geladen, Text unverändert: {self.unchanged}")
+        print(f"Seed-URLs aus Sitemaps: {self.sitemap_seeds}")
+        print(f"Durch robots.txt gesperrt: {self.robots_blocked}")
+        print(f"Beinahe-Duplikate übersprungen: {self.duplicates_in_company} innerhalb einer Firma, "
+              f"{self.duplicates_across_companies} firmenübergreifend")
+        print(f"Stufe 1 (HTTP):       {self.http_pages} Seiten, {self.http_seconds:.1f} s")
+        print(f"Stufe 2 (Browser):    {self.browser_pages} Seiten, {self.browser_seconds:.1f} s")
+        for reason, count in self.escalations.most_common():
+            print(f"   Eskalation '{reason}': {count}")
+        if self.browser_pages:
+            avg_browser = self.browser_seconds / self.browser_pages
+            saved = self.http_pages * avg_browser
+            print(f"Geschätzt eingesparte Browser-Zeit: {saved:.1f} s (Ø {avg_browser:.2f} s pro Browser-Seite)")
+
+class DomainRateLimiter:
+    """
+    Höflichkeitslimit pro Domain: Zwischen zwei Anfragen an dieselbe Domain liegen
+    mindestens `min_interval` Sekunden, egal wie viele Worker parallel laufen.
+    """
+
+    def __init__(self, min_interval=DOMAIN_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot = {}
+
+    async def wait(self, url):
+        """Reserviert den nächsten freien Zeitslot für die Domain der URL und wartet darauf."""
+        domain = urlparse(url).netloc
+        now = time.monotonic()
+        # Die Reservierung passiert ohne await dazwischen und ist damit im Event-Loop atomar
+        slot = max(now, self._next_slot.get(domain, 0.0))
+        self._next_slot[domain] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class CrawlResources:
+    """Ressourcen, die sich alle parallel laufenden Firmen-Crawls eines Laufs teilen."""
+
+    def __init__(self, cache_db=CACHE_DB_FILE, use_sitemaps=True, timing_log=TIMING_LOG_FILE,
+                 extract_workers=DEFAULT_EXTRACT_WORKERS):
+        self.rate_limiter = DomainRateLimiter()
+        self.use_sitemaps = use_sitemaps
+        self.http_session = create_http_session()
+        self.stats = FetchTierStats()
+        # Ohne cache_db wird jede Seite bei jedem Lauf neu geladen
+        self.cache = CrawlCache(cache_db) if cache_db else None
+        # Ohne timing_log werden keine Phasen-Zeiten protokolliert
+        self.timing_log = TimingLog(timing_log) if timing_log else None
+        # Fingerprints aller in diesem Lauf gespeicherten Texte (firmenübergreifend)
+        self.corpus_fingerprints = SimHashIndex()
+        # Gelernte Cookie-Banner-Selektoren pro Domain (ohne Cache nur für diesen Lauf)
+        self.cookie_strategies = self.cache.load_cookie_strategies() if self.cache else {}
+        # Prozess-Pool für trafilatura, damit Navigation und Extraktion parallel laufen
+        self.extractor = ExtractionPool(extract_workers)
+
+    def remember_cookie_strategy(self, domain, selector):
+        """Merkt sich den Cookie-Selektor einer Domain für diesen und (mit Cache) spätere Läufe."""
+        if self.cookie_strategies.get(domain) == selector:
+            return
+        self.cookie_strategies[domain] = selector
+        if self.cache:
+            self.cache.set_cookie_strategy(domain, selector)
+
+    def close(self):
+        self.http_session.close()
+        self.extractor.close()
+        if self.cache:
+            self.cache.close()
+        if self.timing_log:
+            self.timing_log.close()
 
 # ==============================================================================
 # 3. KERN-CRAWLER-FUNKTION
 # ==============================================================================
 
-def crawl_company_website(company_name, ticker, base_domain):
+def relevance_score(url, link_text=''):
+    """
+    Bewertet einen Link nach der Anzahl unterschiedlicher Schlüsselwörter in URL und Linktext.
+    Treffer in der URL zählen doppelt, da sie zuverlässiger sind als der sichtbare Text.
+    0 bedeutet: nicht relevant.
+    """
+    url_hits = {hit.replace(' ', '-') for hit in RELEVANCE_PATTERN.findall(url.lower().replace('-', ' '))}
+    text_hits = {hit.replace(' ', '-') for hit in RELEVANCE_PATTERN.findall(link_text.lower())}
+    return 2 * len(url_hits) + len(text_hits)
+
+class CrawlFrontier:
+    """
+    Set-basierte Prioritäts-Warteschlange der zu besuchenden URLs. Die URL mit dem höchsten
+    Relevanz-Score wird zuerst besucht, bei gleichem Score die zuerst gefundene. Wird eine
+    bereits wartende URL mit höherem Score erneut gefunden, rückt sie entsprechend vor.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._best_score = {}   # URL -> höchster Score der noch wartenden URL
+        self._seen = set()      # alle jemals hinzugefügten URLs (wartend oder besucht)
+        self._counter = itertools.count()
+
+    def add(self, url, score):
+        """Fügt eine URL hinzu bzw. erhöht ihre Priorität. Gibt True zurück, wenn sie neu ist."""
+        is_new = url not in self._seen
+        if not is_new and score <= self._best_score.get(url, float('inf')):
+            return False
+        self._seen.add(url)
+        self._best_score[url] = score
+        heapq.heappush(self._heap, (-score, next(self._counter), url))
+        return is_new
+
+    def pop(self):
+        """Entnimmt die URL mit der höchsten Priorität."""
+        while self._heap:
+            negative_score, _, url = heapq.heappop(self._heap)
+            # Veraltete Einträge (URL wurde inzwischen höher eingestuft oder schon entnommen) überspringen
+            if self._best_score.get(url) == -negative_score:
+                del self._best_score[url]
+                return url
+        raise IndexError("pop from empty frontier")
+
+    def __contains__(self, url):
+        return url in self._seen
+
+    def __len__(self):
+        return len(self._best_score)
+
+def is_blocked_url(url):
+    """Prüft, ob eine URL einen Pfad aus der Blockliste enthält."""
+    url = url.lower()
+    return any(blocked_path in url for blocked_path in URL_BLOCKLIST)
+
+def enqueue_relevant_links(links, page_url, base_domain, frontier):
+    """
+    Fügt relevante Links derselben Domain mit ihrem Relevanz-Score zur Frontier hinzu
+    und gibt sie als Liste von (URL, Score) zurück.
+    """
+    base_netloc = urlparse(base_domain).netloc
+    relevant_links = []
+    for href, link_text in links:
+        if not href:
+            continue
+
+        absolute_url = urljoin(page_url, href.strip())
+
+        # Bereinige die URL von Fragmenten (#) und Query-Parametern (?)
+        parsed_url = urlparse(absolute_url)
+
+        # 1. Prüfen, ob der Link zur selben Domain gehört
+        if parsed_url.netloc != base_netloc:
+            continue
+        clean_url = parsed_url._replace(query="", fragment="").geturl()
+
+        # 2. Prüfen, ob der Link auf der Blockliste steht
+        if is_blocked_url(clean_url):
+            continue
+
+        # 3. Relevanzprüfung: Schlüsselwort in URL ODER im sichtbaren Link-Text
+        score = relevance_score(clean_url, link_text or '')
+        if score:
+            frontier.add(clean_url, score)
+            relevant_links.append((clean_url, score))
+    return relevant_links
+
+async def collect_browser_links(page):
+    """Liest alle Links (href, Linktext) der im Browser geladenen Seite mit einem einzigen evaluate-Aufruf."""
+    return await page.eval_on_selector_all(
+        'a[href]',
+        "anchors => anchors.map(a => [a.getAttribute('href'), a.innerText || ''])"
+    )
+
+async def fetch_via_http(url, resources, timer, cached_entry=None):
+    """
+    Stufe 1: Lädt die Seite per HTTP und extrahiert den Text.
+    Gibt (Ergebnis, Eskalationsgrund) zurück. Ist der Grund gesetzt, muss der Browser ran;
+    ist beides None, ist die Seite nicht abrufbar (z.B. 404 oder kein HTML).
+
+    Mit `cached_entry` wird eine bedingte Anfrage gestellt; bei 304 wird die gespeicherte
+    Extraktion zurückgegeben.
+    """
+    start_time = time.monotonic()
+    try:
+        with timer.span('http_fetch'):
+            response = await asyncio.to_thread(
+                resources.http_session.get, url, timeout=HTTP_TIMEOUT,
+                headers=CrawlCache.conditional_headers(cached_entry)
+            )
+    except requests.RequestException:
+        return None, 'http_error'
+    finally:
+        resources.stats.http_seconds += time.monotonic() - start_time
+
+    timer.status = response.status_code
+    timer.bytes += len(response.content)
+    if response.status_code == 304 and cached_entry:
+        resources.stats.not_modified += 1
+        resources.cache.touch(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return cached_result(cached_entry), None
+    if response.status_code in (404, 410):
+        print(f"   [SKIP] Seite nicht erreichbar (Status: {response.status_code}).")
+        return None, None
+    if response.status_code >= 400:
+        # 403/429/5xx kommen oft von Bot-Schutz, den der Browser passieren kann
+        return None, f'http_{response.status_code}'
+    if 'html' not in response.headers.get('Content-Type', 'text/html'):
+        print(f"   [SKIP] Kein HTML ({response.headers.get('Content-Type')}).")
+        return None, None
+
+    html_content = response.text
+    if looks_like_js_page(html_content):
+        return None, 'js_required'
+
+    # Text und Links in einem Schritt im Extraktions-Pool lesen
+    main_text, links = await resources.extractor.extract(html_content, timer)
+    if not main_text or len(main_text) <= MIN_TEXT_LENGTH:
+        return None, 'short_text'
+
+    resources.stats.http_pages += 1
+    return {
+        'main_text': main_text,
+        'links': links,
+        'final_url': response.url,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'tier': 'http',
+    }, None
+
+def cached_result(entry):
+    """Baut aus einem Cache-Eintrag ein Abruf-Ergebnis wie von `fetch_via_http`."""
+    return {
+        'main_text': entry['main_text'],
+        'links': entry['links'],
+        'final_url': entry['final_url'],
+        'etag': entry['etag'],
+        'last_modified': entry['last_modified'],
+        'tier': 'cache',
+    }
+
+async def fetch_via_browser(page, url, resources, timer, consent_state):
+    """Stufe 2: Lädt die Seite im Headless-Browser, wartet auf JS-Rendering und extrahiert den Text."""
+    start_time = time.monotonic()
+    try:
+        with timer.span('goto'):
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=20000)
+
+        timer.status = response.status if response else None
+        if not response or response.status >= 400:
+            print(f"   [SKIP] Seite nicht erreichbar (Status: {response.status if response else 'N/A'}).")
+            return None
+
+        with timer.span('js_wait'):
+            await page.wait_for_timeout(2000)  # Zeit für JS-Rendering geben
+
+        # Cookie-Banner erst nach dem JS-Rendering prüfen, da viele Banner nachgeladen werden
+        with timer.span('cookie_banner'):
+            await handle_cookie_banner(page, consent_state, resources)
+        html_content = await page.content()
+        timer.bytes += len(html_content.encode('utf-8'))
+
+        async def harvest_links():
+            with timer.span('link_harvest'):
+                return await collect_browser_links(page)
+
+        # Die Links aus dem Browser lesen, während der Pool den Text extrahiert
+        (main_text, _), links = await asyncio.gather(
+            resources.extractor.extract(html_content, timer, with_links=False), harvest_links()
+        )
+        if not main_text or len(main_text) <= MIN_TEXT_LENGTH:
+            return None
+        return {
+            'main_text': main_text,
+            'links': links,
+            'final_url': page.url,
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'tier': 'browser',
+        }
+    finally:
+        resources.stats.browser_pages += 1
+        resources.stats.browser_seconds += time.monotonic() - start_time
+
+async def crawl_company_async(context, company_name, ticker, base_domain, resources, journal=None):
     """
     Crawlt eine Unternehmenswebsite, extrahiert Texte von relevanten Unterseiten
     und gibt eine Liste mit den extrahierten Daten zurück.
+
+    Jede Seite wird zuerst per HTTP geladen. Nur wenn dabei zu wenig Text herauskommt oder die
+    Seite JavaScript benötigt, wird sie im Browser-Kontext `context` nachgeladen.
+    Liegt die Seite noch frisch im Crawl-Cache, wird sie gar nicht angefragt.
+
+    Mit `journal` (CompanyJournal der Job-Queue) wird jede besuchte Seite festgehalten und ein
+    abgebrochener Crawl dieser Firma an der letzten Seite fortgesetzt.
     """
     if not base_domain or not base_domain.startswith('http'):
         print(f"[WARN] Ungültige oder fehlende Basis-Domain für {company_name}: '{base_domain}'. Überspringe.")
@@ -131,93 +574,287 @@ def crawl_company_website(company_name, ticker, base_domain):
     print(f"[INFO] Starte Crawling für {company_name} mit Basis-Domain: {base_domain}")
 
     extracted_texts = []
-    urls_to_visit = deque([base_domain])
+    frontier = CrawlFrontier()
+    frontier.add(base_domain, float('inf'))
     visited_urls = set()
+    company_fingerprints = SimHashIndex()
+    duplicate_pages = 0
+
+    # Fortsetzung: bereits journalisierte Seiten und offene Frontier-URLs übernehmen
+    resumed = False
+    if journal:
+        journaled_pages, pending_urls = await asyncio.to_thread(journal.load_progress)
+        resumed = bool(journaled_pages or pending_urls)
+        for url, record, fingerprint, duplicate in journaled_pages:
+            visited_urls.add(url)
+            if duplicate:
+                duplicate_pages += 1
+            elif record:
+                extracted_texts.append(record)
+            if fingerprint is not None and not duplicate:
+                company_fingerprints.add(fingerprint, url)
+                resources.corpus_fingerprints.add(fingerprint, url)
+        for url, score in pending_urls:
+            frontier.add(url, score)
+        if resumed:
+            print(f"   [INFO] [{ticker}] Setze fort: {len(journaled_pages)} Seiten bereits besucht, "
+                  f"{len(pending_urls)} URLs offen.")
+
+    # Discovery: relevante Unterseiten direkt aus robots.txt/Sitemaps übernehmen,
+    # statt erst Navigationsseiten rendern zu müssen, um sie zu finden
+    robots = None
+    seeds = []
+    if resources.use_sitemaps and not resumed:
+        try:
+            robots, seeds = await asyncio.to_thread(
+                discover_seed_urls, resources.http_session, base_domain,
+                relevance_score, is_blocked_url, resources.rate_limiter.min_interval
+            )
+        except Exception as e:
+            print(f"   [WARN] [{ticker}] Sitemap-Discovery fehlgeschlagen: {e}")
+        for url, score in seeds:
+            frontier.add(url, score)
+        resources.stats.sitemap_seeds += len(seeds)
+        print(f"   [INFO] [{ticker}] {len(seeds)} relevante URLs aus Sitemaps übernommen.")
+    elif resources.use_sitemaps:
+        # Die Seeds liegen bereits in der persistenten Frontier, nur robots.txt neu laden
+        robots, _ = await asyncio.to_thread(fetch_robots, resources.http_session, base_domain)
+
+    if journal and not resumed:
+        await asyncio.to_thread(journal.add_frontier, [(base_domain, float('inf'))] + seeds)
+
+    # Die Browser-Seite wird erst geöffnet, wenn eine Seite tatsächlich eskaliert werden muss
+    page = None
+    # Domains, deren Cookie-Banner in diesem Browser-Kontext bereits behandelt wurde
+    consent_state = set()
+    try:
+        while (frontier and len(visited_urls) - duplicate_pages < MAX_PAGES_PER_COMPANY
+               and len(visited_urls) < MAX_FETCHES_PER_COMPANY):
+            if journal and journal.lease_lost:
+                print(f"   [WARN] [{ticker}] Lease verloren, ein anderer Worker übernimmt die Firma.")
+                break
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True, args=['--disable-http2'])
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        )
-        page = context.new_page()
-
-        while urls_to_visit and len(visited_urls) < MAX_PAGES_PER_COMPANY:
-            current_url = urls_to_visit.popleft()
+            current_url = frontier.pop()
             if current_url in visited_urls:
                 continue
 
             visited_urls.add(current_url)
 
-            try:
-                print(f"   -> Versuche: {current_url}")
-                response = page.goto(current_url, wait_until="domcontentloaded", timeout=20000)
+            if robots and not robots.can_fetch('*', current_url):
+                resources.stats.robots_blocked += 1
+                print(f"   [SKIP] Durch robots.txt gesperrt: {current_url}")
+                if journal:
+                    await asyncio.to_thread(journal.record_page, current_url, 'robots')
+                continue
 
-                if not response or response.status >= 400:
-                    print(f"   [SKIP] Seite nicht erreichbar (Status: {response.status if response else 'N/A'}).")
+            timer = PageTimer(ticker, current_url)
+            # Für das Journal: Ergebnis dieser Seite
+            record = fingerprint = None
+            duplicate_of = None
+            new_links = []
+            try:
+                with timer.span('cache_lookup'):
+                    cached_entry = resources.cache.get(current_url) if resources.cache else None
+
+                if cached_entry and resources.cache.is_fresh(cached_entry):
+                    resources.stats.cache_fresh += 1
+                    timer.status = 'cache'
+                    result = cached_result(cached_entry)
+                else:
+                    # Höflichkeitspause pro Domain statt fester Pause nach jeder Seite
+                    with timer.span('polite_wait'):
+                        await resources.rate_limiter.wait(current_url)
+
+                    print(f"   -> [{ticker}] Versuche: {current_url}")
+                    result, escalation_reason = await fetch_via_http(current_url, resources, timer, cached_entry)
+
+                    if escalation_reason:
+                        resources.stats.escalations[escalation_reason] += 1
+                        if page is None:
+                            page = await context.new_page()
+                        with timer.span('polite_wait'):
+                            await resources.rate_limiter.wait(current_url)
+                        result = await fetch_via_browser(page, current_url, resources, timer, consent_state)
+
+                    if result and result['tier'] != 'cache' and resources.cache:
+                        if not resources.cache.store(current_url, result):
+                            resources.stats.unchanged += 1
+
+                if not result:
                     continue
 
-                # NEU: Versuche, einen Cookie-Banner zu behandeln
-                handle_cookie_banner(page)
-
-                page.wait_for_timeout(2000)  # Zeit für JS-Rendering geben
-                html_content = page.content()
-                main_text = trafilatura.extract(html_content, include_comments=False, favor_precision=True)
-
-                if main_text and len(main_text) > 150:
-                    extracted_texts.append({
-                        'Ticker': ticker,
-                        'Company': company_name,
-                        'Source_URL': current_url,
-                        'Content_Type': 'Website Content',
-                        'Raw_Text': main_text
-                    })
-                    print(f"   [OK] {len(main_text)} Zeichen extrahiert.")
-
-                    # Neue, relevante Links auf der aktuellen Seite finden
-                    all_links = page.locator('a[href]').all()
-                    for link in all_links:
-                        href = link.get_attribute('href')
-                        if not href:
-                            continue
-                        
-                        link_text = link.inner_text().lower()
-                        absolute_url = urljoin(current_url, href.strip())
-                        
-                        # Bereinige die URL von Fragmenten (#) und Query-Parametern (?)
-                        parsed_url = urlparse(absolute_url)
-                        clean_url = parsed_url._replace(query="", fragment="").geturl()
-
-                        # 1. Prüfen, ob der Link zur selben Domain gehört
-                        if parsed_url.netloc == urlparse(base_domain).netloc:
-                            # 2. Prüfen, ob der Link auf der Blockliste steht
-                            if any(blocked_path in clean_url.lower() for blocked_path in URL_BLOCKLIST):
-                                continue
-
-                            # Relevanzprüfung: Schlüsselwort in URL ODER im sichtbaren Link-Text
-                            # Wir nutzen Regex für eine genauere Wort-Prüfung
-                            is_relevant_by_url = any(re.search(r'\b' + re.escape(keyword) + r'\b', clean_url.lower().replace('-', ' ')) for keyword in RELEVANT_KEYWORDS)
-                            is_relevant_by_text = any(re.search(r'\b' + re.escape(keyword) + r'\b', link_text) for keyword in RELEVANT_KEYWORDS)
-
-                            if is_relevant_by_url or is_relevant_by_text:
-                                if clean_url not in visited_urls and clean_url not in urls_to_visit:
-                                    urls_to_visit.append(clean_url)
+                timer.tier = result['tier']
+                main_text = result['main_text']
+                timer.text_chars = len(main_text)
+
+                # Beinahe-Duplikate (lokalisierte Pfade, Listen-Seiten mit gleichem Text, ...)
+                # weder speichern noch als Ausgangspunkt für neue Links verwenden
+                with timer.span('dedup'):
+                    fingerprint = simhash(main_text)
+                    duplicate_of = company_fingerprints.find(fingerprint)
+                    if duplicate_of:
+                        resources.stats.duplicates_in_company += 1
+                    else:
+                        duplicate_of = resources.corpus_fingerprints.find(fingerprint)
+                        if duplicate_of:
+                            resources.stats.duplicates_across_companies += 1
+                if duplicate_of:
+                    duplicate_pages += 1
+                    print(f"   [SKIP] [{ticker}] Beinahe-Duplikat von {duplicate_of}.")
+                    continue
+                company_fingerprints.add(fingerprint, current_url)
+                resources.corpus_fingerprints.add(fingerprint, current_url)
+                record = {
+                    'Ticker': ticker,
+                    'Company': company_name,
+                    'Source_URL': current_url,
+                    'Content_Type': 'Website Content',
+                    'Raw_Text': main_text
+                }
+                extracted_texts.append(record)
+                print(f"   [OK] [{ticker}] {len(main_text)} Zeichen extrahiert ({result['tier']}).")
+
+                # Neue, relevante Links auf der aktuellen Seite finden
+                new_links = enqueue_relevant_links(result['links'], result['final_url'], base_domain, frontier)
 
             except PlaywrightTimeoutError:
+                timer.status = 'timeout'
                 print(f"   [FAIL] Timeout beim Laden von {current_url}.")
             except Exception as e:
+                timer.status = 'error'
                 print(f"   [FAIL] Unerwarteter Fehler bei {current_url}: {e}")
+            finally:
+                if resources.timing_log:
+                    resources.timing_log.write(timer)
+                if journal:
+                    await asyncio.to_thread(
+                        journal.record_page, current_url, timer.status, record,
+                        fingerprint, bool(duplicate_of), new_links
+                    )
+    finally:
+        if page is not None:
+            await page.close()
+
+    return extracted_texts
+
+async def launch_browser(playwright):
+    """Startet die (einzige) Chromium-Instanz, die sich alle Worker teilen."""
+    return await playwright.chromium.launch(headless=True, args=['--disable-http2'])
+
+def crawl_company_website(company_name, ticker, base_domain, cache_db=CACHE_DB_FILE, use_sitemaps=True):
+    """
+    Synchroner Einstiegspunkt für eine einzelne Firma (z.B. für Tests im Notebook).
+    Startet einen eigenen Browser und crawlt die Website mit `crawl_company_async`.
+    """
+    async def _crawl():
+        # Für eine einzelne Firma lohnt sich kein eigener Extraktions-Pool
+        resources = CrawlResources(cache_db, use_sitemaps, extract_workers=0)
+        async with async_playwright() as p:
+            browser = await launch_browser(p)
+            context = await browser.new_context(user_agent=USER_AGENT)
+            try:
+                return await crawl_company_async(context, company_name, ticker, base_domain, resources)
+            finally:
+                await browser.close()
+                resources.close()
 
-            time.sleep(1)  # Kurze Pause zwischen den Anfragen
-
-        browser.close()
-        return extracted_texts
+    return asyncio.run(_crawl())
 
 # ==============================================================================
 # 4. HAUPT-ORCHESTRIERUNGSFUNKTION
 # ==============================================================================
 
-def run_full_crawler(csv_file, num_companies_to_test=None):
-    """Liest die CSV-Datei, iteriert über die Unternehmen und startet den Crawler."""
+def resolve_base_domain(company, ticker, base_domain):
+    """Bestimmt die Start-URL einer Firma (Override, CSV-Wert oder abgeleitete Fallback-Domain)."""
+    if ticker in OVERRIDE_DOMAINS:
+        return OVERRIDE_DOMAINS[ticker]
+
+    # Fallback, falls keine URL in der CSV vorhanden oder ungültig ist
+    if pd.isna(base_domain) or not isinstance(base_domain, str) or not base_domain.startswith('http'):
+        return get_fallback_domain(company)
+    return base_domain
+
+async def keep_lease_alive(journal):
+    """Sendet regelmäßig Heartbeats für die geleaste Firma, bis die Lease verloren geht."""
+    while await asyncio.to_thread(journal.heartbeat):
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+
+async def crawl_companies_concurrently(jobs, concurrency, resources, queue=None):
+    """
+    Crawlt alle Firmen mit einem einzigen, langlebigen Browser. Bis zu `concurrency` Firmen
+    laufen gleichzeitig, jede in einem eigenen Browser-Kontext (Cookies, Cache, Seite).
+
+    Mit `queue` (CrawlQueue) werden die Firmen nicht aus `jobs`, sondern per Lease aus der
+    gemeinsamen Job-Queue geholt, sodass mehrere Prozesse parallel arbeiten können.
+    """
+    job_queue = asyncio.Queue()
+    for job in jobs:
+        job_queue.put_nowait(job)
+
+    async def next_job(worker_id):
+        if queue is None:
+            try:
+                return job_queue.get_nowait() + (None,)
+            except asyncio.QueueEmpty:
+                return None
+        leased = await asyncio.to_thread(queue.lease_company, worker_id)
+        if leased is None:
+            return None
+        return leased + (CompanyJournal(queue, leased[1], worker_id),)
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p)
+
+        async def worker(worker_id):
+            while True:
+                job = await next_job(worker_id)
+                if job is None:
+                    return
+                company, ticker, base_domain, journal = job
+
+                print(f"\n{'='*60}\nBearbeite: {company} ({ticker})\n{'='*60}")
+                context = await browser.new_context(user_agent=USER_AGENT)
+                heartbeat = asyncio.create_task(keep_lease_alive(journal)) if journal else None
+                failed = False
+                try:
+                    extracted_data = await crawl_company_async(context, company, ticker, base_domain, resources, journal)
+                except Exception as e:
+                    print(f"[ERROR] Crawling für {company} abgebrochen: {e}")
+                    extracted_data = []
+                    failed = True
+                finally:
+                    if heartbeat:
+                        heartbeat.cancel()
+                    await context.close()
+
+                if journal:
+                    if journal.lease_lost:
+                        continue
+                    # Bei einem Abbruch wird die Firma wieder freigegeben und später fortgesetzt
+                    await asyncio.to_thread(queue.finish_company, ticker, worker_id, 'pending' if failed else 'done')
+                    if failed:
+                        continue
+
+                if extracted_data:
+                    save_data_to_json(extracted_data, ticker, company)
+                else:
+                    print(f"[INFO] Keine relevanten Texte für {company} gefunden oder alle Versuche fehlgeschlagen.")
+
+        try:
+            await asyncio.gather(*(worker(make_worker_id(f":{n}")) for n in range(max(1, concurrency))))
+        finally:
+            await browser.close()
+
+def run_full_crawler(csv_file, num_companies_to_test=None, concurrency=DEFAULT_CONCURRENCY,
+                     cache_db=CACHE_DB_FILE, use_sitemaps=True, timing_log=TIMING_LOG_FILE,
+                     queue_db=None, reset_queue=False, extract_workers=DEFAULT_EXTRACT_WORKERS):
+    """
+    Liest die CSV-Datei und crawlt die Unternehmen mit `concurrency` parallelen Browser-Kontexten.
+
+    Mit `queue_db` werden die Firmen (idempotent) in die gemeinsame Job-Queue eingetragen und
+    dann per Lease abgearbeitet. Denselben Aufruf in mehreren Prozessen bzw. auf mehreren
+    Rechnern zu starten, verteilt die Arbeit; ein Neustart setzt beim letzten Stand fort.
+    """
     try:
         companies_df = pd.read_csv(csv_file)
     except FileNotFoundError:
@@ -228,41 +865,59 @@ def run_full_crawler(csv_file, num_companies_to_test=None):
     if num_companies_to_test:
         companies_df = companies_df.head(num_companies_to_test)
 
+    jobs = []
     for index, row in companies_df.iterrows():
         company = row['Company']
         ticker = row['Ticker']
-        base_domain = row.get('Website')
-
-        # Spezifische Start-URLs für problematische Seiten, um direkt relevantere Bereiche anzusteuern
-        override_domains = {
-            "AMZN": "https://www.aboutamazon.com/news",
-            "NFLX": "https://about.netflix.com/en/news",
-            "ABNB": "https://news.airbnb.com/"
-        }
-        if ticker in override_domains:
-            base_domain = override_domains[ticker]
-
-        print(f"\n{'='*60}\nBearbeite: {company} ({ticker})\n{'='*60}")
-
-        # Fallback, falls keine URL in der CSV vorhanden oder ungültig ist
-        if pd.isna(base_domain) or not isinstance(base_domain, str) or not base_domain.startswith('http'):
-            base_domain = get_fallback_domain(company)
-
-        extracted_data = crawl_company_website(company, ticker, base_domain)
-
-        if extracted_data:
-            save_data_to_json(extracted_data, ticker, company)
-        else:
-            print(f"[INFO] Keine relevanten Texte für {company} gefunden oder alle Versuche fehlgeschlagen.")
-
-        print(f"Warte 5 Sekunden vor dem nächsten Unternehmen...")
-        time.sleep(5)
+        base_domain = resolve_base_domain(company, ticker, row.get('Website'))
+        jobs.append((company, ticker, base_domain))
+
+    queue = None
+    if queue_db:
+        queue = CrawlQueue(queue_db)
+        queue.enqueue_companies(jobs, reset=reset_queue)
+        print(f"[INFO] Job-Queue {queue_db}: {queue.counts()}")
+        jobs = []
+
+    print(f"[INFO] Crawle mit Parallelität {concurrency}.")
+    start_time = time.monotonic()
+    resources = CrawlResources(cache_db, use_sitemaps, timing_log, extract_workers)
+    try:
+        asyncio.run(crawl_companies_concurrently(jobs, concurrency, resources, queue))
+    finally:
+        resources.close()
+        if queue:
+            print(f"[INFO] Job-Queue {queue_db}: {queue.counts()}")
+            queue.close()
+    print(f"\n[INFO] Crawling abgeschlossen in {time.monotonic() - start_time:.1f} s.")
+    resources.stats.report()
+    if resources.timing_log:
+        print_timing_report(resources.timing_log.records)
 
 # ==============================================================================
 # 5. AUSFÜHRUNGSPUNKT
 # ==============================================================================
 
 if __name__ == "__main__":
-    # Starte den Crawler. Für einen Testlauf nur die ersten 5 Firmen nehmen.
-    # Für den vollen Durchlauf `num_companies_to_test=None` setzen oder den Parameter weglassen.
-    run_full_crawler(INPUT_CSV_FILE)
+    parser = argparse.ArgumentParser(description="Crawlt die Websites der NASDAQ-100-Unternehmen.")
+    parser.add_argument('--input', default=INPUT_CSV_FILE, help="CSV-Datei mit den Spalten Company, Ticker, Website")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Anzahl der Firmen, die parallel gecrawlt werden (ein Browser-Kontext pro Firma)")
+    # Für einen Testlauf z.B. `--limit 5` setzen, ohne Angabe werden alle Firmen gecrawlt.
+    parser.add_argument('--limit', type=int, default=None, help="Nur die ersten N Firmen crawlen")
+    parser.add_argument('--cache-db', default=CACHE_DB_FILE, help="SQLite-Datei des Crawl-Caches")
+    parser.add_argument('--no-cache', action='store_true', help="Crawl-Cache ignorieren und alles neu laden")
+    parser.add_argument('--no-sitemaps', action='store_true', help="Keine Seed-URLs aus robots.txt/Sitemaps verwenden")
+    parser.add_argument('--timing-log', default=TIMING_LOG_FILE, help="JSONL-Datei für die Phasen-Zeiten pro Seite")
+    # Mehrere Prozesse mit derselben Queue-Datei teilen sich die Arbeit und setzen nach Abbrüchen fort
+    parser.add_argument('--queue', default=None, help="SQLite-Job-Queue für verteiltes, fortsetzbares Crawlen")
+    parser.add_argument('--reset-queue', action='store_true', help="Job-Queue und Journal vor dem Start leeren")
+    parser.add_argument('--extract-workers', type=int, default=DEFAULT_EXTRACT_WORKERS,
+                        help="Prozesse für die Text-Extraktion (0 = in der Event-Loop extrahieren)")
+    args = parser.parse_args()
+
+    run_full_crawler(args.input, num_companies_to_test=args.limit, concurrency=args.concurrency,
+                     cache_db=None if args.no_cache else args.cache_db,
+                     use_sitemaps=not args.no_sitemaps, timing_log=args.timing_log,
+                     queue_db=args.queue, reset_queue=args.reset_queue,
+                     extract_workers=args.extract_workers)
@@ -0,0 +1,163 @@
+import gzip
+import heapq
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Maximale Anzahl an Seed-URLs, die pro Firma aus den Sitemaps übernommen werden
+MAX_SITEMAP_SEEDS = 50
+
+# Obergrenze der gelesenen Sitemap-Einträge pro Firma (schützt vor riesigen Shop-Sitemaps)
+MAX_SITEMAP_ENTRIES = 200000
+
+# Maximale Anzahl an Unter-Sitemaps, die aus Sitemap-Indizes gelesen werden
+MAX_CHILD_SITEMAPS = 10
+
+# Übliche Sitemap-Pfade, falls robots.txt keine Sitemap nennt
+DEFAULT_SITEMAP_PATHS = ['/sitemap.xml', '/sitemap_index.xml']
+
+SITEMAP_TIMEOUT = 20
+
+# ==============================================================================
+# 2. ROBOTS.TXT
+# ==============================================================================
+
+def fetch_robots(session, base_domain):
+    """
+    Lädt die robots.txt der Domain. Gibt den Parser (für can_fetch) und die dort
+    genannten Sitemap-URLs zurück. Ohne robots.txt ist alles erlaubt.
+    """
+    robots_url = urljoin(base_domain, '/robots.txt')
+    parser = RobotFileParser(robots_url)
+    try:
+        response = session.get(robots_url, timeout=SITEMAP_TIMEOUT)
+    except requests.RequestException:
+        response = None
+
+    if response is not None and response.status_code == 200:
+        parser.parse(response.text.splitlines())
+    else:
+        # Wie urllib: fehlende robots.txt bedeutet keine Einschränkungen
+        parser.allow_all = True
+
+    sitemap_urls = parser.site_maps() or [urljoin(base_domain, path) for path in DEFAULT_SITEMAP_PATHS]
+    return parser, sitemap_urls
+
+# ==============================================================================
+# 3. STREAMING-PARSER FÜR SITEMAPS
+# ==============================================================================
+
+def _local_name(tag):
+    """Entfernt den XML-Namespace aus einem Tag ('{http://...}loc' -> 'loc')."""
+    return tag.rsplit('}', 1)[-1]
+
+def iter_sitemap(session, sitemap_url):
+    """
+    Liest eine Sitemap als Stream und liefert Tupel (Art, URL, lastmod), wobei Art entweder
+    'sitemap' (Eintrag eines Sitemap-Index) oder 'url' ist. Die Datei wird nie vollständig
+    in den Speicher geladen; bereits verarbeitete Elemente werden sofort wieder verworfen.
+    """
+    try:
+        response = session.get(sitemap_url, timeout=SITEMAP_TIMEOUT, stream=True)
+    except requests.RequestException:
+        return
+    with response:
+        if response.status_code != 200:
+            return
+
+        # Content-Encoding (gzip/deflate der Übertragung) von urllib3 entpacken lassen
+        response.raw.decode_content = True
+        stream = response.raw
+        if sitemap_url.endswith('.gz') or 'x-gzip' in response.headers.get('Content-Type', ''):
+            stream = gzip.GzipFile(fileobj=stream)
+
+        root = None
+        try:
+            for event, element in ET.iterparse(stream, events=('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = element
+                    continue
+
+                kind = _local_name(element.tag)
+                if kind in ('url', 'sitemap'):
+                    loc = lastmod = None
+                    for child in element:
+                        name = _local_name(child.tag)
+                        if name == 'loc' and child.text:
+                            loc = child.text.strip()
+                        elif name == 'lastmod' and child.text:
+                            lastmod = child.text.strip()
+                    if loc:
+                        yield kind, loc, lastmod
+                    # Speicher freigeben: Element und bisherige Geschwister verwerfen
+                    root.clear()
+        except (ET.ParseError, OSError, EOFError):
+            # Defekte oder abgeschnittene Sitemaps liefern, was bis dahin lesbar war
+            return
+
+# ==============================================================================
+# 4. SEED-URLS ERMITTELN
+# ==============================================================================
+
+def discover_seed_urls(session, base_domain, score_url, is_blocked, request_interval=1.0):
+    """
+    Ermittelt vor dem Crawlen relevante Unterseiten aus robots.txt und Sitemaps.
+
+    `score_url(url)` bewertet die Relevanz einer URL (0 = irrelevant), `is_blocked(url)` prüft
+    die Blockliste. Zurückgegeben werden der robots.txt-Parser und eine Liste von (URL, Score),
+    die neuesten Einträge (lastmod) zuerst.
+    """
+    robots, sitemap_urls = fetch_robots(session, base_domain)
+    base_netloc = urlparse(base_domain).netloc
+
+    # Die neuesten MAX_SITEMAP_SEEDS relevanten Einträge; ein kleiner Heap hält den Speicher konstant
+    newest = []
+    entries_read = 0
+    child_sitemaps_read = 0
+    pending_sitemaps = list(sitemap_urls)
+    seen_sitemaps = set()
+
+    while pending_sitemaps and entries_read < MAX_SITEMAP_ENTRIES:
+        sitemap_url = pending_sitemaps.pop(0)
+        if sitemap_url in seen_sitemaps:
+            continue
+        seen_sitemaps.add(sitemap_url)
+        time.sleep(request_interval)  # Höflichkeitspause zwischen Sitemap-Abrufen
+
+        child_sitemaps = []
+        for kind, loc, lastmod in iter_sitemap(session, sitemap_url):
+            if kind == 'sitemap':
+                child_sitemaps.append((score_url(loc), lastmod or '', loc))
+                continue
+
+            entries_read += 1
+            if entries_read > MAX_SITEMAP_ENTRIES:
+                break
+            if urlparse(loc).netloc != base_netloc or is_blocked(loc) or not robots.can_fetch('*', loc):
+                continue
+            score = score_url(loc)
+            if not score:
+                continue
+
+            item = (lastmod or '', score, loc)
+            if len(newest) < MAX_SITEMAP_SEEDS:
+                heapq.heappush(newest, item)
+            elif item > newest[0]:
+                heapq.heapreplace(newest, item)
+
+        # Aus Sitemap-Indizes zuerst die thematisch passenden (z.B. news-sitemap.xml) lesen
+        child_sitemaps.sort(reverse=True)
+        for _, _, loc in child_sitemaps[:max(0, MAX_CHILD_SITEMAPS - child_sitemaps_read)]:
+            pending_sitemaps.append(loc)
+            child_sitemaps_read += 1
+
+    seeds = [(loc, score) for _, score, loc in sorted(newest, reverse=True)]
+    return robots, seeds
@@ -8,6 +8,26 @@ import pandas as pd
 from playwright.sync_api import sync_playwright
 import trafilatura
 import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from extraction_pool import DEFAULT_EXTRACT_WORKERS, PENDING_PER_WORKER, extract_page
+
+def collect_extraction(future, url, ticker, company_name, extracted_texts):
+    """Übernimmt das Ergebnis einer fertigen Extraktion aus dem Prozess-Pool."""
+    try:
+        main_text, _ = future.result()
+    except Exception as e:
+        print(f"   [FAIL] Extraktion von {url} fehlgeschlagen: {e}")
+        return
+    if main_text and len(main_text) > 100:
+        extracted_texts.append({
+            'Ticker': ticker,
+            'Company': company_name,
+            'Source_URL': url,
+            'Content_Type': 'About/News/Blog',
+            'Raw_Text': main_text
+        })
+        print(f"   [SUCCESS] {len(main_text)} Zeichen extrahiert von {url}.")
 
 def crawl_multi_target_data(company_name, ticker):
     """Sammelt Textdaten von den wahrscheinlichen Haupt-Textquellen (About, Newsroom)."""
@@ -53,8 +73,12 @@ def crawl_multi_target_data(company_name, ticker):
     target_urls.append(base_domain) 
 
     extracted_texts = []
+    # Laufende Extraktionen: Future -> URL. Der Browser navigiert weiter, während der
+    # Prozess-Pool trafilatura ausführt; bei zu vielen offenen Dokumenten wird gewartet.
+    pending = {}
+    max_pending = DEFAULT_EXTRACT_WORKERS * PENDING_PER_WORKER
     
-    with sync_playwright() as p:
+    with sync_playwright() as p, ProcessPoolExecutor(DEFAULT_EXTRACT_WORKERS) as pool:
         # Startet den Browser im Headless-Modus
         browser = p.chromium.launch(headless=True)
         page = browser.new_page()
@@ -71,17 +95,14 @@ def crawl_multi_target_data(company_name, ticker):
                 if response and response.status < 400: 
                     
                     html_content = page.content()
-                    main_text = trafilatura.extract(html_content, include_comments=False, favor_precision=True)
 
-                    if main_text and len(main_text) > 100:
-                        extracted_texts.append({
-                            'Ticker': ticker,
-                            'Company': company_name,
-                            'Source_URL': url,
-                            'Content_Type': 'About/News/Blog',
-                            'Raw_Text': main_text
-                        })
-                        print(f"   [SUCCESS] {len(main_text)} Zeichen extrahiert von {url}.")
+                    # Backpressure: erst weitermachen, wenn wieder Platz in der Pipeline ist
+                    while len(pending) >= max_pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect_extraction(future, pending.pop(future), ticker, company_name, extracted_texts)
+
+                    pending[pool.submit(extract_page, html_content, False)] = url
                 else:
                     print(f"   [SKIP] {url} gab einen Fehler-Statuscode zurück.")
                 
@@ -92,7 +113,13 @@ def crawl_multi_target_data(company_name, ticker):
             time.sleep(1) # Throttling
         
         browser.close()
+
+        # Restliche Extraktionen einsammeln
+        for future in list(pending):
+            collect_extraction(future, pending.pop(future), ticker, company_name, extracted_texts)
         return extracted_texts
-# Beispiel-Aufruf:
-all_texts = crawl_multi_target_data("Apple Inc.", "AAPL")
-print(all_texts[0]['Raw_Text'][:500]) # Zeige die ersten 500 Zeichen des ersten Texts
+
+# Beispiel-Aufruf (nur direkt ausgeführt, da die Pool-Prozesse dieses Modul importieren können):
+if __name__ == "__main__":
+    all_texts = crawl_multi_target_data("Apple Inc.", "AAPL")
+    print(all_texts[0]['Raw_Text'][:500]) # Zeige die ersten 500 Zeichen des ersten Texts
@@ -0,0 +1,163 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # Headless: kein Fenster, kein GUI-Event-Loop in den Worker-Prozessen
+import matplotlib.pyplot as plt
+import numpy as np
+
+from price_panel import PANEL_DIR, PricePanel, load_panel
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Fertige Diagramme; der Dateiname enthält Ticker, Zeitraum, Datenstand und Größe
+CHART_CACHE_DIR = "chart_cache"
+
+# Größe wie in stock.ipynb (plt.rcParams['figure.figsize'] = (12, 6))
+FIGSIZE = (12, 6)
+DPI = 100
+
+# Prozesse für das Rendern (ein Kern bleibt frei)
+DEFAULT_RENDER_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# ==============================================================================
+# 2. DOWNSAMPLING (LTTB)
+# ==============================================================================
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: reduziert eine Zeitreihe auf `threshold` Punkte und behält
+    dabei die Form (Spitzen und Einbrüche). Erster und letzter Punkt bleiben immer erhalten.
+    Gibt die Indizes der ausgewählten Punkte zurück.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    # Innere Punkte auf threshold-2 Buckets verteilen
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Mittelwert des nächsten Buckets als dritter Eckpunkt des Dreiecks
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        areas = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+    return selected
+
+# ==============================================================================
+# 3. RENDERN (läuft im Worker-Prozess)
+# ==============================================================================
+
+_panel = None
+
+def _init_worker(panel_dir):
+    """Jeder Worker blendet das Panel einmal ein (geteilte Seiten im Page-Cache statt Kopien)."""
+    global _panel
+    _panel = PricePanel(panel_dir)
+
+def chart_path(ticker, start, end, version, fmt, figsize=FIGSIZE, dpi=DPI, cache_dir=CHART_CACHE_DIR):
+    width, height = int(figsize[0] * dpi), int(figsize[1] * dpi)
+    return os.path.join(cache_dir, f"{ticker}_{start}_{end}_{version}_{width}x{height}.{fmt}")
+
+def render_chart(ticker, start, end, path, figsize=FIGSIZE, dpi=DPI):
+    """Zeichnet den Schlusskurs eines Tickers, auf die Pixelbreite reduziert, und speichert ihn."""
+    df = _panel.ticker_frame(ticker, ['Close'], start, end).dropna()
+    if df.empty:
+        return None
+    x = df.index.values.astype('datetime64[D]').astype(float)
+    y = df['Close'].to_numpy()
+    # Mehr Punkte als Pixel sind auf dem Bild nicht zu sehen
+    keep = lttb(x, y, int(figsize[0] * dpi))
+
+    fig, ax = plt.subplots(figsize=figsize, dpi=dpi)
+    ax.plot(df.index[keep], y[keep], label=f"{ticker} Close")
+    ax.set_title(f"{ticker} - Kursverlauf ({df.index[0]:%Y-%m-%d} bis {df.index[-1]:%Y-%m-%d})")
+    ax.set_xlabel("Datum")
+    ax.set_ylabel("Preis (USD)")
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fig.savefig(tmp_path, format=os.path.splitext(path)[1][1:])
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return path
+
+def _render_job(job):
+    ticker, start, end, path = job
+    try:
+        return ticker, render_chart(ticker, start, end, path)
+    except Exception as e:
+        print(f"Fehler beim Zeichnen von {ticker}: {e}")
+        return ticker, None
+
+# ==============================================================================
+# 4. DASHBOARD
+# ==============================================================================
+
+def render_dashboard(tickers=None, start=None, end=None, last_days=None, fmt='png', panel_dir=PANEL_DIR,
+                     cache_dir=CHART_CACHE_DIR, workers=DEFAULT_RENDER_WORKERS):
+    """
+    Erzeugt die Kursdiagramme aller (oder der angegebenen) Ticker parallel und gibt ein
+    Dictionary Ticker -> Dateipfad zurück. Diagramme, die für denselben Zeitraum und
+    Datenstand schon gezeichnet wurden, kommen direkt aus dem Cache.
+    `last_days` wählt die letzten N Handelstage (wie NUM_LAST_VALUES in stock.ipynb).
+    """
+    panel = load_panel(panel_dir)
+    tickers = list(tickers or panel.tickers)
+    if last_days:
+        start = panel.dates[max(0, len(panel.dates) - last_days)]
+    rows = panel.date_range(start, end)
+    first, last = (str(day) for day in np.datetime_as_string(panel.dates[rows][[0, -1]], unit='D'))
+    os.makedirs(cache_dir, exist_ok=True)
+
+    paths, jobs = {}, []
+    for ticker in tickers:
+        path = chart_path(ticker, first, last, panel.version, fmt, cache_dir=cache_dir)
+        if os.path.exists(path):
+            paths[ticker] = path
+        else:
+            jobs.append((ticker, first, last, path))
+
+    start_time = time.perf_counter()
+    if jobs and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(panel_dir,)) as executor:
+            results = list(executor.map(_render_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        _init_worker(panel_dir)
+        results = [_render_job(job) for job in jobs]
+    paths.update({ticker: path for ticker, path in results if path})
+    print(f"{len(jobs)} Diagramme gezeichnet, {len(tickers) - len(jobs)} aus dem Cache "
+          f"({time.perf_counter() - start_time:.1f}s)")
+    return {ticker: paths[ticker] for ticker in tickers if ticker in paths}
+
+# ==============================================================================
+# 5. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zeichnet die Kursdiagramme aller Ticker aus dem Panel.")
+    parser.add_argument('tickers', nargs='*', help="Nur diese Ticker (Standard: alle)")
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--last-days', type=int, default=None, help="Nur die letzten N Handelstage")
+    parser.add_argument('--format', choices=['png', 'svg'], default='png')
+    parser.add_argument('--panel', default=PANEL_DIR)
+    parser.add_argument('--output', default=CHART_CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=DEFAULT_RENDER_WORKERS)
+    args = parser.parse_args()
+
+    charts = render_dashboard(args.tickers or None, args.start, args.end, args.last_days, args.format,
+                              args.panel, args.output, args.workers)
+    print(f"{len(charts)} Diagramme in {args.output}/")
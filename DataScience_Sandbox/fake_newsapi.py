@@ -0,0 +1,106 @@
+import argparse
+import json
+import threading
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ==============================================================================
+# Lokaler Fake-Server der NewsAPI (/v2/everything) zum Testen des Collectors:
+# Kontingent pro Key, Paginierung und die Fehlercodes der echten API.
+# ==============================================================================
+
+# Standardmäßig mehr Treffer als eine Seite, damit die Paginierung des Collectors greift
+# (mit `news_collector.py --max-results 500`); --max-results 100 bildet den Developer-Plan nach
+DEFAULT_TOTAL_RESULTS = 250
+DEFAULT_MAX_RESULTS = 500
+
+class FakeNewsApi:
+    """Zustand des Fake-Servers: Restkontingent pro Key und Zähler der Anfragen."""
+
+    def __init__(self, quotas, total_results=DEFAULT_TOTAL_RESULTS, max_results=DEFAULT_MAX_RESULTS,
+                 published_at=None):
+        self.quotas = dict(quotas)
+        self.total_results = total_results
+        self.max_results = max_results
+        self.published_at = published_at or datetime(2025, 11, 14, 12, 0, 0)
+        self.requests = {key: 0 for key in quotas}
+        self._lock = threading.Lock()
+
+    def handle(self, params):
+        """Gibt (Status, JSON-Body) für eine Anfrage zurück."""
+        api_key = params.get('apiKey', [''])[0]
+        with self._lock:
+            if api_key not in self.quotas:
+                return 401, {'status': 'error', 'code': 'apiKeyInvalid', 'message': 'Your API key is invalid.'}
+            if self.quotas[api_key] <= 0:
+                return 429, {'status': 'error', 'code': 'rateLimited', 'message': 'You have made too many requests.'}
+            self.quotas[api_key] -= 1
+            self.requests[api_key] += 1
+
+        query = params.get('q', [''])[0]
+        page = int(params.get('page', ['1'])[0])
+        page_size = int(params.get('pageSize', ['100'])[0])
+        start = (page - 1) * page_size
+        if start >= self.max_results:
+            return 426, {'status': 'error', 'code': 'maximumResultsReached',
+                         'message': f'You have requested too many results. Limit: {self.max_results}.'}
+
+        end = min(start + page_size, self.total_results, self.max_results)
+        query_id = zlib.crc32(query.encode('utf-8'))
+        articles = [{
+            'source': {'id': None, 'name': 'Fake News'},
+            'title': f'{query} article {index}',
+            'description': f'Description of {query} article {index}',
+            'url': f'https://news.example.com/{query_id}/{index}',
+            'publishedAt': (self.published_at - timedelta(minutes=index)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        } for index in range(start, end)]
+        return 200, {'status': 'ok', 'totalResults': self.total_results, 'articles': articles}
+
+def start_fake_newsapi(quotas, port=0, **options):
+    """
+    Startet den Fake-Server in einem Hintergrund-Thread. Gibt (Server, Zustand, Basis-URL)
+    zurück; beenden mit `server.shutdown()`.
+    """
+    api = FakeNewsApi(quotas, **options)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path != '/v2/everything':
+                status, body = 404, {'status': 'error', 'code': 'notFound'}
+            else:
+                status, body = api.handle(parse_qs(parsed.query))
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, api, f"http://127.0.0.1:{server.server_port}/v2/everything"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Startet einen lokalen Fake-Server der NewsAPI.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--keys', default='test-key-1,test-key-2', help="Kommagetrennte gültige Keys")
+    parser.add_argument('--quota', type=int, default=100, help="Anfragen pro Key")
+    parser.add_argument('--total-results', type=int, default=DEFAULT_TOTAL_RESULTS)
+    parser.add_argument('--max-results', type=int, default=DEFAULT_MAX_RESULTS)
+    args = parser.parse_args()
+
+    server, _, base_url = start_fake_newsapi(
+        {key: args.quota for key in args.keys.split(',')}, args.port,
+        total_results=args.total_results, max_results=args.max_results
+    )
+    print(f"Fake-NewsAPI läuft unter {base_url} (Strg+C zum Beenden)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
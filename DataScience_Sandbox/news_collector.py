@@ -0,0 +1,440 @@
+import argparse
+import asyncio
+import hashlib
+import math
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import requests
+
+# Gemeinsamer HTTP-Client (Cache, Verbindungspool, Replay-Modus) aus dem Projektordner
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from http_client import get_client
+from news_store import NEWS_STORE_DIR, NewsStore
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+
+# API-Keys kommagetrennt aus der Umgebung (oder per --keys bzw. Parameter übergeben)
+API_KEYS = [key for key in os.environ.get('NEWS_API_KEYS', '').split(',') if key]
+
+CSV_DATEIPFAD = "WikiNasdaq_100_constituents.csv"
+
+# Fortschritt pro (Ticker, Seite) und Restkontingent pro Key
+CHECKPOINT_DB_FILE = "news_checkpoints.sqlite"
+
+# Kontingent pro Key (Developer-Plan: 100 Anfragen in 24 Stunden)
+DAILY_QUOTA = 100
+QUOTA_WINDOW_SECONDS = 24 * 3600
+
+# Gleichzeitige Anfragen pro Key
+REQUESTS_IN_FLIGHT_PER_KEY = 2
+
+# Wie lange höchstens auf ein freies Kontingent gewartet wird, bevor der Lauf endet
+# (der Rest wird beim nächsten Lauf anhand der Checkpoints fortgesetzt)
+MAX_QUOTA_WAIT_SECONDS = 60
+
+# Paginierung: NewsAPI liefert höchstens PAGE_SIZE Artikel pro Seite und im Developer-Plan
+# insgesamt nur die ersten MAX_RESULTS Treffer einer Suche (bezahlte Pläne: per --max-results erhöhen,
+# dann werden bis zu MAX_PAGES Seiten pro Firma abgerufen)
+PAGE_SIZE = 100
+MAX_RESULTS = 100
+MAX_PAGES = 5
+
+LOOKBACK_DAYS = 7
+MAX_ATTEMPTS = 3
+
+# NewsAPI-Antworten höchstens eine Stunde aus dem HTTP-Cache bedienen
+NEWS_CACHE_TTL = 3600
+
+# Fehlercodes der NewsAPI
+RATE_LIMIT_CODES = {'rateLimited', 'apiKeyExhausted'}
+INVALID_KEY_CODES = {'apiKeyInvalid', 'apiKeyDisabled', 'apiKeyMissing'}
+END_OF_RESULTS_CODES = {'maximumResultsReached'}
+
+# ==============================================================================
+# 2. KONTINGENT PRO KEY (TOKEN BUCKET)
+# ==============================================================================
+
+def key_id(api_key):
+    """Kurzer Hash eines Keys, damit der Key selbst nicht in der Checkpoint-Datei landet."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+class KeyBucket:
+    """
+    Token Bucket eines API-Keys: `quota` Anfragen pro `window` Sekunden, gleichmäßig
+    nachgefüllt. Meldet die API ein erschöpftes Kontingent, wird der Bucket geleert.
+    """
+
+    def __init__(self, api_key, quota=DAILY_QUOTA, window=QUOTA_WINDOW_SECONDS, tokens=None):
+        self.api_key = api_key
+        self.key_id = key_id(api_key)
+        self.capacity = quota
+        self.rate = quota / window
+        self.tokens = float(quota if tokens is None else tokens)
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.disabled = False
+        self.requests = 0
+        self.articles = 0
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def seconds_until_token(self):
+        if self.disabled:
+            return math.inf
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+class KeyPool:
+    """
+    Verteilt Anfragen auf alle Keys: es wird immer der Key mit dem größten Restkontingent
+    gewählt, sodass alle Keys gleichzeitig Anfragen in der Luft haben und ein erschöpfter
+    Key den Lauf nicht aufhält.
+    """
+
+    def __init__(self, buckets, in_flight_per_key=REQUESTS_IN_FLIGHT_PER_KEY, max_wait=MAX_QUOTA_WAIT_SECONDS):
+        self.buckets = buckets
+        self.in_flight_per_key = in_flight_per_key
+        self.max_wait = max_wait
+        self._changed = asyncio.Condition()
+
+    async def acquire(self):
+        """Reserviert eine Anfrage auf einem Key. None, wenn in absehbarer Zeit kein Kontingent frei wird."""
+        async with self._changed:
+            while True:
+                now = time.monotonic()
+                for bucket in self.buckets:
+                    bucket.refill(now)
+                ready = [b for b in self.buckets
+                         if not b.disabled and b.tokens >= 1 and b.in_flight < self.in_flight_per_key]
+                if ready:
+                    bucket = max(ready, key=lambda b: b.tokens)
+                    bucket.tokens -= 1
+                    bucket.in_flight += 1
+                    return bucket
+
+                busy = any(b.in_flight for b in self.buckets)
+                # Keys mit Tokens, aber ohne freien Slot, werden per release() geweckt
+                wait = min((b.seconds_until_token() for b in self.buckets if b.tokens < 1), default=math.inf)
+                if not busy and wait > self.max_wait:
+                    return None
+                try:
+                    # Auf freigegebene Anfragen oder nachgefüllte Tokens warten
+                    await asyncio.wait_for(self._changed.wait(), timeout=min(wait, self.max_wait))
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, bucket, refund=False):
+        """Gibt die Anfrage frei; bei Cache-Treffern wird das Token zurückerstattet."""
+        async with self._changed:
+            bucket.in_flight -= 1
+            if refund:
+                bucket.tokens = min(bucket.capacity, bucket.tokens + 1)
+            self._changed.notify_all()
+
+    def exhaust(self, bucket):
+        """Die API meldet das Kontingent als verbraucht: der Key pausiert bis zum Nachfüllen."""
+        bucket.tokens = min(bucket.tokens, 0.0)
+
+    def disable(self, bucket):
+        bucket.disabled = True
+
+# ==============================================================================
+# 3. CHECKPOINTS
+# ==============================================================================
+
+class NewsCheckpoints:
+    """Fortschritt pro (Zeitfenster, Ticker, Seite) und Stand der Key-Kontingente in SQLite."""
+
+    def __init__(self, db_file=CHECKPOINT_DB_FILE):
+        self.conn = sqlite3.connect(db_file)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                window        TEXT,
+                ticker        TEXT,
+                page          INTEGER,
+                status        TEXT,
+                articles      INTEGER,
+                total_results INTEGER,
+                updated_at    REAL,
+                PRIMARY KEY (window, ticker, page)
+            );
+            CREATE TABLE IF NOT EXISTS key_quota (
+                key_id     TEXT PRIMARY KEY,
+                tokens     REAL,
+                updated_at REAL
+            );
+        """)
+
+    def completed_pages(self, window):
+        """Dictionary Ticker -> {Seite: total_results} der bereits erledigten Seiten."""
+        completed = {}
+        for ticker, page, total_results in self.conn.execute(
+            "SELECT ticker, page, total_results FROM pages WHERE window = ? AND status = 'done'", (window,)
+        ):
+            completed.setdefault(ticker, {})[page] = total_results
+        return completed
+
+    def mark_page(self, window, ticker, page, status, articles=0, total_results=None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (window, ticker, page, status, articles, total_results, time.time())
+        )
+        self.conn.commit()
+
+    def load_tokens(self, bucket):
+        """Stellt das Restkontingent eines Keys aus einem früheren Lauf wieder her (inkl. Nachfüllen)."""
+        row = self.conn.execute("SELECT tokens, updated_at FROM key_quota WHERE key_id = ?", (bucket.key_id,)).fetchone()
+        if row:
+            tokens, updated_at = row
+            bucket.tokens = min(bucket.capacity, tokens + (time.time() - updated_at) * bucket.rate)
+
+    def save_tokens(self, buckets):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO key_quota VALUES (?, ?, ?)",
+            [(bucket.key_id, bucket.tokens, time.time()) for bucket in buckets]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+# ==============================================================================
+# 4. COLLECTOR
+# ==============================================================================
+
+def pages_needed(total_results, max_results=MAX_RESULTS):
+    """
+    Anzahl der Seiten, die für eine Suche mit `total_results` Treffern abgerufen werden, wenn der
+    Plan höchstens `max_results` Treffer pro Suche ausliefert.
+    """
+    return min(MAX_PAGES, math.ceil(min(total_results, max_results) / PAGE_SIZE))
+
+def article_rows(articles, ticker, company_name):
+    return [{
+        'ticker': ticker,
+        'company_name': company_name,
+        'title': article.get('title'),
+        'description': article.get('description'),
+        'published_at': article.get('publishedAt'),
+        'source_name': (article.get('source') or {}).get('name'),
+        'url': article.get('url')
+    } for article in articles]
+
+class NewsCollector:
+    """
+    Asynchroner NewsAPI-Collector: Seiten-Aufträge liegen in einer Prioritäts-Queue (erste Seiten
+    aller Firmen zuerst, da sie die meisten neuen Artikel pro Anfrage bringen) und werden von
+    Workern über den KeyPool auf alle Keys verteilt. Jede Seite wird sofort gespeichert und als
+    Checkpoint vermerkt, ein abgebrochener Lauf setzt also bei der nächsten offenen Seite fort.
+    Pro Ticker werden nur Artikel angefragt, die neuer sind als der jüngste im News-Speicher.
+    """
+
+    def __init__(self, companies, api_keys, checkpoints, store, base_url=NEWS_API_URL,
+                 from_date=None, quota=DAILY_QUOTA, in_flight_per_key=REQUESTS_IN_FLIGHT_PER_KEY,
+                 max_wait=MAX_QUOTA_WAIT_SECONDS, max_results=MAX_RESULTS):
+        self.companies = companies
+        self.checkpoints = checkpoints
+        self.store = store
+        self.base_url = base_url
+        self.max_results = max_results
+        self.from_date = from_date or (datetime.now() - timedelta(days=LOOKBACK_DAYS)).strftime('%Y-%m-%d')
+        self.since = self._since_per_ticker()
+        self.buckets = [KeyBucket(api_key, quota) for api_key in api_keys]
+        for bucket in self.buckets:
+            checkpoints.load_tokens(bucket)
+        self.pool = KeyPool(self.buckets, in_flight_per_key, max_wait)
+        self.client = get_client()
+        # 429 heißt hier "Kontingent des Keys erschöpft": sofort an einen anderen Key statt warten
+        self.client.mount_without_retries(base_url)
+        self.stopped = False
+        self.articles = 0
+        self.cache_hits = 0
+
+    def _since_per_ticker(self):
+        """
+        Startzeitpunkt der Suche pro Ticker: der jüngste gespeicherte Artikel, aber nie vor dem
+        Rückblick-Zeitraum. Wird einmal pro Lauf bestimmt, damit alle Seiten einer Suche dieselbe
+        Anfrage paginieren.
+        """
+        lookback = pd.Timestamp(self.from_date, tz='UTC')
+        since = {}
+        for ticker, latest in self.store.latest_published_at().items():
+            if latest > lookback:
+                # NewsAPI filtert inklusiv; der Artikel selbst wird beim Schreiben dedupliziert
+                since[ticker] = latest.strftime('%Y-%m-%dT%H:%M:%S')
+        return since
+
+    def _initial_jobs(self):
+        """Offene Seiten aller Firmen auf Basis der Checkpoints des aktuellen Zeitfensters."""
+        completed = self.checkpoints.completed_pages(self.from_date)
+        jobs = []
+        for ticker, company_name in self.companies:
+            done = completed.get(ticker, {})
+            if 1 not in done:
+                jobs.append((1, ticker, company_name))
+                continue
+            for page in range(2, pages_needed(done[1] or 0, self.max_results) + 1):
+                if page not in done:
+                    jobs.append((page, ticker, company_name))
+        return jobs
+
+    async def _fetch_page(self, bucket, ticker, company_name, page):
+        params = {
+            'q': f'"{company_name}" OR "{ticker}"',
+            'language': 'en',
+            'sortBy': 'publishedAt',
+            'from': self.since.get(ticker, self.from_date),
+            'pageSize': PAGE_SIZE,
+            'page': page,
+            'apiKey': bucket.api_key,
+        }
+        return await asyncio.to_thread(self.client.get, self.base_url, params=params, ttl=NEWS_CACHE_TTL)
+
+    async def _worker(self, queue):
+        while True:
+            page, ticker, company_name, attempts = await queue.get()
+            try:
+                if self.stopped:
+                    continue
+                bucket = await self.pool.acquire()
+                if bucket is None:
+                    print("!!! Kein Kontingent mehr frei. Der Rest folgt im nächsten Lauf.")
+                    self.stopped = True
+                    continue
+                await self._process(queue, bucket, ticker, company_name, page, attempts)
+            except Exception as e:
+                # z.B. Schreibfehler im Speicher oder in den Checkpoints: die Seite bleibt offen und
+                # wird im nächsten Lauf erneut abgerufen, der Worker arbeitet weiter
+                print(f"!!! Fehler bei {ticker} (Seite {page}): {e!r}. Wird übersprungen.")
+            finally:
+                queue.task_done()
+
+    async def _process(self, queue, bucket, ticker, company_name, page, attempts):
+        retry = (page, ticker, company_name, attempts + 1)
+        try:
+            response = await self._fetch_page(bucket, ticker, company_name, page)
+        except requests.RequestException as e:
+            await self.pool.release(bucket)
+            print(f"!!! Verbindungsfehler bei {ticker} (Seite {page}): {e}")
+            if attempts + 1 < MAX_ATTEMPTS:
+                queue.put_nowait(retry)
+            return
+        except Exception:
+            await self.pool.release(bucket)
+            raise
+
+        from_cache = getattr(response, 'from_cache', False)
+        await self.pool.release(bucket, refund=from_cache)
+        if from_cache:
+            self.cache_hits += 1
+        else:
+            bucket.requests += 1
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        code = data.get('code')
+
+        if response.status_code == 200:
+            rows = article_rows(data.get('articles', []), ticker, company_name)
+            total_results = data.get('totalResults', 0)
+            written = self.store.write(rows) if rows else 0
+            self.checkpoints.mark_page(self.from_date, ticker, page, 'done', len(rows), total_results)
+            bucket.articles += written
+            self.articles += written
+            print(f"  -> {ticker} Seite {page}: {len(rows)} Artikel, {written} neu (Key ***{bucket.api_key[-4:]}).")
+            if page == 1:
+                for next_page in range(2, pages_needed(total_results, self.max_results) + 1):
+                    queue.put_nowait((next_page, ticker, company_name, 0))
+        elif response.status_code == 429 or code in RATE_LIMIT_CODES:
+            print(f"!!! LIMIT ERREICHT für Key ***{bucket.api_key[-4:]}. Anfrage geht an einen anderen Key.")
+            self.pool.exhaust(bucket)
+            queue.put_nowait((page, ticker, company_name, attempts))
+        elif response.status_code == 401 or code in INVALID_KEY_CODES:
+            print(f"!!! Key ***{bucket.api_key[-4:]} ungültig ({code}). Wird nicht mehr verwendet.")
+            self.pool.disable(bucket)
+            queue.put_nowait((page, ticker, company_name, attempts))
+        elif code in END_OF_RESULTS_CODES:
+            # Mehr Treffer liefert der Plan nicht: Paginierung für diese Firma beendet
+            self.checkpoints.mark_page(self.from_date, ticker, page, 'done', 0, None)
+        elif response.status_code >= 500 and attempts + 1 < MAX_ATTEMPTS:
+            queue.put_nowait(retry)
+        else:
+            print(f"!!! HTTP Fehler bei {ticker} (Seite {page}): {response.status_code} {code}. Wird übersprungen.")
+            self.checkpoints.mark_page(self.from_date, ticker, page, 'failed')
+
+    async def run(self):
+        """Arbeitet alle offenen Seiten ab und gibt die Anzahl neuer Artikel zurück."""
+        queue = asyncio.PriorityQueue()
+        for page, ticker, company_name in self._initial_jobs():
+            queue.put_nowait((page, ticker, company_name, 0))
+        print(f"Starte Collector: {queue.qsize()} offene Seiten, {len(self.buckets)} Keys, ab {self.from_date}.")
+
+        workers = [asyncio.create_task(self._worker(queue))
+                   for _ in range(max(1, len(self.buckets) * self.pool.in_flight_per_key))]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self.checkpoints.save_tokens(self.buckets)
+        return self.articles
+
+    def report(self):
+        print("\n--- ZUSAMMENFASSUNG ---")
+        print(f"Neue Artikel: {self.articles}, Cache-Treffer: {self.cache_hits}")
+        for bucket in self.buckets:
+            per_request = bucket.articles / bucket.requests if bucket.requests else 0.0
+            print(f"Key ***{bucket.api_key[-4:]}: {bucket.requests} Anfragen, {bucket.articles} Artikel "
+                  f"({per_request:.1f} pro Anfrage), Restkontingent {bucket.tokens:.1f}"
+                  + (" [deaktiviert]" if bucket.disabled else ""))
+
+async def collect_news(api_keys=None, csv_file=CSV_DATEIPFAD, store_dir=NEWS_STORE_DIR,
+                       checkpoint_db=CHECKPOINT_DB_FILE, base_url=NEWS_API_URL, **collector_options):
+    """Einstiegspunkt (auch für Notebooks: `await collect_news(API_KEYS)`)."""
+    api_keys = api_keys or API_KEYS
+    if not api_keys:
+        raise ValueError("Keine API-Keys konfiguriert (NEWS_API_KEYS oder Parameter api_keys).")
+    df_nasdaq = pd.read_csv(csv_file)
+    companies = list(zip(df_nasdaq['Ticker'], df_nasdaq['Company']))
+
+    checkpoints = NewsCheckpoints(checkpoint_db)
+    try:
+        collector = NewsCollector(companies, api_keys, checkpoints, NewsStore(store_dir), base_url,
+                                  **collector_options)
+        await collector.run()
+        collector.report()
+    finally:
+        checkpoints.close()
+    return collector
+
+# ==============================================================================
+# 5. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sammelt NewsAPI-Artikel zu den NASDAQ-100-Unternehmen.")
+    parser.add_argument('--keys', default=None, help="Kommagetrennte API-Keys (Standard: NEWS_API_KEYS)")
+    parser.add_argument('--input', default=CSV_DATEIPFAD, help="CSV-Datei mit den Spalten Ticker und Company")
+    parser.add_argument('--store', default=NEWS_STORE_DIR, help="Verzeichnis des News-Speichers (news_store.py)")
+    parser.add_argument('--checkpoints', default=CHECKPOINT_DB_FILE, help="SQLite-Datei für Fortschritt und Kontingente")
+    parser.add_argument('--base-url', default=NEWS_API_URL, help="Endpunkt (z.B. ein lokaler Fake-Server für Tests)")
+    parser.add_argument('--quota', type=int, default=DAILY_QUOTA, help="Anfragen pro Key und 24 Stunden")
+    parser.add_argument('--max-results', type=int, default=MAX_RESULTS,
+                        help="Höchstens abrufbare Treffer pro Suche laut API-Plan (Developer-Plan: 100)")
+    args = parser.parse_args()
+
+    keys = [key for key in args.keys.split(',') if key] if args.keys else None
+    asyncio.run(collect_news(keys, args.input, args.store, args.checkpoints, args.base_url,
+                             quota=args.quota, max_results=args.max_results))
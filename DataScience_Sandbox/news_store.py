@@ -0,0 +1,188 @@
+import argparse
+import glob
+import hashlib
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Wurzelverzeichnis des News-Speichers; darunter ticker=<TICKER>/date=<YYYY-MM-DD>/part-*.parquet
+NEWS_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'news_store')
+
+# Spalten der gesammelten Artikel (wie in den bisherigen CSV-Dateien)
+NEWS_COLUMNS = ['ticker', 'company_name', 'title', 'description', 'published_at', 'source_name', 'url']
+
+# Schema der Parquet-Dateien. Ticker und Datum stehen nur im Pfad (Hive-Partitionierung).
+FILE_SCHEMA = pa.schema([
+    ('url_hash', pa.string()),
+    ('company_name', pa.string()),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('published_at', pa.timestamp('s', tz='UTC')),
+    ('source_name', pa.string()),
+    ('url', pa.string()),
+])
+
+PARTITIONING = ds.partitioning(pa.schema([('ticker', pa.string()), ('date', pa.string())]), flavor='hive')
+
+# ==============================================================================
+# 2. SPEICHER
+# ==============================================================================
+
+def url_hash(url):
+    """Kurzer, stabiler Hash einer Artikel-URL (Schlüssel für die Deduplizierung)."""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+class NewsStore:
+    """
+    Spaltenorientierter News-Speicher im Parquet-Format, partitioniert nach Ticker und
+    Veröffentlichungsdatum. Beim Schreiben werden Artikel, deren URL für den Ticker schon
+    gespeichert ist, verworfen. Beim Lesen werden nur die Partitionen geöffnet, die zu den
+    gewünschten Tickern und dem Zeitraum passen.
+    """
+
+    def __init__(self, root=NEWS_STORE_DIR):
+        self.root = root
+
+    def _partition_dir(self, ticker, date):
+        return os.path.join(self.root, f"ticker={ticker}", f"date={date}")
+
+    @staticmethod
+    def _stored_hashes(partition_dir):
+        files = glob.glob(os.path.join(partition_dir, '*.parquet'))
+        if not files:
+            return set()
+        return set(pq.read_table(files, columns=['url_hash']).column('url_hash').to_pylist())
+
+    def write(self, rows):
+        """
+        Schreibt Artikel (Dictionaries mit den Spalten NEWS_COLUMNS oder ein DataFrame) und gibt
+        die Anzahl der tatsächlich neuen Artikel zurück.
+        """
+        df = pd.DataFrame(rows, columns=NEWS_COLUMNS)
+        df = df[df['url'].notna() & df['ticker'].notna()]
+        df['published_at'] = pd.to_datetime(df['published_at'], utc=True, errors='coerce')
+        df = df[df['published_at'].notna()]
+        if df.empty:
+            return 0
+
+        df['url_hash'] = df['url'].map(url_hash)
+        df['date'] = df['published_at'].dt.strftime('%Y-%m-%d')
+        df = df.drop_duplicates(subset=['ticker', 'url_hash'])
+
+        written = 0
+        for (ticker, date), partition in df.groupby(['ticker', 'date']):
+            partition_dir = self._partition_dir(ticker, date)
+            partition = partition[~partition['url_hash'].isin(self._stored_hashes(partition_dir))]
+            if partition.empty:
+                continue
+            os.makedirs(partition_dir, exist_ok=True)
+            table = pa.Table.from_pandas(partition[FILE_SCHEMA.names], schema=FILE_SCHEMA, preserve_index=False)
+            # Erst unter temporärem Namen schreiben, damit Leser nie eine halbe Datei sehen
+            path = os.path.join(partition_dir, f"part-{uuid.uuid4().hex}.parquet")
+            pq.write_table(table, path + '.tmp')
+            os.replace(path + '.tmp', path)
+            written += len(partition)
+        return written
+
+    def latest_published_at(self):
+        """Dictionary Ticker -> Zeitpunkt des neuesten gespeicherten Artikels."""
+        latest = {}
+        for ticker_dir in glob.glob(os.path.join(self.root, 'ticker=*')):
+            date_dirs = sorted(glob.glob(os.path.join(ticker_dir, 'date=*')))
+            if not date_dirs:
+                continue
+            # Nur die jüngste Datums-Partition lesen
+            files = glob.glob(os.path.join(date_dirs[-1], '*.parquet'))
+            if files:
+                published = pq.read_table(files, columns=['published_at']).column('published_at')
+                latest[os.path.basename(ticker_dir).split('=', 1)[1]] = pd.Timestamp(pc.max(published).as_py())
+        return latest
+
+    def read(self, tickers=None, start=None, end=None, columns=None):
+        """
+        Liest Artikel als DataFrame. `tickers` (Liste) und der Zeitraum `start`/`end` (inklusiv,
+        Datum oder Zeitpunkt) werden als Filter an Parquet durchgereicht, sodass nur passende
+        Partitionen und Zeilengruppen gelesen werden.
+        """
+        columns = columns or NEWS_COLUMNS
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns)
+
+        dataset = ds.dataset(self.root, format='parquet', partitioning=PARTITIONING, schema=FILE_SCHEMA.append(
+            pa.field('ticker', pa.string())).append(pa.field('date', pa.string())))
+        conditions = []
+        if tickers is not None:
+            conditions.append(ds.field('ticker').isin(list(tickers)))
+        if start is not None:
+            start = pd.Timestamp(start, tz='UTC') if pd.Timestamp(start).tzinfo is None else pd.Timestamp(start)
+            conditions.append(ds.field('date') >= start.strftime('%Y-%m-%d'))
+            conditions.append(ds.field('published_at') >= pa.scalar(start.to_pydatetime(), pa.timestamp('s', tz='UTC')))
+        if end is not None:
+            end = pd.Timestamp(end, tz='UTC') if pd.Timestamp(end).tzinfo is None else pd.Timestamp(end)
+            # Ein reines Datum als Ende schließt den ganzen Tag ein
+            if end == end.normalize():
+                end = end + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+            conditions.append(ds.field('date') <= end.strftime('%Y-%m-%d'))
+            conditions.append(ds.field('published_at') <= pa.scalar(end.to_pydatetime(), pa.timestamp('s', tz='UTC')))
+
+        condition = None
+        for part in conditions:
+            condition = part if condition is None else condition & part
+        table = dataset.to_table(columns=columns, filter=condition)
+        return table.to_pandas().sort_values(['ticker', 'published_at'], ignore_index=True) \
+            if {'ticker', 'published_at'} <= set(columns) else table.to_pandas()
+
+    def compact(self):
+        """Fasst die Teil-Dateien jeder Partition zu einer Datei zusammen."""
+        for partition_dir in glob.glob(os.path.join(self.root, 'ticker=*', 'date=*')):
+            files = glob.glob(os.path.join(partition_dir, '*.parquet'))
+            if len(files) < 2:
+                continue
+            table = pq.read_table(files, schema=FILE_SCHEMA)
+            path = os.path.join(partition_dir, f"part-{uuid.uuid4().hex}.parquet")
+            pq.write_table(table, path + '.tmp')
+            os.replace(path + '.tmp', path)
+            for old_file in files:
+                os.remove(old_file)
+
+def import_csv(csv_path, store):
+    """Übernimmt eine bisherige News-CSV (z.B. gesammelte_nasdaq_news.csv) in den Speicher."""
+    written = store.write(pd.read_csv(csv_path, dtype=str))
+    print(f"{csv_path}: {written} neue Artikel übernommen.")
+    return written
+
+# ==============================================================================
+# 3. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verwaltet den partitionierten News-Speicher.")
+    parser.add_argument('--store', default=NEWS_STORE_DIR, help="Wurzelverzeichnis des Speichers")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="Bisherige News-CSV-Dateien übernehmen")
+    import_parser.add_argument('csv_files', nargs='+')
+    subparsers.add_parser('compact', help="Teil-Dateien pro Partition zusammenfassen")
+    subparsers.add_parser('stats', help="Artikel und neuester Zeitpunkt pro Ticker")
+    args = parser.parse_args()
+
+    news_store = NewsStore(args.store)
+    if args.command == 'import':
+        for csv_file in args.csv_files:
+            import_csv(csv_file, news_store)
+        news_store.compact()
+    elif args.command == 'compact':
+        news_store.compact()
+    else:
+        counts = news_store.read(columns=['ticker']).groupby('ticker').size()
+        latest = news_store.latest_published_at()
+        for ticker, count in counts.items():
+            print(f"{ticker:<8}{count:>7} Artikel, neuester: {latest.get(ticker)}")
@@ -0,0 +1,352 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from price_panel import PANEL_DIR, load_panel
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+TRADING_DAYS = 252
+
+# Fenster für Volatilität, Beta und Korrelation (63 Handelstage = ca. ein Quartal)
+DEFAULT_WINDOW = 63
+
+# Mindestanzahl gültiger Tage im Fenster; darunter (z.B. kurz nach einem Börsengang) NaN
+MIN_PERIODS = 20
+
+# Zustand der Berechnung für inkrementelle Updates. Liegt neben dem Panel-Ordner, nicht darin:
+# build_panel() ersetzt den Ordner bei jedem Neuaufbau vollständig.
+STATE_SUFFIX = '_analytics.npz'
+
+# ==============================================================================
+# 2. VEKTORISIERTE BAUSTEINE
+# ==============================================================================
+
+def simple_returns(close, previous=None):
+    """Tagesrenditen einer Matrix (Datum x Ticker); NaN, wo Vortag oder Tag fehlen."""
+    before = np.vstack([previous if previous is not None else np.full(close.shape[1], np.nan), close[:-1]])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return close / before - 1
+
+def drawdowns(close, running_max=None):
+    """
+    Drawdown zum bisherigen Höchststand (0 = Allzeithoch, -0.5 = halbiert). np.fmax ignoriert
+    NaN, dadurch beginnt jeder Ticker erst mit seinem ersten Kurs.
+    Gibt (Drawdowns, Höchststände) zurück; `running_max` setzt einen früheren Stand fort.
+    """
+    if running_max is not None:
+        close = np.vstack([running_max, close])
+    peaks = np.fmax.accumulate(close, axis=0)
+    if running_max is not None:
+        close, peaks = close[1:], peaks[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return close / peaks - 1, peaks
+
+def prefix_sums(values, last=None):
+    """
+    Kumulierte Summen mit führender Nullzeile (NaN zählt als 0). Mit `last` (letzte Zeile
+    früherer Summen) wird fortgesetzt und die Nullzeile entfällt.
+    """
+    sums = np.cumsum(np.nan_to_num(values), axis=0)
+    if last is None:
+        return np.vstack([np.zeros((1,) + values.shape[1:]), sums])
+    return sums + last
+
+def window_sums(prefix, window, first_row=0):
+    """Summen über die letzten `window` Zeilen für jede Zeile ab `first_row` (aus Präfixsummen)."""
+    rows = np.arange(first_row + 1, len(prefix))
+    return prefix[rows] - prefix[np.maximum(rows - window, 0)]
+
+def pairwise_correlation(returns, min_periods=MIN_PERIODS):
+    """
+    Korrelationsmatrix über alle Spalten mit paarweise vollständigen Tagen: Summen, Quadrate
+    und Kreuzprodukte werden als Matrixprodukte über die Gültigkeitsmaske berechnet.
+    """
+    valid = ~np.isnan(returns)
+    x = np.where(valid, returns, 0.0)
+    mask = valid.astype(float)
+    n = mask.T @ mask
+    sx = x.T @ mask
+    sxx = (x * x).T @ mask
+    sxy = x.T @ x
+    return _correlation_from_sums(n, sx, sxx, sxy, min_periods)
+
+def _correlation_from_sums(n, sx, sxx, sxy, min_periods):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sx / n
+        cov = sxy / n - mean * mean.T
+        var = sxx / n - mean * mean
+        corr = cov / np.sqrt(var * var.T)
+    corr[n < min_periods] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+class RollingCorrelation:
+    """
+    Laufende Korrelationsmatrix über die letzten `window` Tage. Jeder neue Tag kostet ein paar
+    Rang-1-Updates der Summenmatrizen (O(N²)) statt einer Neuberechnung über das Fenster.
+    """
+
+    def __init__(self, size, window=DEFAULT_WINDOW, min_periods=MIN_PERIODS):
+        self.window = window
+        self.min_periods = min_periods
+        self.rows = []
+        self.n = np.zeros((size, size))
+        self.sx = np.zeros((size, size))
+        self.sxx = np.zeros((size, size))
+        self.sxy = np.zeros((size, size))
+
+    def _apply(self, row, sign):
+        valid = ~np.isnan(row)
+        x = np.where(valid, row, 0.0)
+        mask = valid.astype(float)
+        self.n += sign * np.outer(mask, mask)
+        self.sx += sign * np.outer(x, mask)
+        self.sxx += sign * np.outer(x * x, mask)
+        self.sxy += sign * np.outer(x, x)
+
+    def push(self, row):
+        """Nimmt einen Tag (Renditen aller Ticker) auf und entfernt den ältesten aus dem Fenster."""
+        self.rows.append(row)
+        self._apply(row, 1.0)
+        if len(self.rows) > self.window:
+            self._apply(self.rows.pop(0), -1.0)
+
+    def matrix(self):
+        return _correlation_from_sums(self.n, self.sx, self.sxx, self.sxy, self.min_periods)
+
+# ==============================================================================
+# 3. ANALYSE-ENGINE
+# ==============================================================================
+
+class PriceAnalytics:
+    """
+    Kennzahlen für alle Ticker gleichzeitig als Matrizen (Datum x Ticker): Tagesrenditen,
+    annualisierte Volatilität, Drawdowns und Beta zum Index. Rollierende Fenster werden aus
+    Präfixsummen berechnet, NaN (Ticker vor dem Börsengang) zählen nicht mit.
+
+    Als Index dient `benchmark` (z.B. '^NDX', wenn stockdata.py ihn mitlädt), sonst der
+    gleichgewichtete Durchschnitt der Konstituenten.
+
+    Neue Tage im Panel werden mit `update()` angehängt: Präfixsummen und Höchststände werden
+    fortgesetzt, nur die neuen Zeilen werden berechnet.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, min_periods=MIN_PERIODS, benchmark=None):
+        self.window = window
+        self.min_periods = min_periods
+        self.benchmark = benchmark
+        self.dates = None
+        self.tickers = None
+        self.last_close = None
+        # Art des letzten update(): 'incremental', 'full' oder 'unchanged'
+        self.last_update = None
+
+    # ------------------------------------------------------------------
+    # Berechnung
+    # ------------------------------------------------------------------
+
+    def _market_returns(self, returns):
+        if self.benchmark in self.tickers:
+            return returns[:, self.tickers.index(self.benchmark)]
+        with np.errstate(invalid='ignore'):
+            with_data = (~np.isnan(returns)).any(axis=1)
+            market = np.full(len(returns), np.nan)
+            market[with_data] = np.nanmean(returns[with_data], axis=1)
+        return market
+
+    def _extend(self, close, first_row):
+        """Berechnet die Zeilen ab `first_row`; bei first_row=0 alles neu."""
+        fresh = first_row == 0
+        returns = simple_returns(close, None if fresh else self.last_close)
+        market = self._market_returns(returns)
+        drawdown, peaks = drawdowns(close, None if fresh else self.running_max)
+
+        # Paarweise Gültigkeit Ticker/Index für das Beta
+        valid = ~np.isnan(returns)
+        paired = valid & ~np.isnan(market)[:, None]
+        r = np.where(paired, returns, 0.0)
+        m = np.where(paired, market[:, None], 0.0)
+        terms = {
+            'n': valid.astype(float), 'r': returns, 'r2': returns * returns,
+            'pn': paired.astype(float), 'pr': r, 'pm': m, 'pm2': m * m, 'prm': r * m,
+        }
+        new_prefix = {name: prefix_sums(values, None if fresh else self.prefix[name][-1])
+                      for name, values in terms.items()}
+        if fresh:
+            self.prefix = new_prefix
+            self.returns, self.market, self.drawdown = returns, market, drawdown
+        else:
+            self.prefix = {name: np.vstack([self.prefix[name], new_prefix[name]]) for name in terms}
+            self.returns = np.vstack([self.returns, returns])
+            self.market = np.concatenate([self.market, market])
+            self.drawdown = np.vstack([self.drawdown, drawdown])
+        self.running_max = peaks[-1]
+        self.last_close = close[-1]
+
+        w = {name: window_sums(self.prefix[name], self.window, first_row) for name in terms}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = w['r'] / w['n']
+            # Stichprobenvarianz (n-1) wie pandas .rolling().std()
+            variance = (w['r2'] - w['n'] * mean * mean) / (w['n'] - 1)
+            volatility = np.sqrt(np.maximum(variance, 0.0) * TRADING_DAYS)
+            volatility[w['n'] < self.min_periods] = np.nan
+
+            cov = w['prm'] / w['pn'] - (w['pr'] / w['pn']) * (w['pm'] / w['pn'])
+            var_m = w['pm2'] / w['pn'] - (w['pm'] / w['pn']) ** 2
+            beta = cov / var_m
+            beta[w['pn'] < self.min_periods] = np.nan
+
+        if fresh:
+            self.volatility, self.beta = volatility, beta
+        else:
+            self.volatility = np.vstack([self.volatility, volatility])
+            self.beta = np.vstack([self.beta, beta])
+
+    def compute(self, panel):
+        """Berechnet alle Kennzahlen über die gesamte Historie des Panels."""
+        self.dates = panel.dates.copy()
+        self.tickers = list(panel.tickers)
+        self._extend(np.asarray(panel.values('Close'), dtype=float), 0)
+        return self
+
+    def update(self, panel):
+        """
+        Hängt neue Tage an. Haben sich Ticker, bekannte Tage oder der letzte Schlusskurs geändert
+        (z.B. neu berechnete Historie nach einem Split), wird alles neu berechnet.
+        Gibt die Anzahl der neu berechneten Tage zurück.
+        """
+        known = 0 if self.dates is None else len(self.dates)
+        close = panel.values('Close')
+        compatible = (
+            known > 0 and list(panel.tickers) == self.tickers and len(panel.dates) >= known
+            and np.array_equal(panel.dates[:known], self.dates)
+            and np.allclose(close[known - 1], self.last_close, equal_nan=True)
+        )
+        if not compatible:
+            self.compute(panel)
+            self.last_update = 'full'
+            return len(self.dates)
+        if len(panel.dates) == known:
+            self.last_update = 'unchanged'
+            return 0
+        self._extend(np.asarray(close[known:], dtype=float), known)
+        self.dates = panel.dates.copy()
+        self.last_update = 'incremental'
+        return len(self.dates) - known
+
+    # ------------------------------------------------------------------
+    # Auswertung
+    # ------------------------------------------------------------------
+
+    def frame(self, metric):
+        """Eine Kennzahl ('returns', 'volatility', 'drawdown', 'beta') als DataFrame."""
+        return pd.DataFrame(getattr(self, metric), index=pd.DatetimeIndex(self.dates, name='Date'),
+                            columns=self.tickers)
+
+    def max_drawdown(self):
+        """Größter Drawdown je Ticker über die gesamte Historie."""
+        return pd.Series(np.nanmin(self.drawdown, axis=0), index=self.tickers)
+
+    def _row(self, date, side='left'):
+        return np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date).date(), 'D'), side=side)
+
+    def correlation(self, end=None, window=None):
+        """Korrelationsmatrix aller Ticker über das Fenster, das am Tag `end` endet (Standard: letzter Tag)."""
+        window = window or self.window
+        last = len(self.dates) if end is None else self._row(end, 'right')
+        corr = pairwise_correlation(self.returns[max(0, last - window):last], self.min_periods)
+        return pd.DataFrame(corr, index=self.tickers, columns=self.tickers)
+
+    def rolling_correlation(self, start=None, end=None, window=None):
+        """
+        Rollierende Korrelationsmatrizen für jeden Tag in [start, end] als Array
+        (Tage x Ticker x Ticker), laufend aktualisiert statt pro Tag neu berechnet.
+        """
+        window = window or self.window
+        first = 0 if start is None else self._row(start)
+        last = len(self.dates) if end is None else self._row(end, 'right')
+        rolling = RollingCorrelation(len(self.tickers), window, self.min_periods)
+        for row in self.returns[max(0, first - window + 1):first]:
+            rolling.push(row)
+        result = np.empty((last - first, len(self.tickers), len(self.tickers)))
+        for i, row in enumerate(self.returns[first:last]):
+            rolling.push(row)
+            result[i] = rolling.matrix()
+        return result
+
+    # ------------------------------------------------------------------
+    # Zustand speichern / laden
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        arrays = {f'prefix_{name}': values for name, values in self.prefix.items()}
+        np.savez(path + '.tmp.npz', dates=self.dates, tickers=np.array(self.tickers), last_close=self.last_close,
+                 running_max=self.running_max, returns=self.returns, market=self.market, drawdown=self.drawdown,
+                 volatility=self.volatility, beta=self.beta,
+                 settings=np.array([self.window, self.min_periods]), benchmark=np.array(self.benchmark or ''),
+                 **arrays)
+        os.replace(path + '.tmp.npz', path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as state:
+            window, min_periods = state['settings']
+            analytics = cls(int(window), int(min_periods), str(state['benchmark']) or None)
+            analytics.dates = state['dates']
+            analytics.tickers = [str(ticker) for ticker in state['tickers']]
+            for name in ('last_close', 'running_max', 'returns', 'market', 'drawdown', 'volatility', 'beta'):
+                setattr(analytics, name, state[name])
+            analytics.prefix = {key[len('prefix_'):]: state[key] for key in state.files if key.startswith('prefix_')}
+        return analytics
+
+def state_path(panel_dir):
+    """Zustandsdatei neben dem Panel-Ordner (z.B. nasdaq100_panel_analytics.npz)."""
+    return os.path.normpath(panel_dir) + STATE_SUFFIX
+
+def load_analytics(panel=None, window=DEFAULT_WINDOW, benchmark=None, panel_dir=PANEL_DIR):
+    """
+    Kennzahlen zum aktuellen Panel: der gespeicherte Zustand wird um neue Tage ergänzt (oder
+    bei geänderten Einstellungen neu berechnet) und wieder gespeichert. Ob der Zustand zum
+    Panel passt, prüft update() anhand von Tickern, Tagen und letztem Schlusskurs.
+    """
+    panel = panel or load_panel(panel_dir)
+    path = state_path(panel.panel_dir)
+    analytics = None
+    if os.path.exists(path):
+        analytics = PriceAnalytics.load(path)
+        if analytics.window != window or analytics.benchmark != benchmark:
+            analytics = None
+    analytics = analytics or PriceAnalytics(window, benchmark=benchmark)
+    updated = analytics.update(panel)
+    if updated:
+        analytics.save(path)
+    print(f"Kennzahlen: {updated} Tage berechnet ({analytics.last_update})")
+    return analytics
+
+# ==============================================================================
+# 4. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Berechnet Kennzahlen für alle Ticker des Kurs-Panels.")
+    parser.add_argument('--panel', default=PANEL_DIR, help="Ordner des Panels (price_panel.py)")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW, help="Fenster in Handelstagen")
+    parser.add_argument('--benchmark', default=None, help="Ticker des Index (Standard: Durchschnitt)")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    result = load_analytics(window=args.window, benchmark=args.benchmark, panel_dir=args.panel)
+    print(f"Kennzahlen für {len(result.tickers)} Ticker x {len(result.dates)} Tage "
+          f"in {time.perf_counter() - start_time:.2f}s")
+    latest = pd.DataFrame({
+        'Volatilität': result.volatility[-1],
+        'Beta': result.beta[-1],
+        'Drawdown': result.drawdown[-1],
+        'Max. Drawdown': result.max_drawdown(),
+    }, index=result.tickers)
+    print(latest.round(3).to_string())
@@ -0,0 +1,179 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Quelle: eine CSV pro Ticker (von stockdata.py geschrieben)
+DATA_FOLDER = "nasdaq100_data"
+
+# Ziel: ein Ordner mit einer .npy-Matrix (Datum x Ticker) pro Feld und dem Index
+PANEL_DIR = "nasdaq100_panel"
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+
+META_FILE = 'meta.json'
+DATES_FILE = 'dates.npy'
+
+def field_file(field):
+    return field.lower().replace(' ', '_') + '.npy'
+
+# ==============================================================================
+# 2. AUFBAU DES PANELS
+# ==============================================================================
+
+def source_version(data_folder=DATA_FOLDER):
+    """Kennung des Datenstands: Name, Größe und Änderungszeit aller Kursdateien."""
+    entries = []
+    for file in sorted(os.listdir(data_folder)):
+        if file.endswith('.csv'):
+            stat = os.stat(os.path.join(data_folder, file))
+            entries.append(f"{file}:{stat.st_size}:{stat.st_mtime_ns}")
+    return hashlib.sha1('|'.join(entries).encode('utf-8')).hexdigest()[:16] if entries else ''
+
+def read_price_csv(file_path):
+    """Liest eine Kursdatei; der Index wird auf den Handelstag (ohne Uhrzeit/Zeitzone) gekürzt."""
+    df = pd.read_csv(file_path, index_col=0)
+    df.index = pd.to_datetime(df.index.str.slice(0, 10)).values.astype('datetime64[D]')
+    # Bei doppelten Tagen (z.B. nach manuellen Korrekturen) gilt die letzte Zeile
+    return df[~df.index.duplicated(keep='last')].sort_index()
+
+def build_panel(data_folder=DATA_FOLDER, panel_dir=PANEL_DIR):
+    """
+    Liest alle Kursdateien einmal ein und schreibt pro Feld eine ausgerichtete float64-Matrix
+    (Zeilen: alle Handelstage, Spalten: Ticker; NaN, wo ein Ticker noch nicht gelistet war).
+    Das Panel wird in einem temporären Ordner aufgebaut und danach ausgetauscht.
+    """
+    start_time = time.time()
+    version = source_version(data_folder)
+    frames = {}
+    for file in sorted(os.listdir(data_folder)):
+        if file.endswith('.csv'):
+            df = read_price_csv(os.path.join(data_folder, file))
+            if not df.empty:
+                frames[file[:-4]] = df
+
+    tickers = sorted(frames)
+    dates = np.unique(np.concatenate([df.index.values for df in frames.values()])) if frames \
+        else np.array([], dtype='datetime64[D]')
+
+    tmp_dir = panel_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, DATES_FILE), dates)
+    for field in FIELDS:
+        matrix = np.full((len(dates), len(tickers)), np.nan)
+        for column, ticker in enumerate(tickers):
+            df = frames[ticker]
+            if field in df.columns:
+                rows = np.searchsorted(dates, df.index.values)
+                matrix[rows, column] = df[field].to_numpy(dtype=float)
+        np.save(os.path.join(tmp_dir, field_file(field)), matrix)
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'tickers': tickers, 'fields': FIELDS, 'version': version, 'built_at': time.time()}, f)
+
+    old_dir = panel_dir + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(panel_dir):
+        os.replace(panel_dir, old_dir)
+    os.replace(tmp_dir, panel_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"Panel aufgebaut: {len(dates)} Tage x {len(tickers)} Ticker in {time.time() - start_time:.1f}s")
+
+# ==============================================================================
+# 3. LOADER
+# ==============================================================================
+
+class PricePanel:
+    """
+    Zugriff auf das Panel ohne Text-Parsing: die Matrizen werden per np.load(mmap_mode='r')
+    eingeblendet, nur tatsächlich gelesene Seiten werden von der Platte geladen, und mehrere
+    Prozesse teilen sich dieselben Seiten im Page-Cache des Betriebssystems.
+    """
+
+    def __init__(self, panel_dir=PANEL_DIR):
+        self.panel_dir = panel_dir
+        with open(os.path.join(panel_dir, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.tickers = self.meta['tickers']
+        self.version = self.meta['version']
+        self.dates = np.load(os.path.join(panel_dir, DATES_FILE))
+        self._column = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._fields = {}
+
+    def field(self, field):
+        """Komplette Matrix (Datum x Ticker) eines Feldes als schreibgeschützte memmap."""
+        if field not in self._fields:
+            self._fields[field] = np.load(os.path.join(self.panel_dir, field_file(field)), mmap_mode='r')
+        return self._fields[field]
+
+    def date_range(self, start=None, end=None):
+        """Zeilen-Slice für den Zeitraum [start, end] (beide inklusiv, None = offen)."""
+        first = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).date(), 'D')) if start is not None else 0
+        last = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end).date(), 'D'), side='right') \
+            if end is not None else len(self.dates)
+        return slice(first, last)
+
+    def columns(self, tickers=None):
+        """Spalten-Indizes der gewünschten Ticker (unbekannte Ticker werden ausgelassen)."""
+        if tickers is None:
+            return np.arange(len(self.tickers))
+        return np.array([self._column[t] for t in tickers if t in self._column], dtype=int)
+
+    def values(self, field, tickers=None, start=None, end=None):
+        """
+        Ausschnitt eines Feldes als NumPy-Array. Ein reiner Zeitraum-Ausschnitt bleibt eine
+        memmap-Sicht (kein Kopieren); eine Ticker-Auswahl erzeugt eine Kopie der Spalten.
+        """
+        rows = self.date_range(start, end)
+        matrix = self.field(field)[rows]
+        return matrix if tickers is None else matrix[:, self.columns(tickers)]
+
+    def load(self, field='Close', tickers=None, start=None, end=None):
+        """Ausschnitt eines Feldes als DataFrame (Index: Handelstage, Spalten: Ticker)."""
+        rows = self.date_range(start, end)
+        columns = self.columns(tickers)
+        return pd.DataFrame(self.values(field, tickers, start, end),
+                            index=pd.DatetimeIndex(self.dates[rows], name='Date'),
+                            columns=[self.tickers[i] for i in columns])
+
+    def ticker_frame(self, ticker, fields=FIELDS, start=None, end=None):
+        """Alle Felder eines Tickers wie in der CSV-Datei, ohne die Tage vor seiner Notierung."""
+        rows = self.date_range(start, end)
+        column = self._column[ticker]
+        df = pd.DataFrame({field: self.field(field)[rows, column] for field in fields},
+                          index=pd.DatetimeIndex(self.dates[rows], name='Date'))
+        return df.dropna(subset=['Close'] if 'Close' in fields else None, how='all')
+
+def load_panel(panel_dir=PANEL_DIR, data_folder=DATA_FOLDER):
+    """Öffnet das Panel und baut es vorher neu auf, wenn sich die Kursdateien geändert haben."""
+    panel = PricePanel(panel_dir) if os.path.exists(os.path.join(panel_dir, META_FILE)) else None
+    if os.path.isdir(data_folder) and (panel is None or panel.version != source_version(data_folder)):
+        build_panel(data_folder, panel_dir)
+        panel = PricePanel(panel_dir)
+    return panel
+
+# ==============================================================================
+# 4. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baut das Datum x Ticker-Panel aus den Kursdateien.")
+    parser.add_argument('--input', default=DATA_FOLDER, help="Ordner mit einer CSV pro Ticker")
+    parser.add_argument('--output', default=PANEL_DIR, help="Ordner für das Panel")
+    args = parser.parse_args()
+
+    build_panel(args.input, args.output)
+    start_time = time.perf_counter()
+    panel = PricePanel(args.output)
+    close = panel.values('Close')
+    print(f"Kalt geladen in {(time.perf_counter() - start_time) * 1000:.1f} ms: {close.shape[0]} Tage x "
+          f"{close.shape[1]} Ticker, {panel.dates[0]} bis {panel.dates[-1]}")
@@ -1,36 +1,231 @@
 # pip install yfinance pandas
-import yfinance as yf
-import pandas as pd
+import argparse
+import io
 import os
+import shutil
 import time
 
-# 1. NASDAQ-100 Ticker Liste (Beispiel, du kannst sie erweitern)
-nasdaq_100_tickers = [
-    "AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "PEP",
-    "CSCO", "INTC", "ADBE", "CMCSA", "AVGO", "TXN", "QCOM"
-    # Füge hier die restlichen Ticker hinzu
-]
+import pandas as pd
+import yfinance as yf
+
+from price_panel import PANEL_DIR, build_panel
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
 
-# 2. Ordner zum Speichern der CSV-Dateien
+# Ticker-Liste: alle NASDAQ-100-Unternehmen aus der Wikipedia/Wikidata-Tabelle
+CSV_DATEIPFAD = "WikiNasdaq_100_constituents.csv"
+
+# Ordner zum Speichern der CSV-Dateien (eine Datei pro Ticker)
 output_folder = "nasdaq100_data"
-os.makedirs(output_folder, exist_ok=True)
-
-# 3. Daten abrufen und speichern
-for ticker in nasdaq_100_tickers:
-    print(f"Lade Daten für {ticker}...")
-    try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(period="max")  # gesamte verfügbare Historie
-        if not data.empty:
-            file_path = os.path.join(output_folder, f"{ticker}.csv")
-            data.to_csv(file_path)
-            print(f"{ticker} gespeichert ({len(data)} Zeilen).")
+
+# Spalten wie bei yf.Ticker(t).history()
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock Splits']
+
+# Tickers pro yf.download-Aufruf und Pause zwischen den Aufrufen
+BATCH_SIZE = 50
+BATCH_PAUSE_SECONDS = 1
+
+# Beim Update werden die letzten Tage erneut geladen und mit der Datei verglichen. Weichen die
+# Kurse ab, hat Yahoo die Historie neu berechnet (Split oder Dividende, da die Kurse
+# dividendenbereinigt sind) und die Datei dieses Tickers wird komplett neu geschrieben.
+OVERLAP_DAYS = 7
+RESTATEMENT_TOLERANCE = 1e-6
+
+# ==============================================================================
+# 2. DATEIEN
+# ==============================================================================
+
+def ticker_path(ticker, folder=output_folder):
+    return os.path.join(folder, f"{ticker}.csv")
+
+def read_tail(file_path, rows=OVERLAP_DAYS, chunk_size=8192):
+    """Liest nur die letzten `rows` Zeilen einer Kursdatei (ohne die ganze Historie zu parsen)."""
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b''
+        while position > len(header) and tail.count(b'\n') <= rows:
+            step = min(chunk_size, position - len(header))
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+    lines = tail.strip(b'\n').split(b'\n')[-rows:]
+    if not lines or not lines[0]:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.read_csv(io.BytesIO(header + b'\n'.join(lines) + b'\n'), index_col=0)
+
+def write_atomic(data, file_path):
+    """Schreibt die komplette Historie über eine temporäre Datei."""
+    tmp_path = file_path + '.tmp'
+    data.to_csv(tmp_path)
+    os.replace(tmp_path, file_path)
+
+def append_atomic(data, file_path, replace_last=False):
+    """
+    Hängt neue Zeilen an: Kopie der Datei + neue Zeilen, danach os.replace. Ein Abbruch
+    hinterlässt so nie eine Datei mit halber Zeile. Mit replace_last=True wird die letzte
+    gespeicherte Zeile ersetzt (z.B. ein während der Handelszeit geladener, unvollständiger Tag).
+    """
+    tmp_path = file_path + '.tmp'
+    shutil.copyfile(file_path, tmp_path)
+    with open(tmp_path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        end = f.read()
+        if replace_last:
+            # Auf den Anfang der letzten Zeile kürzen
+            f.truncate(size - len(end) + end.rstrip(b'\n').rfind(b'\n') + 1)
+        elif end and not end.endswith(b'\n'):
+            f.write(b'\n')
+        f.seek(0, os.SEEK_END)
+        f.write(data.to_csv(header=False).encode('utf-8'))
+    os.replace(tmp_path, file_path)
+
+def day(index_value):
+    """Handelstag (YYYY-MM-DD) eines Index-Eintrags, unabhängig vom Zeitzonen-Suffix."""
+    return str(index_value)[:10]
+
+# ==============================================================================
+# 3. DOWNLOAD
+# ==============================================================================
+
+def download_batch(tickers, start=None):
+    """
+    Lädt mehrere Ticker mit einem yf.download-Aufruf. Ohne `start` wird die gesamte Historie
+    geladen. Gibt ein Dictionary Ticker -> DataFrame (Spalten COLUMNS) zurück.
+    """
+    options = {'start': start} if start else {'period': 'max'}
+    data = yf.download(tickers, group_by='ticker', actions=True, auto_adjust=True,
+                       ignore_tz=False, threads=True, progress=False, **options)
+    result = {}
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                continue
+            frame = data[ticker]
         else:
-            print(f"Keine Daten für {ticker} gefunden.")
-    except Exception as e:
-        print(f"Fehler bei {ticker}: {e}")
-    
-    # Sicherheitspause, um Rate-Limiting zu vermeiden
-    time.sleep(1)  
-
-print("Alle Daten abgerufen und gespeichert.")
\ No newline at end of file
+            frame = data
+        frame = frame.reindex(columns=COLUMNS).dropna(subset=['Open', 'High', 'Low', 'Close'], how='all').sort_index()
+        if not frame.empty:
+            frame.index.name = 'Date'
+            result[ticker] = frame
+    return result
+
+def download_in_batches(tickers, start=None):
+    """Teilt die Ticker in Gruppen von BATCH_SIZE auf und lädt jede Gruppe mit einem Aufruf."""
+    result = {}
+    for i in range(0, len(tickers), BATCH_SIZE):
+        batch = tickers[i:i + BATCH_SIZE]
+        print(f"Lade {len(batch)} Ticker ({'ab ' + start if start else 'gesamte Historie'})...")
+        try:
+            result.update(download_batch(batch, start))
+        except Exception as e:
+            print(f"Fehler beim Laden von {', '.join(batch)}: {e}")
+        # Sicherheitspause, um Rate-Limiting zu vermeiden
+        time.sleep(BATCH_PAUSE_SECONDS)
+    return result
+
+# ==============================================================================
+# 4. UPDATE
+# ==============================================================================
+
+def changed_days(stored_tail, fresh):
+    """
+    Tage, die schon gespeichert sind und in den neuen Daten andere Kurse haben. None, wenn sich
+    die Zeiträume nicht überlappen (z.B. nach langer Pause) und kein Vergleich möglich ist.
+    """
+    stored = stored_tail.set_axis([day(i) for i in stored_tail.index])
+    fresh = fresh.set_axis([day(i) for i in fresh.index])
+    common = stored.index.intersection(fresh.index)
+    if common.empty:
+        return None
+    prices = ['Open', 'High', 'Low', 'Close']
+    old, new = stored.loc[common, prices].astype(float), fresh.loc[common, prices].astype(float)
+    deviation = ((new - old).abs() / old.abs().where(old != 0, 1.0)).max(axis=1)
+    return set(deviation[deviation > RESTATEMENT_TOLERANCE].index)
+
+def update_tickers(tickers, folder=output_folder, full=False):
+    """
+    Aktualisiert die Kursdateien: neue Ticker (und mit full=True alle) bekommen die gesamte
+    Historie, bestehende nur die fehlenden Tage. Ticker mit neu berechneter Historie werden
+    gesammelt und in einem zweiten Durchlauf komplett neu geladen.
+    """
+    os.makedirs(folder, exist_ok=True)
+    tails = {}
+    by_start = {}
+    for ticker in tickers:
+        file_path = ticker_path(ticker, folder)
+        tail = read_tail(file_path) if not full and os.path.exists(file_path) else None
+        if tail is None or tail.empty:
+            by_start.setdefault(None, []).append(ticker)
+            continue
+        tails[ticker] = tail
+        # Ab dem ältesten der letzten gespeicherten Tage laden (Überlappung für den Vergleich)
+        by_start.setdefault(day(tail.index[0]), []).append(ticker)
+
+    full_reload = by_start.pop(None, [])
+    appended = unchanged = 0
+    restated = []
+    for start, group in sorted(by_start.items()):
+        fresh_data = download_in_batches(group, start)
+        for ticker in group:
+            fresh = fresh_data.get(ticker)
+            if fresh is None:
+                print(f"Keine neuen Daten für {ticker} gefunden.")
+                continue
+            tail = tails[ticker]
+            last_day = day(tail.index[-1])
+            changed = changed_days(tail, fresh)
+            new_rows = fresh[[day(i) > last_day for i in fresh.index]]
+            new_actions = (new_rows[['Dividends', 'Stock Splits']].fillna(0) != 0).any().any()
+            # Abweichungen vor dem letzten Tag oder neue Splits/Dividenden: Historie neu berechnet.
+            # Weicht nur der letzte Tag ab, wurde er während der Handelszeit geladen und wird ersetzt.
+            if changed is None or changed - {last_day} or new_actions:
+                restated.append(ticker)
+                continue
+            replace_last = last_day in changed
+            if replace_last:
+                new_rows = fresh[[day(i) >= last_day for i in fresh.index]]
+            if new_rows.empty:
+                unchanged += 1
+                continue
+            append_atomic(new_rows, ticker_path(ticker, folder), replace_last)
+            appended += 1
+            print(f"{ticker}: {len(new_rows)} neue Zeilen angehängt.")
+
+    if restated:
+        print(f"Historie neu berechnet (Split/Dividende) für: {', '.join(restated)}")
+    full_reload += restated
+    rewritten = 0
+    if full_reload:
+        for ticker, data in download_in_batches(full_reload).items():
+            write_atomic(data, ticker_path(ticker, folder))
+            rewritten += 1
+            print(f"{ticker} gespeichert ({len(data)} Zeilen).")
+
+    print(f"Fertig: {appended} ergänzt, {unchanged} bereits aktuell, {rewritten} komplett neu geschrieben.")
+
+def load_tickers(csv_file=CSV_DATEIPFAD):
+    df_nasdaq = pd.read_csv(csv_file)
+    return sorted(df_nasdaq['Ticker'].dropna().unique())
+
+# ==============================================================================
+# 5. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lädt bzw. aktualisiert die Tageskurse der NASDAQ-100-Unternehmen.")
+    parser.add_argument('--input', default=CSV_DATEIPFAD, help="CSV-Datei mit der Spalte Ticker")
+    parser.add_argument('--output', default=output_folder, help="Ordner für die Kursdateien")
+    parser.add_argument('--full', action='store_true', help="Gesamte Historie aller Ticker neu laden")
+    parser.add_argument('tickers', nargs='*', help="Nur diese Ticker (Standard: alle aus --input)")
+    args = parser.parse_args()
+
+    update_tickers(args.tickers or load_tickers(args.input), args.output, args.full)
+    # Panel (Datum x Ticker) für die Auswertungen neu aufbauen
+    build_panel(args.output, PANEL_DIR)
+    print("Alle Daten abgerufen und gespeichert.")
@@ -0,0 +1,353 @@
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from vector_store import NEWS_VECTOR_STORE, WEB_VECTOR_STORE, VectorStore
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Der Index liegt als Unterordner im Vektor-Speicher
+INDEX_DIR_NAME = 'ivf_index'
+
+# Wie viele Listen (Cluster) pro Vektor: nlist ~ 4 * sqrt(N) ist ein üblicher Startwert
+MIN_LISTS = 1
+LISTS_PER_SQRT = 4
+
+# Standard für die Anzahl durchsuchter Listen (höher = genauer, aber langsamer)
+DEFAULT_NPROBE = 8
+
+# k-means: Trainingsstichprobe pro Liste und Iterationen
+TRAIN_POINTS_PER_LIST = 64
+KMEANS_ITERATIONS = 20
+
+# Neue Vektoren landen zunächst in einem Delta-Bereich; ab diesem Anteil wird zusammengeführt
+COMPACT_DELTA_RATIO = 0.1
+
+# Zeilen pro Block bei der Zuordnung zu den Zentren (begrenzt den Speicher)
+ASSIGN_CHUNK = 65536
+
+# ==============================================================================
+# 2. HILFSFUNKTIONEN
+# ==============================================================================
+
+def normalize(vectors):
+    """L2-normalisiert (float32): das Skalarprodukt entspricht dann der Kosinus-Ähnlichkeit."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+def assign_lists(vectors, centroids):
+    """Nächstes Zentrum (größtes Skalarprodukt) für jeden Vektor, blockweise."""
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        block = normalize(vectors[start:start + ASSIGN_CHUNK])
+        lists[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return lists
+
+def train_centroids(vectors, nlist, seed=0):
+    """Sphärisches k-means auf einer Stichprobe der Vektoren."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * TRAIN_POINTS_PER_LIST)
+    sample = normalize(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        # Leere Cluster mit zufälligen Punkten neu besetzen
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+def top_k(scores, ids, k):
+    """Die k besten (Score, ID)-Paare absteigend sortiert."""
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[best], ids[best]
+    order = np.argsort(-scores, kind='stable')
+    return scores[order], ids[order]
+
+# ==============================================================================
+# 3. IVF-INDEX
+# ==============================================================================
+
+class IVFIndex:
+    """
+    Inverted-File-Index für Kosinus-Ähnlichkeit. Die Vektoren werden per k-means in `nlist`
+    Listen aufgeteilt; eine Anfrage durchsucht nur die `nprobe` Listen mit den nächsten Zentren.
+    `nprobe` ist der Regler zwischen Recall und Latenz (nprobe = nlist entspricht exakter Suche).
+
+    Auf der Platte (Ordner `path`):
+      centroids.npy          Zentren (nlist x dim)
+      offsets.npy            Beginn jeder Liste in ids.npy/vectors.npy (nlist + 1)
+      ids.npy, vectors.npy   Zeilen-IDs und normalisierte Vektoren (float16), nach Liste sortiert
+      delta_*.npy            seit dem letzten Zusammenführen eingefügte Vektoren
+      deleted.npy            gelöschte IDs (werden bei der Suche übersprungen)
+      meta.json              Dimension, nlist, Anzahl indexierter Zeilen, Kennung und Modell des Speichers
+    Die Basis-Arrays werden per Memory-Mapping geöffnet.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        load = lambda name, mmap=None: np.load(os.path.join(path, name), mmap_mode=mmap)
+        self.centroids = load('centroids.npy')
+        self.offsets = load('offsets.npy')
+        self.ids = load('ids.npy', 'r')
+        self.vectors = load('vectors.npy', 'r')
+        self.delta_ids = load('delta_ids.npy')
+        self.delta_lists = load('delta_lists.npy')
+        self.delta_vectors = load('delta_vectors.npy')
+        self.deleted = set(load('deleted.npy').tolist())
+
+    @property
+    def nlist(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.ids) + len(self.delta_ids) - len(self.deleted)
+
+    # ------------------------------------------------------------------
+    # Aufbau und Speichern
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, path, vectors, ids=None, nlist=None, indexed_rows=None, source=None):
+        """
+        Trainiert die Zentren und schreibt einen neuen Index (ersetzt einen vorhandenen).
+        `source` (Dictionary, z.B. store_id und model) wird in meta.json übernommen.
+        """
+        ids = np.arange(len(vectors), dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        nlist = nlist or max(MIN_LISTS, int(LISTS_PER_SQRT * np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+        centroids = train_centroids(vectors, nlist)
+        lists = assign_lists(vectors, centroids)
+        order = np.argsort(lists, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=nlist))]).astype(np.int64)
+
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        dim = vectors.shape[1]
+        arrays = {
+            'centroids': centroids, 'offsets': offsets, 'ids': ids[order],
+            'vectors': np.vstack([normalize(vectors[order[i:i + ASSIGN_CHUNK]]).astype(np.float16)
+                                  for i in range(0, len(order), ASSIGN_CHUNK)]),
+            'delta_ids': np.empty(0, dtype=np.int64), 'delta_lists': np.empty(0, dtype=np.int32),
+            'delta_vectors': np.empty((0, dim), dtype=np.float16), 'deleted': np.empty(0, dtype=np.int64),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f'{name}.npy'), array)
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'dim': dim, 'nlist': nlist, 'indexed_rows': indexed_rows or len(vectors), **(source or {})}, f)
+        _swap_directory(tmp_path, path)
+        return cls(path)
+
+    def save(self):
+        """
+        Schreibt Delta und gelöschte IDs. Ist das Delta im Verhältnis zur Basis groß geworden,
+        werden Basis und Delta zu neuen, nach Liste sortierten Arrays zusammengeführt.
+        """
+        if len(self.delta_ids) > COMPACT_DELTA_RATIO * max(1, len(self.ids)) or \
+                len(self.deleted) > COMPACT_DELTA_RATIO * max(1, len(self.ids)):
+            self.compact()
+            return
+        for name, array in (('delta_ids', self.delta_ids), ('delta_lists', self.delta_lists),
+                            ('delta_vectors', self.delta_vectors),
+                            ('deleted', np.array(sorted(self.deleted), dtype=np.int64))):
+            _save_atomic(os.path.join(self.path, f'{name}.npy'), array)
+        _save_atomic_json(os.path.join(self.path, 'meta.json'), self.meta)
+
+    def compact(self):
+        """Führt Delta und Basis zusammen, entfernt Gelöschte; die Zentren bleiben unverändert."""
+        base_lists = np.repeat(np.arange(self.nlist, dtype=np.int32), np.diff(self.offsets))
+        ids = np.concatenate([self.ids, self.delta_ids])
+        lists = np.concatenate([base_lists, self.delta_lists])
+        keep = ~np.isin(ids, np.fromiter(self.deleted, dtype=np.int64, count=len(self.deleted)))
+        order = np.argsort(lists[keep], kind='stable')
+        vectors = np.vstack([self.vectors, self.delta_vectors])[keep][order]
+        lists = lists[keep][order]
+
+        tmp_path = self.path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        arrays = {
+            'centroids': self.centroids,
+            'offsets': np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=self.nlist))]).astype(np.int64),
+            'ids': ids[keep][order], 'vectors': vectors,
+            'delta_ids': np.empty(0, dtype=np.int64), 'delta_lists': np.empty(0, dtype=np.int32),
+            'delta_vectors': np.empty((0, self.centroids.shape[1]), dtype=np.float16),
+            'deleted': np.empty(0, dtype=np.int64),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f'{name}.npy'), array)
+        with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        _swap_directory(tmp_path, self.path)
+        self.__init__(self.path)
+
+    # ------------------------------------------------------------------
+    # Ändern
+    # ------------------------------------------------------------------
+
+    def add(self, vectors, ids):
+        """Fügt Vektoren hinzu (landen im Delta der jeweils nächsten Liste)."""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        self.delta_lists = np.concatenate([self.delta_lists, assign_lists(vectors, self.centroids)])
+        self.delta_vectors = np.vstack([self.delta_vectors, normalize(vectors).astype(np.float16)])
+        self.delta_ids = np.concatenate([self.delta_ids, ids])
+        self.deleted.difference_update(ids.tolist())
+
+    def remove(self, ids):
+        """Markiert IDs als gelöscht; sie werden beim nächsten Zusammenführen entfernt."""
+        self.deleted.update(int(i) for i in ids)
+
+    # ------------------------------------------------------------------
+    # Suche
+    # ------------------------------------------------------------------
+
+    def search(self, queries, k=10, nprobe=DEFAULT_NPROBE, allowed=None):
+        """
+        Sucht die k ähnlichsten Vektoren für einen Block von Anfragen (Anzahl x dim).
+        Gibt (Scores, IDs) als Arrays (Anzahl x k) zurück; fehlende Treffer sind -inf bzw. -1.
+        `allowed` (Bool-Array über die IDs) filtert die Kandidaten, bevor sie bewertet werden.
+        """
+        queries = normalize(np.atleast_2d(queries))
+        nprobe = min(nprobe, self.nlist)
+        # Listen pro Anfrage in einem Matrixprodukt für den ganzen Block bestimmen
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        deleted = np.fromiter(self.deleted, dtype=np.int64, count=len(self.deleted))
+
+        result_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for q, (query, lists) in enumerate(zip(queries, probes)):
+            rows = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            delta_rows = np.flatnonzero(np.isin(self.delta_lists, lists))
+            if allowed is not None:
+                rows = rows[_lookup(allowed, self.ids[rows])]
+                delta_rows = delta_rows[_lookup(allowed, self.delta_ids[delta_rows])]
+            ids = np.concatenate([self.ids[rows], self.delta_ids[delta_rows]])
+            scores = np.concatenate([
+                np.asarray(self.vectors[rows], dtype=np.float32) @ query,
+                self.delta_vectors[delta_rows].astype(np.float32) @ query,
+            ])
+            if len(deleted):
+                alive = ~np.isin(ids, deleted)
+                ids, scores = ids[alive], scores[alive]
+            scores, ids = top_k(scores, ids, k)
+            result_scores[q, :len(ids)] = scores
+            result_ids[q, :len(ids)] = ids
+        return result_scores, result_ids
+
+# ==============================================================================
+# 4. DATEI-HILFEN
+# ==============================================================================
+
+def _lookup(mask, ids):
+    """mask[ids], wobei IDs jenseits der Maske (neuer als der Filter) als nicht erlaubt gelten."""
+    inside = ids < len(mask)
+    result = np.zeros(len(ids), dtype=bool)
+    result[inside] = mask[ids[inside]]
+    return result
+
+def _save_atomic(path, array):
+    tmp_path = path + '.tmp.npy'
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+def _save_atomic_json(path, data):
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+def _swap_directory(new_path, path):
+    old_path = path + '.old'
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(new_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+# ==============================================================================
+# 5. INDEX ZU EINEM VEKTOR-SPEICHER
+# ==============================================================================
+
+def open_index(store, rebuild=False, nlist=None):
+    """
+    Index eines VectorStore öffnen. Fehlt er, wird er aufgebaut; neue Zeilen des Speichers
+    werden inkrementell eingefügt (die Zentren bleiben, bis `rebuild=True`).
+    """
+    path = os.path.join(store.path, INDEX_DIR_NAME)
+    source = {'store_id': store.store_id, 'model': store.manifest['model']}
+    index = None if rebuild or not os.path.exists(os.path.join(path, 'meta.json')) else IVFIndex(path)
+    # Neu angelegter Speicher (andere Kennung, z.B. nach Modellwechsel) oder weniger Zeilen als
+    # indexiert: die Vektoren im Index passen nicht mehr
+    if index is None or index.meta['indexed_rows'] > len(store) or \
+            any(index.meta.get(key) != value for key, value in source.items()):
+        return IVFIndex.build(path, store.vectors, nlist=nlist, indexed_rows=len(store), source=source)
+    indexed = index.meta['indexed_rows']
+    if indexed < len(store):
+        index.add(store.vectors[indexed:], np.arange(indexed, len(store)))
+        index.meta['indexed_rows'] = len(store)
+        index.save()
+    return index
+
+def exact_search(vectors, queries, k):
+    """Exakte Kosinus-Suche als Referenz für den Benchmark."""
+    scores = normalize(queries) @ normalize(vectors).T
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1)
+    return np.take_along_axis(best, order, axis=1)
+
+def benchmark(store, index, k=10, queries=200, nprobes=(1, 2, 4, 8, 16, 32), seed=0):
+    """
+    Recall@k gegen die exakte Suche und Latenz pro Anfrage für mehrere nprobe-Werte.
+    Als Anfragen dienen zufällige Vektoren aus dem Speicher.
+    """
+    rng = np.random.default_rng(seed)
+    query_ids = rng.choice(len(store), min(queries, len(store)), replace=False)
+    query_vectors = np.asarray(store.vectors[query_ids], dtype=np.float32)
+    start = time.perf_counter()
+    truth = exact_search(store.vectors, query_vectors, k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(query_ids)
+    print(f"{len(store)} Vektoren, {index.nlist} Listen, {len(query_ids)} Anfragen, k={k}")
+    print(f"exakt:        {exact_ms:7.3f} ms/Anfrage")
+    results = []
+    for nprobe in nprobes:
+        if nprobe > index.nlist:
+            break
+        start = time.perf_counter()
+        _, found = index.search(query_vectors, k, nprobe)
+        latency_ms = (time.perf_counter() - start) * 1000 / len(query_ids)
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        results.append((nprobe, recall, latency_ms))
+        print(f"nprobe={nprobe:<4}  recall@{k}={recall:.3f}  {latency_ms:7.3f} ms/Anfrage")
+    return results
+
+# ==============================================================================
+# 6. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baut den IVF-Index eines Vektor-Speichers und misst Recall/Latenz.")
+    parser.add_argument('--store', default=WEB_VECTOR_STORE, help=f"Vektor-Speicher (z.B. {NEWS_VECTOR_STORE})")
+    parser.add_argument('--rebuild', action='store_true', help="Zentren neu trainieren")
+    parser.add_argument('--nlist', type=int, default=None)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    vector_store = VectorStore(args.store)
+    ivf_index = open_index(vector_store, args.rebuild, args.nlist)
+    benchmark(vector_store, ivf_index, args.k, args.queries)
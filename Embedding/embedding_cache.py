@@ -0,0 +1,129 @@
+import hashlib
+import re
+import sqlite3
+import unicodedata
+
+import numpy as np
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+EMBEDDING_CACHE_FILE = "DataScience/Embedding/data/embedding_cache.sqlite"
+
+# Version der Text-Normalisierung. Bei jeder Änderung an normalize_text() erhöhen, damit
+# alte Einträge nicht mehr getroffen werden.
+NORMALIZATION_VERSION = 1
+
+# SQLite erlaubt nur begrenzt viele Parameter pro Abfrage
+LOOKUP_CHUNK = 500
+
+# ==============================================================================
+# 2. CACHE
+# ==============================================================================
+
+def normalize_text(text):
+    """Unicode-NFC und zusammengefasste Leerzeichen (ändert die Tokens des Modells nicht)."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', text or '')).strip()
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """
+    Persistenter Cache: (Modell, Normalisierungs-Version, Hash des Textes) -> Vektor (float32).
+    """
+
+    def __init__(self, db_file=EMBEDDING_CACHE_FILE):
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model        TEXT,
+                norm_version INTEGER,
+                text_hash    TEXT,
+                dim          INTEGER,
+                vector       BLOB,
+                PRIMARY KEY (model, norm_version, text_hash)
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, model_name, hashes):
+        """Dictionary Hash -> Vektor für alle gefundenen Hashes."""
+        found = {}
+        hashes = list(hashes)
+        for i in range(0, len(hashes), LOOKUP_CHUNK):
+            chunk = hashes[i:i + LOOKUP_CHUNK]
+            rows = self.conn.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND norm_version = ? "
+                f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                [model_name, NORMALIZATION_VERSION, *chunk]
+            )
+            for hash_value, vector in rows:
+                found[hash_value] = np.frombuffer(vector, dtype=np.float32)
+        return found
+
+    def put_many(self, model_name, items):
+        """Speichert (Hash, Vektor)-Paare."""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)",
+            [(model_name, NORMALIZATION_VERSION, hash_value, len(vector),
+              np.asarray(vector, dtype=np.float32).tobytes()) for hash_value, vector in items]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+class CachedEncoder:
+    """
+    Kodiert Texte mit einem SentenceTransformer, schlägt aber vorher jeden Text im Cache nach.
+    Nur die Fehltreffer werden (gebündelt) kodiert und zurückgeschrieben. Das Modell wird erst
+    geladen, wenn es tatsächlich etwas zu kodieren gibt. `verbose=False` unterdrückt die
+    Trefferausgabe pro Aufruf (z.B. im Abfrage-Dienst).
+    """
+
+    def __init__(self, model_name, db_file=EMBEDDING_CACHE_FILE, verbose=True):
+        self.model_name = model_name
+        self.verbose = verbose
+        self.cache = EmbeddingCache(db_file)
+        self._model = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, texts, batch_size=128, show_progress_bar=True):
+        """Gibt eine Matrix (Anzahl Texte x Dimension, float32) in der Reihenfolge von `texts` zurück."""
+        normalized = [normalize_text(text) for text in texts]
+        hashes = [text_hash(text) for text in normalized]
+        vectors = self.cache.get_many(self.model_name, set(hashes))
+
+        # Jeder fehlende Text wird nur einmal kodiert, auch wenn er mehrfach vorkommt
+        missing = {}
+        for hash_value, text in zip(hashes, normalized):
+            if hash_value not in vectors:
+                missing.setdefault(hash_value, text)
+        self.hits += len(hashes) - sum(hash_value not in vectors for hash_value in hashes)
+        self.misses += len(missing)
+        if self.verbose:
+            print(f"Embedding-Cache: {len(hashes) - len(missing)} Treffer, {len(missing)} neu zu kodieren.")
+
+        if missing:
+            encoded = self.model.encode(list(missing.values()), batch_size=batch_size,
+                                        convert_to_numpy=True, show_progress_bar=show_progress_bar)
+            new_items = list(zip(missing.keys(), encoded.astype(np.float32)))
+            self.cache.put_many(self.model_name, new_items)
+            vectors.update(new_items)
+
+        if not hashes:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([vectors[hash_value] for hash_value in hashes])
+
+    def close(self):
+        self.cache.close()
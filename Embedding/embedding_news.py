@@ -1,31 +1,45 @@
-from sentence_transformers import SentenceTransformer
-import csv
-import json
+import os
+import sys
 
+# Partitionierter News-Speicher aus dem Sandbox-Ordner
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DataScience_Sandbox'))
+from news_store import NewsStore
+from embedding_cache import CachedEncoder
+from lexical_index import LEXICAL_INDEX_DIR, LexicalIndex, documents_from_records
+from vector_store import NEWS_VECTOR_STORE, append_new
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
 
-def load_data():
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Bereits kodierte Texte kommen aus dem Embedding-Cache, nur neue werden kodiert
+encoder = CachedEncoder(MODEL_NAME)
+
+def load_data(tickers=None, start=None, end=None):
+   # Nur die benötigten Spalten und Partitionen (Ticker, Zeitraum) werden gelesen
+   df_news = NewsStore().read(tickers=tickers, start=start, end=end,
+                              columns=["company_name", "ticker", "title", "description", "published_at", "source_name"])
+   df_news[["title", "description", "source_name"]] = df_news[["title", "description", "source_name"]].fillna("")
+   # Fehlende Zeitpunkte als None, damit sie im Vektor-Speicher als null landen
+   df_news["published_at"] = df_news["published_at"].astype(object).where(df_news["published_at"].notna(), None)
    news = []
-   with open("DataScience/DataScience_Sandbox/gesammelte_nasdaq_news_doublekey.csv", newline='', encoding='utf-8') as csvfile:
-      reader = csv.DictReader(csvfile)
-      for row in reader:
-         news.append({
-            "name": row["company_name"],
-            "ticker": row["ticker"],
-            "title": row["title"],
-            "description": row["description"]
-         })
+   for row in df_news.to_dict("records"):
+      news.append({
+         "name": row["company_name"],
+         "ticker": row["ticker"],
+         "title": row["title"],
+         "description": row["description"],
+         "published_at": row["published_at"],
+         "source_name": row["source_name"]
+      })
    return (news)
 
 def get_embedding(text):
-    embeddings = model.encode(
+    embeddings = encoder.encode(
         text,
         batch_size=128,
-        convert_to_numpy=True,
         show_progress_bar=True
-    )    
-    return embeddings 
+    )
+    return embeddings
 
 news = load_data()
 
@@ -33,27 +47,9 @@ combined_texts = [f"{company['title']} [SEP] {company['description']}" for compa
 
 embeddings = get_embedding(combined_texts)
 
-# Embeddings den News zuordnen
-for i, company in enumerate(news):
-    if hasattr(embeddings[i], "tolist"):
-        company["embedding"] = embeddings[i].tolist()
-    else:
-        company["embedding"] = embeddings[i]
-
-fields = ["name","ticker","text","embedding"]
-
-csv_file_path = 'DataScience/Embedding/data/nasdaq100_embedding.csv'
-
-with open(csv_file_path, mode='w', newline='', encoding='utf-8') as file:
-    writer = csv.DictWriter(file, fieldnames=fields)
-    writer.writeheader()
-    for company in news:
-        row = {
-            "name": company["name"],
-            "ticker": company["ticker"],
-            "text": company["title"],
-            "embedding": json.dumps(company["embedding"])
-        }
-        writer.writerow(row)
-
-print(f"CSV file '{csv_file_path}' created successfully.")
+# Vektoren binär speichern (vector_store.py); nur neue Einträge werden angehängt
+append_new(NEWS_VECTOR_STORE, news, embeddings, "title", "news", MODEL_NAME,
+           extra_columns=["published_at", "source_name"])
+
+# Dieselben News in den BM25-Index (lexical_index.py) für die hybride Suche
+LexicalIndex(LEXICAL_INDEX_DIR).add(documents_from_records(news, "title", "news", ["title", "description"]))
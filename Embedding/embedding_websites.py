@@ -1,9 +1,14 @@
-from sentence_transformers import SentenceTransformer
 import csv
-import json
 
+from embedding_cache import CachedEncoder
+from lexical_index import LEXICAL_INDEX_DIR, LexicalIndex, documents_from_records
+from vector_store import WEB_VECTOR_STORE, append_new
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# Bereits kodierte Texte kommen aus dem Embedding-Cache, nur neue werden kodiert
+encoder = CachedEncoder(MODEL_NAME)
 
 def load_data():
    news = []
@@ -18,41 +23,21 @@ def load_data():
    return (news)
 
 def get_embedding(text):
-    embeddings = model.encode(
+    embeddings = encoder.encode(
         text,
         batch_size=128,
-        convert_to_numpy=True,
         show_progress_bar=True
-    )    
-    return embeddings 
+    )
+    return embeddings
 
 news = load_data()
 
-texts = [f"{company["raw"]}" for company in news]
+texts = [f"{company['raw']}" for company in news]
 
 embeddings = get_embedding(texts)
 
-# Embeddings den News zuordnen
-for i, company in enumerate(news):
-    if hasattr(embeddings[i], "tolist"):
-        company["embedding"] = embeddings[i].tolist()
-    else:
-        company["embedding"] = embeddings[i]
-
-fields = ["name","ticker","text","embedding"]
-
-csv_file_path = 'DataScience/Embeddding/data/nasdaq100_embeddingWeb.csv'
-
-with open(csv_file_path, mode='w', newline='', encoding='utf-8') as file:
-    writer = csv.DictWriter(file, fieldnames=fields)
-    writer.writeheader()
-    for company in news:
-        row = {
-            "name": company["name"],
-            "ticker": company["ticker"],
-            "text": company["raw"],
-            "embedding": json.dumps(company["embedding"])
-        }
-        writer.writerow(row)
-
-print(f"CSV file '{csv_file_path}' created successfully.")
+# Vektoren binär speichern (vector_store.py); nur neue Einträge werden angehängt
+append_new(WEB_VECTOR_STORE, news, embeddings, "raw", "web", MODEL_NAME)
+
+# Dieselben Seiten in den BM25-Index (lexical_index.py) für die hybride Suche
+LexicalIndex(LEXICAL_INDEX_DIR).add(documents_from_records(news, "raw", "web"))
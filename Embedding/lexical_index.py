@@ -0,0 +1,505 @@
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from ann_index import DEFAULT_NPROBE
+from embedding_cache import normalize_text, text_hash
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+LEXICAL_INDEX_DIR = "DataScience/Embedding/data/lexical_index"
+CRAWLED_DATA_DIR = "DataScience/crawled_company_data"
+
+# BM25-Parameter (übliche Standardwerte)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal Rank Fusion: Score = Summe 1 / (RRF_K + Rang)
+RRF_K = 60
+
+# Jedes Hinzufügen schreibt ein neues Segment; ab so vielen werden alle zusammengeführt
+MAX_SEGMENTS = 8
+
+# Wörter, Ticker und Zahlen (3.43, 1000); Tausender-Kommas werden vorher entfernt
+TOKEN_PATTERN = re.compile(r"\w+(?:[.']\w+)*")
+THOUSANDS_PATTERN = re.compile(r"(?<=\d),(?=\d{3})")
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+MAX_TOKEN_LENGTH = 40
+
+MANIFEST_FILE = 'manifest.json'
+SEGMENT_ARRAYS = ['term_offsets', 'doc_ids', 'tfs', 'pos_offsets', 'positions']
+
+# ==============================================================================
+# 2. TOKENISIERUNG UND SEGMENTE
+# ==============================================================================
+
+def tokenize(text):
+    """Kleingeschriebene Tokens in Textreihenfolge (gleiche Normalisierung wie der Embedding-Cache)."""
+    text = THOUSANDS_PATTERN.sub('', normalize_text(text).lower())
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_PATTERN.findall(text)]
+
+def document_key(ticker, text):
+    """Gleicher Schlüssel wie im Vektor-Speicher (Ticker + Hash des gespeicherten Textes)."""
+    return f"{ticker}:{text_hash(normalize_text(text))}"
+
+def _write_segment(path, terms, docs, positions):
+    """
+    Schreibt ein Segment aus flachen Arrays (ein Eintrag pro Token-Vorkommen):
+      terms.npy         sortierte Terme
+      term_offsets.npy  Postings von Term i: doc_ids/tfs[term_offsets[i]:term_offsets[i+1]]
+      doc_ids.npy       Dokument-IDs je Term aufsteigend
+      tfs.npy           Termhäufigkeit je Posting
+      pos_offsets.npy   Positionen von Posting j: positions[pos_offsets[j]:pos_offsets[j+1]]
+      positions.npy     Token-Positionen im Dokument
+    """
+    if len(terms) == 0:
+        # Nur Dokumente ohne Tokens (z.B. leere Überschrift): leeres Segment, die Dokumente selbst
+        # werden trotzdem mit Länge 0 geführt, damit die Dokument-IDs fortlaufend bleiben
+        arrays = {
+            'terms': np.empty(0, dtype=str),
+            'term_offsets': np.zeros(1, dtype=np.int64),
+            'doc_ids': np.empty(0, dtype=np.int32),
+            'tfs': np.empty(0, dtype=np.int32),
+            'pos_offsets': np.zeros(1, dtype=np.int64),
+            'positions': np.empty(0, dtype=np.int32),
+        }
+    else:
+        keys, codes = np.unique(np.asarray(terms, dtype=str), return_inverse=True)
+        docs, positions = np.asarray(docs, dtype=np.int64), np.asarray(positions, dtype=np.int64)
+        order = np.lexsort((positions, docs, codes))
+        codes, docs, positions = codes[order], docs[order], positions[order]
+
+        # Ein Posting pro (Term, Dokument)
+        starts = np.flatnonzero(np.concatenate([[True], (codes[1:] != codes[:-1]) | (docs[1:] != docs[:-1])]))
+        tfs = np.diff(np.append(starts, len(codes)))
+        posting_codes = codes[starts]
+        arrays = {
+            'terms': keys,
+            'term_offsets': np.concatenate([[0], np.cumsum(np.bincount(posting_codes, minlength=len(keys)))]),
+            'doc_ids': docs[starts].astype(np.int32),
+            'tfs': tfs.astype(np.int32),
+            'pos_offsets': np.concatenate([[0], np.cumsum(tfs)]),
+            'positions': positions.astype(np.int32),
+        }
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + '.npy'), array)
+
+class Segment:
+    """Ein unveränderliches Segment; die Postings bleiben per Memory-Mapping auf der Platte."""
+
+    def __init__(self, path):
+        self.path = path
+        self.terms = np.load(os.path.join(path, 'terms.npy'))
+        self.lookup = {term: i for i, term in enumerate(self.terms.tolist())}
+        for name in SEGMENT_ARRAYS:
+            setattr(self, name, np.load(os.path.join(path, name + '.npy'), mmap_mode='r'))
+
+    def postings(self, term):
+        """Bereich (Anfang, Ende) der Postings eines Terms oder None."""
+        i = self.lookup.get(term)
+        if i is None:
+            return None
+        return int(self.term_offsets[i]), int(self.term_offsets[i + 1])
+
+    def occurrences(self, term):
+        """Alle Vorkommen eines Terms als Code Dokument * 2^32 + Position (aufsteigend)."""
+        bounds = self.postings(term)
+        if bounds is None:
+            return np.empty(0, dtype=np.int64)
+        first, last = bounds
+        docs = np.repeat(np.asarray(self.doc_ids[first:last], dtype=np.int64), self.tfs[first:last])
+        positions = self.positions[self.pos_offsets[first]:self.pos_offsets[last]]
+        return (docs << 32) + positions
+
+    def flat(self):
+        """Alle Token-Vorkommen als flache Arrays (zum Zusammenführen)."""
+        posting_terms = np.repeat(self.terms, np.diff(self.term_offsets))
+        return (np.repeat(posting_terms, self.tfs), np.repeat(np.asarray(self.doc_ids), self.tfs),
+                np.asarray(self.positions))
+
+# ==============================================================================
+# 3. INDEX
+# ==============================================================================
+
+class LexicalIndex:
+    """
+    Invertierter Index mit BM25-Bewertung und Positionen (für Phrasen in Anführungszeichen)
+    über News und gecrawlte Firmenseiten, inkrementell in Segmenten auf der Platte:
+      manifest.json     Segmente, Anzahl Dokumente, Summe der Dokumentlängen
+      seg-NNNNN/        Postings eines Hinzufüge-Schritts (siehe _write_segment)
+      seg-NNNNN.arrow   Dokumente des Segments (key, source, ticker, name, title, length)
+
+    Ein neues Segment wird vollständig geschrieben, bevor das Manifest (atomar) darauf zeigt.
+    Die Term-Wörterbücher liegen im Speicher, die Postings werden nur eingeblendet.
+    """
+
+    def __init__(self, path=LEXICAL_INDEX_DIR):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'segments': [], 'docs': 0, 'total_length': 0, 'next_segment': 0}
+        self._load()
+
+    def _load(self):
+        self.segments = [Segment(os.path.join(self.path, name)) for name in self.manifest['segments']]
+        tables = [pa.ipc.open_file(pa.memory_map(os.path.join(self.path, name + '.arrow'))).read_all()
+                  for name in self.manifest['segments']]
+        self.documents = pa.concat_tables(tables) if tables else None
+        if self.documents is not None:
+            self.lengths = self.documents.column('length').to_numpy().astype(np.float32)
+            self.sources = self.documents.column('source').to_numpy(zero_copy_only=False)
+            self.tickers = self.documents.column('ticker').to_numpy(zero_copy_only=False)
+            self.keys = {key: doc for doc, key in enumerate(self.documents.column('key').to_pylist())}
+        else:
+            self.lengths = np.empty(0, dtype=np.float32)
+            self.sources = self.tickers = np.empty(0, dtype=object)
+            self.keys = {}
+
+    def __len__(self):
+        return self.manifest['docs']
+
+    def _write_manifest(self):
+        tmp_path = os.path.join(self.path, MANIFEST_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST_FILE))
+
+    def _new_segment_name(self):
+        name = f"seg-{self.manifest['next_segment']:05d}"
+        self.manifest['next_segment'] += 1
+        return name
+
+    def _write_documents(self, name, table):
+        with pa.OSFile(os.path.join(self.path, name + '.arrow'), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    # ------------------------------------------------------------------
+    # Schreiben
+    # ------------------------------------------------------------------
+
+    def add(self, documents):
+        """
+        Fügt Dokumente (Dictionaries mit key, source, ticker, name, title, text) hinzu.
+        Bereits indexierte Schlüssel werden übersprungen. Gibt die Anzahl neuer Dokumente zurück.
+        """
+        new, seen = [], set()
+        for document in documents:
+            if document['key'] not in self.keys and document['key'] not in seen:
+                seen.add(document['key'])
+                new.append(document)
+        if not new:
+            return 0
+
+        first_doc = len(self)
+        terms, docs, positions, lengths = [], [], [], []
+        for doc, document in enumerate(new, first_doc):
+            tokens = tokenize(document['text'])
+            terms.extend(tokens)
+            docs.extend([doc] * len(tokens))
+            positions.extend(range(len(tokens)))
+            lengths.append(len(tokens))
+
+        os.makedirs(self.path, exist_ok=True)
+        name = self._new_segment_name()
+        _write_segment(os.path.join(self.path, name), terms, docs, positions)
+        self._write_documents(name, pa.table({
+            'key': [document['key'] for document in new],
+            'source': [document['source'] for document in new],
+            'ticker': [document['ticker'] for document in new],
+            'name': [document['name'] for document in new],
+            'title': [document['title'] for document in new],
+            'length': np.array(lengths, dtype=np.int32),
+        }))
+        self.manifest['segments'].append(name)
+        self.manifest['docs'] += len(new)
+        self.manifest['total_length'] += int(sum(lengths))
+        self._write_manifest()
+        self._load()
+
+        if len(self.segments) > MAX_SEGMENTS:
+            self.merge()
+        return len(new)
+
+    def merge(self):
+        """Führt alle Segmente zu einem zusammen (Dokument-IDs bleiben gleich)."""
+        if len(self.segments) < 2:
+            return
+        flats = [segment.flat() for segment in self.segments]
+        name = self._new_segment_name()
+        _write_segment(os.path.join(self.path, name), *(np.concatenate(parts) for parts in zip(*flats)))
+        self._write_documents(name, self.documents)
+        old_segments = self.manifest['segments']
+        self.manifest['segments'] = [name]
+        self._write_manifest()
+        self.segments = []
+        for old_name in old_segments:
+            shutil.rmtree(os.path.join(self.path, old_name), ignore_errors=True)
+            os.remove(os.path.join(self.path, old_name + '.arrow'))
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Suche
+    # ------------------------------------------------------------------
+
+    def document(self, doc):
+        return {name: self.documents.column(name)[doc].as_py() for name in self.documents.column_names}
+
+    def phrase_docs(self, tokens):
+        """Dokumente, in denen die Tokens direkt hintereinander vorkommen (über die Positionen)."""
+        matches = []
+        for segment in self.segments:
+            # Vorkommen von Token i um i Positionen zurückschieben: Treffer sind gemeinsame Codes
+            starts = segment.occurrences(tokens[0])
+            for offset, token in enumerate(tokens[1:], 1):
+                if not len(starts):
+                    break
+                starts = np.intersect1d(starts, segment.occurrences(token) - offset, assume_unique=True)
+            matches.append(np.unique(starts >> 32))
+        return np.concatenate(matches) if matches else np.empty(0, dtype=np.int64)
+
+    def search(self, query, k=10, source=None, tickers=None):
+        """
+        BM25-Suche. Phrasen in Anführungszeichen müssen wörtlich vorkommen.
+        `source` ('news' oder 'web') und `tickers` schränken die Treffer ein.
+        Gibt (Scores, Dokument-IDs) absteigend sortiert zurück.
+        """
+        phrases = [tokenize(phrase) for phrase in PHRASE_PATTERN.findall(query)]
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not len(self):
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        n_docs = len(self)
+        avg_length = self.manifest['total_length'] / max(1, n_docs)
+        all_ids, all_scores = [], []
+        for term in terms:
+            parts = [(segment, bounds) for segment in self.segments
+                     if (bounds := segment.postings(term)) is not None]
+            df = sum(last - first for _, (first, last) in parts)
+            if not df:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for segment, (first, last) in parts:
+                ids = np.asarray(segment.doc_ids[first:last], dtype=np.int64)
+                tfs = np.asarray(segment.tfs[first:last], dtype=np.float32)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[ids] / avg_length)
+                all_ids.append(ids)
+                all_scores.append(idf * tfs * (BM25_K1 + 1) / (tfs + norm))
+        if not all_ids:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        # Scores pro Dokument aufsummieren (nur über die getroffenen Dokumente)
+        docs, inverse = np.unique(np.concatenate(all_ids), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(all_scores)).astype(np.float32)
+
+        keep = np.ones(len(docs), dtype=bool)
+        if source is not None:
+            keep &= self.sources[docs] == source
+        if tickers is not None:
+            keep &= np.isin(self.tickers[docs], list(tickers))
+        docs, scores = docs[keep], scores[keep]
+        for tokens in phrases:
+            if len(tokens) > 1:
+                matched = np.isin(docs, self.phrase_docs(tokens))
+                docs, scores = docs[matched], scores[matched]
+
+        if len(docs) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            docs, scores = docs[best], scores[best]
+        order = np.argsort(-scores, kind='stable')
+        return scores[order], docs[order]
+
+# ==============================================================================
+# 4. DOKUMENTE AUS NEWS UND GECRAWLTEN SEITEN
+# ==============================================================================
+
+def documents_from_records(records, text_key, source, index_keys=None):
+    """
+    Dokumente aus den Dictionaries der Embedding-Skripte (name, ticker, ...). Der Schlüssel
+    entspricht dem Eintrag im Vektor-Speicher (gleicher `text_key`), indexiert werden die
+    Felder `index_keys` (Standard: nur `text_key`).
+    """
+    return [{
+        'key': document_key(record['ticker'], record[text_key]),
+        'source': source,
+        'ticker': record['ticker'],
+        'name': record['name'],
+        'title': (record[text_key] or '')[:200],
+        'text': ' '.join(record[key] or '' for key in (index_keys or [text_key])),
+    } for record in records]
+
+def load_news_records(tickers=None, start=None, end=None):
+    """News aus dem NewsStore im Format von embedding_news.load_data()."""
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DataScience_Sandbox'))
+    from news_store import NewsStore
+
+    df_news = NewsStore().read(tickers=tickers, start=start, end=end,
+                               columns=["company_name", "ticker", "title", "description"]).fillna("")
+    return [{"name": row["company_name"], "ticker": row["ticker"], "title": row["title"],
+             "description": row["description"]} for row in df_news.to_dict("records")]
+
+def load_web_records(folder=CRAWLED_DATA_DIR):
+    """Gecrawlte Seiten (crawled_company_data/*.json) im Format von embedding_websites.load_data()."""
+    records = []
+    for path in sorted(glob.glob(os.path.join(folder, '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for page in [data] if isinstance(data, dict) else data:
+            records.append({"name": page["Company"], "ticker": page["Ticker"], "raw": page["Raw_Text"]})
+    return records
+
+def update_index(path=LEXICAL_INDEX_DIR, crawled_dir=CRAWLED_DATA_DIR):
+    """Nimmt alle neuen News und gecrawlten Seiten in den Index auf."""
+    index = LexicalIndex(path)
+    added_news = index.add(documents_from_records(load_news_records(), "title", "news", ["title", "description"]))
+    added_web = index.add(documents_from_records(load_web_records(crawled_dir), "raw", "web"))
+    print(f"Lexikalischer Index '{path}': {added_news} neue News, {added_web} neue Seiten, "
+          f"insgesamt {len(index)} Dokumente in {len(index.segments)} Segment(en).")
+    return index
+
+# ==============================================================================
+# 5. HYBRIDE SUCHE (BM25 + EMBEDDINGS)
+# ==============================================================================
+
+def store_keys(store):
+    """Dokument-Schlüssel -> Zeile im Vektor-Speicher."""
+    return {f"{ticker}:{hash_value}": row for row, (ticker, hash_value)
+            in enumerate(zip(store.column('ticker'), store.column('text_hash')))}
+
+def hybrid_search(query, query_vector, lexical, store, index, k=10, candidates=50, nprobe=DEFAULT_NPROBE,
+                  source=None, keys=None, filters=None, require_row=False, **filter_args):
+    """
+    Verbindet BM25-Treffer und Embedding-Treffer per Reciprocal Rank Fusion. Beide Listen
+    (je `candidates` lang) werden über den gemeinsamen Schlüssel (Ticker + Text-Hash)
+    zusammengeführt. Gibt eine Liste von Dictionaries (key, score, lexical_rank, vector_rank,
+    row, doc) zurück; row/doc ist -1, wenn der Treffer nur in einer der beiden Quellen liegt.
+    `keys` (von store_keys) kann zwischen Anfragen wiederverwendet werden.
+
+    Metadaten-Filter (`filter_args` wie bei vector_filters.filtered_search: tickers, industries,
+    sources, start, end) gelten für beide Listen; BM25-Treffer ohne Zeile im Vektor-Speicher
+    fallen dann weg, weil ihre Metadaten nicht bekannt sind. `require_row=True` verwirft
+    solche Treffer auch ohne Filter, bevor auf `k` gekürzt wird.
+    """
+    from vector_filters import FilterIndex, filtered_search
+
+    keys = keys if keys is not None else store_keys(store)
+    filter_args = {name: value for name, value in filter_args.items() if value is not None}
+    if filter_args:
+        filters = filters or FilterIndex(store)
+        allowed = np.zeros(len(store), dtype=bool)
+        allowed[filters.candidates(**filter_args)] = True
+        tickers = filter_args.get('tickers')
+        # Alle BM25-Treffer holen und filtern, damit nach dem Filter genug Kandidaten bleiben
+        _, docs = lexical.search(query, max(1, len(lexical)), source=source,
+                                 tickers=[tickers] if isinstance(tickers, str) else tickers)
+        doc_rows = np.array([keys.get(key, -1) for key in lexical.documents.column('key').take(docs).to_pylist()],
+                            dtype=np.int64)
+        keep = doc_rows >= 0
+        keep[keep] = allowed[doc_rows[keep]]
+        docs = docs[keep][:candidates].tolist()
+        _, rows = filtered_search(store, index, query_vector, candidates, nprobe, filters, **filter_args)
+    else:
+        _, docs = lexical.search(query, candidates, source=source)
+        docs = docs.tolist()
+        _, rows = index.search(query_vector, candidates, nprobe)
+
+    fused = {}
+    for rank, doc in enumerate(docs, 1):
+        key = lexical.documents.column('key')[doc].as_py()
+        entry = fused.setdefault(key, {'key': key, 'score': 0.0, 'lexical_rank': None, 'vector_rank': None,
+                                       'row': keys.get(key, -1), 'doc': doc})
+        entry['score'] += 1 / (RRF_K + rank)
+        entry['lexical_rank'] = rank
+    for rank, row in enumerate(rows[0].tolist(), 1):
+        if row < 0:
+            break
+        key = f"{store.metadata.column('ticker')[row].as_py()}:{store.metadata.column('text_hash')[row].as_py()}"
+        entry = fused.setdefault(key, {'key': key, 'score': 0.0, 'lexical_rank': None, 'vector_rank': None,
+                                       'row': row, 'doc': lexical.keys.get(key, -1)})
+        entry['score'] += 1 / (RRF_K + rank)
+        entry['vector_rank'] = rank
+    results = sorted(fused.values(), key=lambda entry: -entry['score'])
+    if require_row:
+        results = [entry for entry in results if entry['row'] >= 0]
+    return results[:k]
+
+def benchmark(index, queries=1000, terms_per_query=(1, 2, 3), seed=0):
+    """Latenz der BM25-Suche für zufällige Anfragen aus dem Vokabular."""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.concatenate([segment.terms for segment in index.segments])
+    for n_terms in terms_per_query:
+        texts = [' '.join(rng.choice(vocabulary, n_terms)) for _ in range(queries)]
+        start = time.perf_counter()
+        for text in texts:
+            index.search(text, 10)
+        latency_ms = (time.perf_counter() - start) * 1000 / queries
+        print(f"{n_terms} Term(e): {latency_ms:.3f} ms/Anfrage")
+
+def self_check():
+    """
+    Regressionsprüfung in einem temporären Ordner: ein Hinzufüge-Schritt, in dem kein Dokument
+    Tokens hat, muss ein leeres Segment schreiben und die Dokument-IDs fortlaufend halten.
+    """
+    def documents(texts, offset=0):
+        return [{'key': f'TEST:{offset + i}', 'source': 'news', 'ticker': 'TEST', 'name': 'Test',
+                 'title': text, 'text': text} for i, text in enumerate(texts)]
+
+    with tempfile.TemporaryDirectory() as path:
+        index = LexicalIndex(path)
+        assert index.add(documents(['', '  '])) == 2
+        assert len(index) == 2 and index.manifest['total_length'] == 0
+        assert len(index.search('anything', 10)[1]) == 0
+        assert index.add(documents(['Apple reports record revenue'], offset=2)) == 1
+        scores, docs = index.search('"record revenue"', 10)
+        assert list(docs) == [2] and index.document(2)['key'] == 'TEST:2'
+        index.merge()
+        assert list(index.search('apple', 10)[1]) == [2] and len(LexicalIndex(path)) == 3
+    print("Selbsttest erfolgreich.")
+
+# ==============================================================================
+# 6. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BM25-Index über News und gecrawlte Firmenseiten.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('update', help="Neue News und Seiten indexieren")
+    subparsers.add_parser('merge', help="Alle Segmente zusammenführen")
+    subparsers.add_parser('benchmark', help="Latenz der Suche messen")
+    subparsers.add_parser('check', help="Selbsttest (u.a. Hinzufügen von Dokumenten ohne Tokens)")
+    search_parser = subparsers.add_parser('search', help="Suchen (Phrasen in Anführungszeichen)")
+    search_parser.add_argument('query')
+    search_parser.add_argument('--k', type=int, default=10)
+    search_parser.add_argument('--source', choices=['news', 'web'], default=None)
+    parser.add_argument('--index', default=LEXICAL_INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'update':
+        update_index(args.index)
+    elif args.command == 'merge':
+        LexicalIndex(args.index).merge()
+    elif args.command == 'check':
+        self_check()
+    elif args.command == 'benchmark':
+        benchmark(LexicalIndex(args.index))
+    else:
+        lexical_index = LexicalIndex(args.index)
+        for score, doc in zip(*lexical_index.search(args.query, args.k, source=args.source)):
+            document = lexical_index.document(doc)
+            print(f"{score:7.3f}  {document['ticker']:<6} [{document['source']}] {document['title'][:100]}")
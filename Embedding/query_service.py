@@ -0,0 +1,461 @@
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+import urllib.request
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+import numpy as np
+
+from ann_index import DEFAULT_NPROBE, open_index
+from embedding_cache import CachedEncoder
+from lexical_index import LEXICAL_INDEX_DIR, MANIFEST_FILE, LexicalIndex, hybrid_search, store_keys
+from vector_filters import FilterIndex, filtered_search
+from vector_store import NEWS_VECTOR_STORE, WEB_VECTOR_STORE, VectorStore
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+DEFAULT_PORT = 8766
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+STORES = {'news': NEWS_VECTOR_STORE, 'web': WEB_VECTOR_STORE}
+
+# Micro-Batching: eine Anfrage wartet höchstens so lange auf weitere, die mit ihr gebündelt werden
+MAX_BATCH_SIZE = 64
+MAX_BATCH_WAIT = 0.002
+
+REQUEST_TIMEOUT = 30
+MAX_K = 100
+SNIPPET_LENGTH = 300
+
+# Grenzen der Latenz-Buckets in Millisekunden (logarithmisch, 0.1 ms bis 10 s)
+LATENCY_BUCKETS_MS = [0.1 * 2 ** i for i in range(18)]
+
+# ==============================================================================
+# 2. LATENZ-HISTOGRAMME UND MICRO-BATCHING
+# ==============================================================================
+
+class LatencyHistogram:
+    """Thread-sicheres Histogramm über logarithmische Buckets mit Perzentilen."""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = np.asarray(buckets_ms)
+        self.counts = np.zeros(len(buckets_ms) + 1, dtype=np.int64)
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        milliseconds = seconds * 1000
+        with self._lock:
+            self.counts[np.searchsorted(self.buckets_ms, milliseconds)] += 1
+            self.total_ms += milliseconds
+
+    def percentile(self, p, counts):
+        """Obergrenze des Buckets, in dem das p-Perzentil liegt."""
+        rank = int(np.searchsorted(np.cumsum(counts), p / 100 * counts.sum()))
+        return float(self.buckets_ms[rank]) if rank < len(self.buckets_ms) else float('inf')
+
+    def snapshot(self):
+        with self._lock:
+            counts, total_ms = self.counts.copy(), self.total_ms
+        count = int(counts.sum())
+        if not count:
+            return {'count': 0}
+        labels = [f"<={bound:g}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]:g}ms"]
+        return {
+            'count': count,
+            'mean_ms': total_ms / count,
+            **{f'p{p}_ms': self.percentile(p, counts) for p in (50, 90, 99)},
+            'buckets': {label: int(n) for label, n in zip(labels, counts) if n},
+        }
+
+class MicroBatcher:
+    """
+    Bündelt gleichzeitige Aufrufe: Anfragen landen in einer Warteschlange, ein Worker-Thread
+    nimmt die erste und sammelt bis zu `max_batch` weitere (höchstens `max_wait` Sekunden)
+    und ruft `handler(items)` einmal für alle auf. `handler` gibt eine Liste von Ergebnissen
+    in derselben Reihenfolge zurück. Alle Aufrufe von `handler` laufen im selben Thread.
+    """
+
+    def __init__(self, handler, max_batch=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT, name='batcher'):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batch_sizes = Counter()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self.queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=REQUEST_TIMEOUT):
+        return self.submit(item).result(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            self.batch_sizes[len(batch)] += 1
+            items = [item for item, _ in batch]
+            try:
+                results = self.handler(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        sizes = dict(self.batch_sizes)
+        batches = sum(sizes.values())
+        return {'batches': batches, 'items': sum(size * n for size, n in sizes.items()),
+                'mean_batch_size': sum(size * n for size, n in sizes.items()) / max(1, batches),
+                'batch_sizes': dict(sorted(sizes.items()))}
+
+# ==============================================================================
+# 3. DIENST
+# ==============================================================================
+
+class Corpus:
+    """Ein Vektor-Speicher mit IVF-Index, Filtern und Schlüsseln für die hybride Suche."""
+
+    def __init__(self, source, path):
+        self.source = source
+        self.store = VectorStore(path)
+        self.index = open_index(self.store)
+        self.filters = FilterIndex(self.store)
+        self.keys = store_keys(self.store)
+
+class QueryService:
+    """
+    Hält Modell, Vektor-Speicher, IVF-Indizes und den BM25-Index geladen und beantwortet
+    Ähnlichkeitsanfragen. Kodierung und Index-Suche laufen je in einem MicroBatcher: gleichzeitige
+    Anfragen werden gemeinsam kodiert bzw. als ein Block von Vektoren gesucht.
+    """
+
+    def __init__(self, stores=STORES, model_name=MODEL_NAME, lexical_dir=LEXICAL_INDEX_DIR,
+                 max_batch=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT):
+        self.model_name = model_name
+        self.stores = stores
+        self.lexical_dir = lexical_dir
+        self.histograms = {}
+        self._histograms_lock = threading.Lock()
+        self.encoder = None
+        self.reload()
+        self.encode_batcher = MicroBatcher(self._encode_batch, max_batch, max_wait, name='encoder')
+        self.search_batcher = MicroBatcher(self._search_batch, max_batch, max_wait, name='search')
+        # Modell im Encoder-Thread laden (SQLite-Verbindung des Caches gehört diesem Thread)
+        self.encode_batcher("warm-up")
+
+    def reload(self):
+        """Öffnet Speicher und Indizes neu (z.B. nachdem die Embedding-Skripte Neues angehängt haben)."""
+        corpora = {}
+        for source, path in self.stores.items():
+            if len(VectorStore(path)):
+                corpora[source] = Corpus(source, path)
+        lexical = LexicalIndex(self.lexical_dir) \
+            if os.path.exists(os.path.join(self.lexical_dir, MANIFEST_FILE)) else None
+        # Referenzen werden in einem Schritt getauscht; laufende Batches behalten die alten
+        self.corpora, self.lexical = corpora, lexical
+        loaded = [f"{source} ({len(corpus.store)})" for source, corpus in corpora.items()]
+        if lexical:
+            loaded.append(f"BM25 ({len(lexical)})")
+        print(f"Geladen: {', '.join(loaded)}")
+
+    def observe(self, name, seconds):
+        with self._histograms_lock:
+            histogram = self.histograms.setdefault(name, LatencyHistogram())
+        histogram.record(seconds)
+
+    # ------------------------------------------------------------------
+    # Batch-Verarbeitung (Worker-Threads)
+    # ------------------------------------------------------------------
+
+    def _encode_batch(self, texts):
+        if self.encoder is None:
+            self.encoder = CachedEncoder(self.model_name, verbose=False)
+        start = time.perf_counter()
+        vectors = self.encoder.encode(texts, batch_size=len(texts), show_progress_bar=False)
+        self.observe('encode_batch', time.perf_counter() - start)
+        return list(vectors)
+
+    def _search_batch(self, requests):
+        start = time.perf_counter()
+        results = [None] * len(requests)
+        # Anfragen ohne Filter und ohne BM25 mit gleichen Parametern: ein Aufruf für alle Vektoren
+        groups = {}
+        for i, request in enumerate(requests):
+            if request['filters'] or request['hybrid']:
+                continue
+            groups.setdefault((request['corpus'], request['k'], request['nprobe']), []).append(i)
+        for (corpus, k, nprobe), members in groups.items():
+            scores, ids = corpus.index.search(np.vstack([requests[i]['vector'] for i in members]), k, nprobe)
+            for j, i in enumerate(members):
+                results[i] = (scores[j], ids[j])
+
+        for i, request in enumerate(requests):
+            if results[i] is not None:
+                continue
+            corpus = request['corpus']
+            try:
+                if request['hybrid']:
+                    results[i] = hybrid_search(request['text'], request['vector'], self.lexical, corpus.store,
+                                               corpus.index, request['k'], nprobe=request['nprobe'],
+                                               source=corpus.source, keys=corpus.keys, filters=corpus.filters,
+                                               require_row=True, **request['filters'])
+                else:
+                    scores, ids = filtered_search(corpus.store, corpus.index, request['vector'], request['k'],
+                                                  request['nprobe'], corpus.filters, **request['filters'])
+                    results[i] = (scores[0], ids[0])
+            except Exception as e:
+                results[i] = e
+        self.observe('search_batch', time.perf_counter() - start)
+        return results
+
+    # ------------------------------------------------------------------
+    # Anfragen
+    # ------------------------------------------------------------------
+
+    def _query_vector(self, params, corpus):
+        """Vektor der Anfrage: freier Text (`q`), eine Zeile (`row`) oder ein Ticker (Mittel seiner Zeilen)."""
+        if params.get('q'):
+            start = time.perf_counter()
+            vector = self.encode_batcher(params['q'])
+            self.observe('encode', time.perf_counter() - start)
+            return np.asarray(vector, dtype=np.float32)
+        if params.get('row') is not None:
+            return np.asarray(corpus.store.vectors[int(params['row'])], dtype=np.float32)
+        if params.get('ticker'):
+            rows = corpus.filters.posting('ticker', [params['ticker']])
+            if not len(rows):
+                raise KeyError(f"Ticker {params['ticker']} nicht im Speicher '{corpus.source}'")
+            return np.asarray(corpus.store.vectors[rows], dtype=np.float32).mean(axis=0)
+        raise ValueError("Eine der Angaben q, row oder ticker fehlt")
+
+    def _corpus(self, params, default):
+        source = params.get('source') or default
+        if source not in self.corpora:
+            raise KeyError(f"Unbekannter oder leerer Speicher: {source}")
+        return self.corpora[source]
+
+    def _search(self, params, corpus, k):
+        vector = self._query_vector(params, corpus)
+        filters = {name: params[name] for name in ('tickers', 'industries', 'sources', 'start', 'end')
+                   if params.get(name)}
+        hybrid = bool(params.get('hybrid')) and bool(params.get('q')) and self.lexical is not None
+        start = time.perf_counter()
+        result = self.search_batcher({
+            'corpus': corpus, 'vector': vector, 'k': k, 'nprobe': int(params.get('nprobe', DEFAULT_NPROBE)),
+            'filters': filters, 'hybrid': hybrid, 'text': params.get('q'),
+        })
+        self.observe('search', time.perf_counter() - start)
+        if hybrid:
+            # Treffer ohne Vektor hat hybrid_search (require_row) schon vor dem Kürzen auf k verworfen
+            return [(entry['score'], entry['row']) for entry in result]
+        scores, ids = result
+        return [(float(score), int(row)) for score, row in zip(scores, ids) if row >= 0]
+
+    @staticmethod
+    def _hit(corpus, score, row):
+        record = corpus.store.row(row)
+        record['text'] = record['text'][:SNIPPET_LENGTH]
+        record.pop('text_hash', None)
+        return {'score': round(float(score), 6), 'row': int(row), **record}
+
+    def similar(self, params):
+        """Ähnlichste Einträge (News oder Seiten) zu einem Text, einer Zeile oder einem Ticker."""
+        corpus = self._corpus(params, 'news')
+        k = min(int(params.get('k', 10)), MAX_K)
+        # Die Zeile selbst soll nicht als eigener Treffer erscheinen
+        exclude = int(params['row']) if params.get('row') is not None else None
+        hits = [(score, row) for score, row in self._search(params, corpus, k + (exclude is not None))
+                if row != exclude][:k]
+        return {'source': corpus.source, 'results': [self._hit(corpus, score, row) for score, row in hits]}
+
+    def companies(self, params):
+        """Ähnlichste Firmen: Treffer in den Firmenseiten, pro Ticker der beste."""
+        corpus = self._corpus(params, 'web')
+        k = min(int(params.get('k', 10)), MAX_K)
+        best = {}
+        for score, row in self._search(params, corpus, k * 5):
+            ticker = corpus.store.metadata.column('ticker')[row].as_py()
+            if ticker != params.get('ticker') and ticker not in best:
+                best[ticker] = (score, row)
+        return {'source': corpus.source,
+                'results': [self._hit(corpus, score, row) for score, row in list(best.values())[:k]]}
+
+    def stats(self):
+        with self._histograms_lock:
+            histograms = dict(self.histograms)
+        return {
+            'latency': {name: histogram.snapshot() for name, histogram in sorted(histograms.items())},
+            'batching': {'encoder': self.encode_batcher.stats(), 'search': self.search_batcher.stats()},
+            'corpora': {source: len(corpus.store) for source, corpus in self.corpora.items()},
+            'bm25_documents': len(self.lexical) if self.lexical else 0,
+        }
+
+# ==============================================================================
+# 4. HTTP (TCP ODER UNIX-SOCKET)
+# ==============================================================================
+
+LIST_PARAMS = ('tickers', 'industries', 'sources')
+
+def parse_params(query_string, body=None):
+    """Parameter aus Query-String und optionalem JSON-Body; Listen-Filter sind kommagetrennt."""
+    params = {name: values[-1] for name, values in parse_qs(query_string).items()}
+    if body:
+        params.update(json.loads(body))
+    for name in LIST_PARAMS:
+        if isinstance(params.get(name), str):
+            params[name] = [value.strip() for value in params[name].split(',') if value.strip()]
+    if isinstance(params.get('hybrid'), str):
+        params['hybrid'] = params['hybrid'].lower() in ('1', 'true', 'yes')
+    return params
+
+def make_handler(service):
+    routes = {'/similar': service.similar, '/companies': service.companies}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _respond(self, status, body):
+            payload = json.dumps(body, default=str, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _handle(self, body=None):
+            start = time.perf_counter()
+            parsed = urlparse(self.path)
+            try:
+                if parsed.path in routes:
+                    status, response = 200, routes[parsed.path](parse_params(parsed.query, body))
+                elif parsed.path == '/stats':
+                    status, response = 200, service.stats()
+                elif parsed.path == '/health':
+                    status, response = 200, {'status': 'ok'}
+                elif parsed.path == '/reload' and body is not None:
+                    service.reload()
+                    status, response = 200, service.stats()['corpora']
+                else:
+                    status, response = 404, {'error': f"Unbekannter Pfad: {parsed.path}"}
+            except (KeyError, ValueError, IndexError) as e:
+                status, response = 400, {'error': str(e)}
+            except Exception as e:
+                status, response = 500, {'error': f"{type(e).__name__}: {e}"}
+            self._respond(status, response)
+            service.observe(f"request {parsed.path}", time.perf_counter() - start)
+
+        def do_GET(self):
+            self._handle()
+
+        def do_POST(self):
+            self._handle(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+
+        def address_string(self):
+            # Über einen Unix-Socket gibt es keine Client-Adresse
+            return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+# Bei vielen gleichzeitigen Verbindungen läuft die Standard-Warteschlange (5) über; abgewiesene
+# Verbindungen kosten den Client dann eine Sekunde bis zum nächsten Versuch
+LISTEN_BACKLOG = 256
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    request_queue_size = LISTEN_BACKLOG
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = LISTEN_BACKLOG
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        super().server_bind()
+
+def start_service(service, port=DEFAULT_PORT, socket_path=None, host='127.0.0.1'):
+    """Startet den HTTP-Server in einem Hintergrund-Thread; beenden mit `server.shutdown()`."""
+    handler = make_handler(service)
+    server = ThreadingUnixHTTPServer(socket_path, handler) if socket_path \
+        else ServiceHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# ==============================================================================
+# 5. LASTTEST
+# ==============================================================================
+
+def benchmark(base_url, queries, path='/similar', source='news', requests=2000, concurrency=32):
+    """Schickt Anfragen parallel an einen laufenden Dienst und misst Durchsatz und Latenz."""
+    urls = [f"{base_url}{path}?source={source}&k=10&q={quote(queries[i % len(queries)])}" for i in range(requests)]
+    latencies = []
+
+    def fetch(url):
+        start = time.perf_counter()
+        with urllib.request.urlopen(url, timeout=REQUEST_TIMEOUT) as response:
+            response.read()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - start
+    latencies_ms = np.array(latencies) * 1000
+    print(f"{requests} Anfragen, {concurrency} parallel: {requests / elapsed:.0f} Anfragen/s, "
+          f"p50 {np.percentile(latencies_ms, 50):.1f} ms, p99 {np.percentile(latencies_ms, 99):.1f} ms")
+    return requests / elapsed
+
+# ==============================================================================
+# 6. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Abfrage-Dienst für ähnliche News und Firmen (Modell bleibt geladen).")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', default=None, help="Unix-Socket statt TCP-Port")
+    parser.add_argument('--model', default=MODEL_NAME)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_BATCH_WAIT * 1000)
+    parser.add_argument('--benchmark', default=None, metavar='URL',
+                        help="Statt zu starten einen laufenden Dienst (TCP) unter URL belasten")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark.rstrip('/'), ["Nvidia earnings", "iPhone sales", "cloud computing growth",
+                                               "semiconductor supply chain", "streaming subscribers"])
+    else:
+        query_service = QueryService(model_name=args.model, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+        http_server = start_service(query_service, args.port, args.socket)
+        where = args.socket or f"http://127.0.0.1:{args.port}"
+        print(f"Abfrage-Dienst läuft unter {where} (/similar, /companies, /stats; Strg+C zum Beenden)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            http_server.shutdown()
@@ -1,32 +1,75 @@
-import pandas as pd
 import numpy as np
-import json
-from sklearn.metrics.pairwise import cosine_similarity
+import pandas as pd
+
+from ann_index import DEFAULT_NPROBE, open_index
+from embedding_cache import CachedEncoder
+from lexical_index import LEXICAL_INDEX_DIR, LexicalIndex, hybrid_search
+from vector_filters import FilterIndex, filtered_search, load_industries
+from vector_store import NEWS_VECTOR_STORE, WEB_VECTOR_STORE, VectorStore
 
-# CSV einlesen
-df = pd.read_csv('DataScience/Embedding/data/nasdaq100_embeddingWeb.csv')
-#df = pd.read_csv('DataScience/Embedding/data/nasdaq100_embedding.csv')
+# Vektor-Speicher öffnen (Vektoren werden nur eingeblendet, nicht geparst)
+store = VectorStore(WEB_VECTOR_STORE)
+#store = VectorStore(NEWS_VECTOR_STORE)
 
-# Embeddings zurück in numpy Arrays konvertieren
-embeddings = np.array([json.loads(emb) for emb in df['embedding']])
+embeddings = store.vectors
+
+# Lokaler IVF-Index (wird beim ersten Mal aufgebaut, neue Einträge werden eingefügt)
+index = open_index(store)
 
 # Wähle eine bestimmte News aus (z.B. die erste)
 test_index = 3
-test_embedding = embeddings[test_index:test_index+1]
-
-print(f"Ausgewählte News: {df.iloc[test_index]['text']}\n")
-print(f"Company: {df.iloc[test_index]['name']} ({df.iloc[test_index]['ticker']})\n")
+test_embedding = np.asarray(embeddings[test_index:test_index+1], dtype=np.float32)
+test_row = store.row(test_index)
 
-# Ähnlichkeiten zu allen anderen berechnen
-similarities = cosine_similarity(test_embedding, embeddings)[0]
+print(f"Ausgewählte News: {test_row['text']}\n")
+print(f"Company: {test_row['name']} ({test_row['ticker']})\n")
 
-# Top 6 ähnlichste finden (inkl. sich selbst)
-top_indices = similarities.argsort()[-6:][::-1]
+# Top 6 ähnlichste im Index suchen (inkl. sich selbst); nprobe regelt Genauigkeit vs. Tempo
+scores, top_indices = index.search(test_embedding, k=6, nprobe=DEFAULT_NPROBE)
+scores, top_indices = scores[0], top_indices[0]
 
 print("Top 5 ähnlichste News:\n")
-for i, idx in enumerate(top_indices[1:], 1):  # [1:] um sich selbst zu überspringen
-    print(f"{i}. Similarity: {similarities[idx]:.4f}")
-    print(f"   Text: {df.iloc[idx]['text']}")
-    print(f"   Company: {df.iloc[idx]['name']} ({df.iloc[idx]['ticker']})")
+for i, (score, idx) in enumerate(zip(scores[1:], top_indices[1:]), 1):  # [1:] um sich selbst zu überspringen
+    if idx < 0:
+        break
+    row = store.row(idx)
+    print(f"{i}. Similarity: {score:.4f}")
+    print(f"   Text: {row['text']}")
+    print(f"   Company: {row['name']} ({row['ticker']})")
     print()
 
+# Gefilterte Suche: nur dieselbe Branche (bei News zusätzlich nur die letzten 30 Tage)
+filters = FilterIndex(store)
+industry = (load_industries().get(test_row['ticker']) or [None])[0]
+start = None
+if 'published_at' in store.metadata.column_names:
+    start = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=30)
+scores, top_indices = filtered_search(store, index, test_embedding, k=6, filters=filters,
+                                      industries=[industry], start=start)
+scores, top_indices = scores[0], top_indices[0]
+
+print(f"Top 5 ähnlichste in der Branche '{industry}':\n")
+for i, (score, idx) in enumerate(((s, j) for s, j in zip(scores, top_indices) if j != test_index), 1):
+    if idx < 0 or i > 5:
+        break
+    row = store.row(idx)
+    print(f"{i}. Similarity: {score:.4f}")
+    print(f"   Text: {row['text']}")
+    print(f"   Company: {row['name']} ({row['ticker']})")
+    print()
+
+# Hybride Suche: BM25 (exakte Ticker, Produktnamen, Zahlen) und Embeddings per Rank Fusion
+query = "Nvidia earnings"
+encoder = CachedEncoder(store.manifest['model'])
+lexical = LexicalIndex(LEXICAL_INDEX_DIR)
+query_embedding = encoder.encode([query], show_progress_bar=False)
+results = hybrid_search(query, query_embedding, lexical, store, index, k=5, source=test_row['source'])
+
+print(f"Top 5 hybrid für '{query}':\n")
+for i, result in enumerate(results, 1):
+    # Nur lexikalisch gefundene Dokumente liegen (noch) nicht im Vektor-Speicher
+    row = store.row(result['row']) if result['row'] >= 0 else lexical.document(result['doc'])
+    print(f"{i}. Score: {result['score']:.4f} (BM25-Rang {result['lexical_rank']}, Embedding-Rang {result['vector_rank']})")
+    print(f"   Text: {row.get('text', row.get('title'))}")
+    print(f"   Company: {row['name']} ({row['ticker']})")
+    print()
@@ -0,0 +1,189 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from ann_index import DEFAULT_NPROBE, normalize, top_k
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Quelle für das Feld Industry (Zuordnung über den Ticker)
+CONSTITUENTS_CSV = "DataScience/WikiNasdaq_100_constituents.csv"
+
+# Die Posting-Listen liegen neben den Vektoren im Speicher-Ordner
+FILTER_FILE = 'filters.npz'
+
+# Felder mit Posting-Listen (Wert -> sortierte Zeilen-IDs)
+POSTING_FIELDS = ['ticker', 'source_name', 'industry']
+
+# Bis zu so vielen Kandidaten wird exakt nur über die Kandidaten gerechnet; darüber wird der
+# IVF-Index mit Filtermaske durchsucht
+EXACT_SEARCH_LIMIT = 20000
+
+# ==============================================================================
+# 2. POSTING-LISTEN
+# ==============================================================================
+
+def _postings(values, rows=None):
+    """
+    Gruppiert Zeilen nach Wert: (Werte, Zeilen-IDs nach Wert sortiert, Offsets pro Wert).
+    Mit `rows` kann eine Zeile mehrere Werte haben (values[i] gehört zu Zeile rows[i]).
+    """
+    values = np.asarray([value if value is not None else '' for value in values], dtype=str)
+    rows = np.arange(len(values)) if rows is None else np.asarray(rows, dtype=np.int64)
+    keys, codes = np.unique(values, return_inverse=True)
+    order = rows[np.argsort(codes, kind='stable')].astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(keys)))]).astype(np.int64)
+    return keys, order, offsets
+
+def load_industries(constituents_csv=CONSTITUENTS_CSV):
+    """Dictionary Ticker -> Liste der Branchen (Industry ist in der Tabelle kommagetrennt)."""
+    df_nasdaq = pd.read_csv(constituents_csv)
+    return {ticker: [term.strip() for term in industry.split(',') if term.strip()]
+            for ticker, industry in zip(df_nasdaq['Ticker'], df_nasdaq['Industry'].fillna(''))}
+
+class FilterIndex:
+    """
+    Vorberechnete Filter für einen VectorStore: Posting-Listen für ticker, source_name und
+    industry (jede Branche des Tickers aus der Konstituenten-Tabelle) sowie die nach published_at
+    sortierten Zeilen für Zeitraum-Filter. Eine Anfrage schneidet die Listen (die kleinste
+    zuerst) und erhält die erlaubten Zeilen-IDs, bevor irgendein Vektor bewertet wird.
+
+    Die Listen werden in `filters.npz` gespeichert und neu aufgebaut, sobald der Speicher
+    gewachsen oder neu angelegt ist (andere store_id bzw. anderes Modell) oder sich die
+    Konstituenten-Tabelle geändert hat.
+    """
+
+    def __init__(self, store, constituents_csv=CONSTITUENTS_CSV):
+        self.store = store
+        self.constituents_csv = constituents_csv
+        path = os.path.join(store.path, FILTER_FILE)
+        csv_mtime = os.path.getmtime(constituents_csv) if os.path.exists(constituents_csv) else 0.0
+        source = np.array([store.store_id or '', store.manifest['model'] or ''])
+        self.arrays = None
+        if os.path.exists(path):
+            with np.load(path) as saved:
+                if 'source' in saved.files and np.array_equal(saved['source'], source) and \
+                        int(saved['rows']) == len(store) and float(saved['csv_mtime']) == csv_mtime:
+                    self.arrays = dict(saved)
+        if self.arrays is None:
+            self.arrays = self._build(csv_mtime)
+            self.arrays['source'] = source
+            tmp_path = path + '.tmp.npz'
+            np.savez(tmp_path, **self.arrays)
+            os.replace(tmp_path, path)
+        self.keys = {field: {key: i for i, key in enumerate(self.arrays[f'{field}_keys'])} for field in POSTING_FIELDS}
+
+    def _column(self, name):
+        if name in self.store.metadata.column_names:
+            return self.store.column(name)
+        return np.full(len(self.store), None, dtype=object)
+
+    def _build(self, csv_mtime):
+        tickers = self._column('ticker')
+        industries = load_industries(self.constituents_csv) if csv_mtime else {}
+        # Eine Zeile gehört zu allen Branchen ihres Tickers
+        industry_rows, industry_values = [], []
+        for row, ticker in enumerate(tickers):
+            for industry in industries.get(ticker, []):
+                industry_rows.append(row)
+                industry_values.append(industry)
+        columns = {
+            'ticker': (tickers, None),
+            'source_name': (self._column('source_name'), None),
+            'industry': (industry_values, industry_rows),
+        }
+        arrays = {'rows': np.array(len(self.store)), 'csv_mtime': np.array(csv_mtime)}
+        for field, (values, rows) in columns.items():
+            arrays[f'{field}_keys'], arrays[f'{field}_order'], arrays[f'{field}_offsets'] = _postings(values, rows)
+
+        if 'published_at' in self.store.metadata.column_names:
+            published = pd.to_datetime(pd.Series(self._column('published_at')), utc=True, errors='coerce')
+            seconds = published.to_numpy(dtype='datetime64[ns]').astype('datetime64[s]')
+        else:
+            seconds = np.full(len(self.store), np.datetime64('NaT'), dtype='datetime64[s]')
+        valid = np.flatnonzero(~np.isnat(seconds))
+        order = valid[np.argsort(seconds[valid], kind='stable')]
+        arrays['date_order'] = order.astype(np.int64)
+        arrays['date_sorted'] = seconds[order].astype(np.int64)
+        return arrays
+
+    def values(self, field):
+        """Alle vorkommenden Werte eines Feldes (z.B. zum Nachschlagen der Branchen)."""
+        return [key for key in self.arrays[f'{field}_keys'] if key]
+
+    def posting(self, field, values):
+        """Sortierte Zeilen-IDs, deren Feld einen der Werte hat."""
+        order, offsets = self.arrays[f'{field}_order'], self.arrays[f'{field}_offsets']
+        parts = [order[offsets[i]:offsets[i + 1]] for i in (self.keys[field].get(value) for value in values)
+                 if i is not None]
+        return np.unique(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def date_range(self, start=None, end=None):
+        """Sortierte Zeilen-IDs mit published_at in [start, end]."""
+        sorted_seconds = self.arrays['date_sorted']
+        first = np.searchsorted(sorted_seconds, _seconds(start)) if start is not None else 0
+        last = np.searchsorted(sorted_seconds, _seconds(end), side='right') if end is not None else len(sorted_seconds)
+        return np.sort(self.arrays['date_order'][first:last])
+
+    def candidates(self, tickers=None, industries=None, sources=None, start=None, end=None):
+        """
+        Erlaubte Zeilen-IDs für die Filter (Werte eines Feldes werden ODER-verknüpft, die
+        Felder UND-verknüpft). None, wenn kein Filter gesetzt ist.
+        """
+        postings = []
+        for field, values in (('ticker', tickers), ('industry', industries), ('source_name', sources)):
+            if values is not None:
+                postings.append(self.posting(field, [values] if isinstance(values, str) else values))
+        if start is not None or end is not None:
+            postings.append(self.date_range(start, end))
+        if not postings:
+            return None
+        postings.sort(key=len)
+        result = postings[0]
+        for posting in postings[1:]:
+            if len(result) == 0:
+                break
+            result = np.intersect1d(result, posting, assume_unique=True)
+        return result
+
+def _seconds(value):
+    timestamp = pd.Timestamp(value)
+    timestamp = timestamp.tz_localize('UTC') if timestamp.tzinfo is None else timestamp.tz_convert('UTC')
+    return timestamp.to_datetime64().astype('datetime64[s]').astype(np.int64)
+
+# ==============================================================================
+# 3. GEFILTERTE SUCHE
+# ==============================================================================
+
+def filtered_search(store, index, queries, k=10, nprobe=DEFAULT_NPROBE, filters=None, **filter_args):
+    """
+    Ähnlichkeitssuche mit Metadaten-Filtern (tickers, industries, sources, start, end).
+    Wenige Kandidaten werden direkt und exakt bewertet, viele über den IVF-Index mit einer
+    Filtermaske; je selektiver der Filter, desto weniger Vektoren werden angefasst.
+    Gibt wie IVFIndex.search (Scores, IDs) zurück.
+    """
+    filters = filters or FilterIndex(store)
+    candidates = filters.candidates(**filter_args)
+    if candidates is None:
+        return index.search(queries, k, nprobe)
+
+    if len(index.deleted):
+        candidates = np.setdiff1d(candidates, np.fromiter(index.deleted, dtype=np.int64), assume_unique=True)
+    queries = normalize(np.atleast_2d(queries))
+    if len(candidates) > EXACT_SEARCH_LIMIT:
+        allowed = np.zeros(len(store), dtype=bool)
+        allowed[candidates] = True
+        return index.search(queries, k, nprobe, allowed=allowed)
+
+    result_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    result_ids = np.full((len(queries), k), -1, dtype=np.int64)
+    if len(candidates):
+        all_scores = queries @ normalize(store.vectors[candidates]).T
+        for q, scores in enumerate(all_scores):
+            scores, ids = top_k(scores, candidates, k)
+            result_scores[q, :len(ids)] = scores
+            result_ids[q, :len(ids)] = ids
+    return result_scores, result_ids
@@ -0,0 +1,256 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pyarrow as pa
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+NEWS_VECTOR_STORE = "DataScience/Embedding/data/news_vectors"
+WEB_VECTOR_STORE = "DataScience/Embedding/data/web_vectors"
+
+# float16 halbiert den Speicher; für Ähnlichkeitssuche reicht die Genauigkeit
+DEFAULT_DTYPE = 'float16'
+
+MANIFEST_FILE = 'manifest.json'
+VECTORS_FILE = 'vectors.bin'
+TEXTS_FILE = 'texts.bin'
+
+# Aus den Zeilen abgeleitete Strukturen im Speicher-Ordner (IVF-Index aus ann_index.py samt
+# .tmp/.old, Filter aus vector_filters.py); beim Neuanlegen passen sie nicht mehr
+DERIVED_PREFIXES = ('ivf_index', 'filters.npz')
+
+# ==============================================================================
+# 2. SPEICHER
+# ==============================================================================
+
+class VectorStore:
+    """
+    Binärer Vektor-Speicher in einem Ordner:
+      vectors.bin      zusammenhängende Matrix (Zeilen x Dimension) im gewählten dtype
+      texts.bin        alle Texte hintereinander (UTF-8), adressiert über text_offset/text_length
+      metadata-N.arrow Metadaten-Spalten (Arrow IPC), Zeile i gehört zu Vektor i
+      manifest.json    Dimension, dtype, Anzahl Zeilen, Liste der Metadaten-Teile, Modell und eine
+                       Kennung (store_id), die sich bei jedem Neuanlegen ändert
+
+    Anhängen schreibt ans Dateiende und zuletzt das Manifest (atomar); was danach fehlt, gilt
+    als nicht geschrieben. Beim Öffnen wird nichts kopiert: Vektoren, Texte und Metadaten
+    werden per Memory-Mapping eingeblendet und erst bei Zugriff von der Platte geladen.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'dim': None, 'dtype': DEFAULT_DTYPE, 'count': 0, 'text_bytes': 0, 'parts': [],
+                             'model': None, 'store_id': uuid.uuid4().hex}
+        self._vectors = None
+        self._texts = None
+        self._metadata = None
+
+    @classmethod
+    def create(cls, path, dim, dtype=DEFAULT_DTYPE, model=None):
+        """Legt einen leeren Speicher an (ein vorhandener wird samt Index und Filtern ersetzt)."""
+        os.makedirs(path, exist_ok=True)
+        for file in os.listdir(path):
+            file_path = os.path.join(path, file)
+            if os.path.isdir(file_path):
+                if file.startswith(DERIVED_PREFIXES):
+                    shutil.rmtree(file_path)
+            elif file in (MANIFEST_FILE, VECTORS_FILE, TEXTS_FILE) or \
+                    file.startswith(('metadata-',) + DERIVED_PREFIXES):
+                os.remove(file_path)
+        store = cls(path)
+        store.manifest.update({'dim': int(dim), 'dtype': np.dtype(dtype).name, 'model': model,
+                               'store_id': uuid.uuid4().hex})
+        store._write_manifest()
+        return store
+
+    def __len__(self):
+        return self.manifest['count']
+
+    @property
+    def dim(self):
+        return self.manifest['dim']
+
+    @property
+    def store_id(self):
+        """Kennung des Speichers; abgeleitete Strukturen merken sie sich, um Neuanlagen zu erkennen."""
+        return self.manifest.get('store_id')
+
+    @property
+    def dtype(self):
+        return np.dtype(self.manifest['dtype'])
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _write_manifest(self):
+        tmp_path = self._file(MANIFEST_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._file(MANIFEST_FILE))
+        self._vectors = self._texts = self._metadata = None
+
+    # ------------------------------------------------------------------
+    # Schreiben
+    # ------------------------------------------------------------------
+
+    def append(self, vectors, texts, **columns):
+        """
+        Hängt Vektoren mit ihren Texten und Metadaten-Spalten (gleiche Länge) an.
+        Gibt die Zeilen-IDs der neuen Einträge zurück.
+        """
+        vectors = np.asarray(vectors)
+        if len(vectors) == 0:
+            return np.arange(len(self), len(self))
+        if self.dim is None:
+            self.manifest['dim'] = int(vectors.shape[1])
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Dimension {vectors.shape[1]} passt nicht zum Speicher ({self.dim})")
+        if len(texts) != len(vectors) or any(len(values) != len(vectors) for values in columns.values()):
+            raise ValueError("Vektoren, Texte und Metadaten müssen gleich viele Zeilen haben")
+        os.makedirs(self.path, exist_ok=True)
+
+        encoded = [(text or '').encode('utf-8') for text in texts]
+        lengths = np.array([len(text) for text in encoded], dtype=np.int64)
+        offsets = self.manifest['text_bytes'] + np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+
+        # Reste eines abgebrochenen Anhängens abschneiden, dann ans Ende schreiben
+        for name, committed, data in (
+            (VECTORS_FILE, len(self) * self.dim * self.dtype.itemsize, vectors.astype(self.dtype).tobytes()),
+            (TEXTS_FILE, self.manifest['text_bytes'], b''.join(encoded)),
+        ):
+            with open(self._file(name), 'ab') as f:
+                f.truncate(committed)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+        table = pa.table({**columns, 'text_offset': offsets, 'text_length': lengths})
+        part = f"metadata-{len(self.manifest['parts']):05d}.arrow"
+        with pa.OSFile(self._file(part), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+        first = len(self)
+        self.manifest['count'] += len(vectors)
+        self.manifest['text_bytes'] += int(lengths.sum())
+        self.manifest['parts'].append(part)
+        self._write_manifest()
+        return np.arange(first, len(self))
+
+    # ------------------------------------------------------------------
+    # Lesen (ohne Kopie)
+    # ------------------------------------------------------------------
+
+    @property
+    def vectors(self):
+        """Alle Vektoren als schreibgeschützte memmap (Zeilen x Dimension)."""
+        if self._vectors is None:
+            if len(self) == 0:
+                return np.empty((0, self.dim or 0), dtype=self.dtype)
+            self._vectors = np.memmap(self._file(VECTORS_FILE), dtype=self.dtype, mode='r',
+                                      shape=(len(self), self.dim))
+        return self._vectors
+
+    @property
+    def metadata(self):
+        """Metadaten aller Zeilen als Arrow-Tabelle (Teile per Memory-Mapping eingeblendet)."""
+        if self._metadata is None:
+            tables = [pa.ipc.open_file(pa.memory_map(self._file(part))).read_all()
+                      for part in self.manifest['parts']]
+            self._metadata = pa.concat_tables(tables, promote_options='default') if tables else pa.table({})
+        return self._metadata
+
+    def column(self, name):
+        """Eine Metadaten-Spalte als NumPy-Array bzw. Liste."""
+        return self.metadata.column(name).to_numpy(zero_copy_only=False)
+
+    def text(self, row):
+        if self._texts is None:
+            self._texts = np.memmap(self._file(TEXTS_FILE), dtype=np.uint8, mode='r') \
+                if self.manifest['text_bytes'] else np.empty(0, dtype=np.uint8)
+        offset = self.metadata.column('text_offset')[row].as_py()
+        length = self.metadata.column('text_length')[row].as_py()
+        return self._texts[offset:offset + length].tobytes().decode('utf-8')
+
+    def row(self, row):
+        """Metadaten und Text einer Zeile als Dictionary."""
+        record = {name: self.metadata.column(name)[row].as_py() for name in self.metadata.column_names
+                  if name not in ('text_offset', 'text_length')}
+        record['text'] = self.text(row)
+        return record
+
+# ==============================================================================
+# 3. SCHREIBEN AUS DEN EMBEDDING-SKRIPTEN
+# ==============================================================================
+
+def append_new(path, records, vectors, text_key, source, model=None, dtype=DEFAULT_DTYPE, extra_columns=()):
+    """
+    Hängt nur Einträge an, deren (Ticker, Text) noch nicht im Speicher liegt. `records` sind die
+    Dictionaries der Skripte (name, ticker, ...), `text_key` der Schlüssel des gespeicherten Textes.
+    `extra_columns` werden zusätzlich als Metadaten übernommen (z.B. published_at für Filter).
+    Gibt die Anzahl neuer Zeilen zurück.
+    """
+    from embedding_cache import normalize_text, text_hash
+
+    store = VectorStore(path)
+    if store.manifest['model'] not in (None, model):
+        # Anderes Modell: die alten Vektoren sind nicht vergleichbar, Speicher neu anlegen
+        store = VectorStore.create(path, vectors.shape[1], dtype, model)
+    if store.dim is None:
+        store = VectorStore.create(path, vectors.shape[1], dtype, model)
+
+    known = set(zip(store.column('ticker'), store.column('text_hash'))) if len(store) else set()
+    rows, hashes = [], []
+    for i, record in enumerate(records):
+        hash_value = text_hash(normalize_text(record[text_key]))
+        if (record['ticker'], hash_value) not in known:
+            known.add((record['ticker'], hash_value))
+            rows.append(i)
+            hashes.append(hash_value)
+
+    store.append(
+        vectors[rows],
+        [records[i][text_key] for i in rows],
+        name=[records[i]['name'] for i in rows],
+        ticker=[records[i]['ticker'] for i in rows],
+        source=[source] * len(rows),
+        text_hash=hashes,
+        **{column: [records[i][column] for i in rows] for column in extra_columns},
+    )
+    print(f"Vektor-Speicher '{path}': {len(rows)} neue Einträge, insgesamt {len(store)}.")
+    return len(rows)
+
+def import_embedding_csv(csv_path, path, source, model=None, dtype=DEFAULT_DTYPE):
+    """Übernimmt eine bisherige Embedding-CSV (Spalten name, ticker, text, embedding als JSON)."""
+    csv.field_size_limit(1 << 30)
+    with open(csv_path, newline='', encoding='utf-8') as csvfile:
+        records = list(csv.DictReader(csvfile))
+    vectors = np.array([json.loads(record['embedding']) for record in records], dtype=np.float32)
+    return append_new(path, records, vectors, 'text', source, model, dtype)
+
+# ==============================================================================
+# 4. AUSFÜHRUNGSPUNKT
+# ==============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Übernimmt eine Embedding-CSV in einen binären Vektor-Speicher.")
+    parser.add_argument('csv_file')
+    parser.add_argument('store')
+    parser.add_argument('--source', default='news', help="Quelle der Einträge (z.B. news oder web)")
+    parser.add_argument('--model', default='all-MiniLM-L6-v2')
+    parser.add_argument('--dtype', choices=['float16', 'float32'], default=DEFAULT_DTYPE)
+    args = parser.parse_args()
+
+    import_embedding_csv(args.csv_file, args.store, args.source, args.model, args.dtype)
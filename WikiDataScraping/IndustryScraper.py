@@ -1,10 +1,16 @@
 import pandas as pd
 import trafilatura
 import json
-import time
+import sqlite3
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import quote
 
+# Gemeinsamer HTTP-Client (Cache, Verbindungspool, Replay-Modus) aus dem Projektordner
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from http_client import RateLimiter, get_client
+
 # ==============================================================================
 # 1. KONFIGURATION
 # ==============================================================================
@@ -15,51 +21,203 @@ INPUT_CSV_FILE = '/Users/lania/VSCode/DataScience/WikiNasdaq_100_constituents.cs
 # Ausgabedatei für die extrahierten Branchenbeschreibungen
 OUTPUT_JSON_FILE = 'industry_descriptions.json'
 
+# SQLite-Datei: Branche -> aufgelöste Wikipedia-Seite (nach Weiterleitungen) und Revision,
+# sowie der extrahierte Text pro Seite und Revision
+PAGE_CACHE_DB_FILE = 'industry_pages.sqlite'
+
 # Basis-URL für die englische Wikipedia
 WIKIPEDIA_BASE_URL = "https://en.wikipedia.org/wiki/"
+WIKIPEDIA_API_URL = "https://en.wikipedia.org/w/api.php"
+
+# Eine Revision ändert sich nie, daher darf sie (praktisch) unbegrenzt im HTTP-Cache bleiben
+REVISION_CACHE_TTL = 365 * 24 * 3600
+
+# Parallele Downloads und globale Obergrenze der Anfragen pro Sekunde an Wikipedia
+MAX_WORKERS = 4
+MAX_REQUESTS_PER_SECOND = 5
+
+# Maximale Anzahl Titel pro Anfrage an die MediaWiki-API
+TITLES_PER_QUERY = 50
 
 # ==============================================================================
-# 2. FUNKTION ZUM SCRAPEN EINER EINZELNEN WIKIPEDIA-SEITE
+# 2. AUFLÖSUNG VON BRANCHENNAMEN ZU WIKIPEDIA-SEITEN
 # ==============================================================================
 
-def scrape_industry_page(industry_name):
+def candidate_titles(industry_name):
+    """Mögliche Seitentitel einer Branche, falls der Name selbst eine Begriffsklärung ist oder fehlt."""
+    candidates = [industry_name, f"{industry_name} industry"]
+    if industry_name.lower().endswith(' industry'):
+        candidates.append(industry_name[:-len(' industry')])
+    return list(dict.fromkeys(candidates))
+
+def resolve_titles(titles, rate_limiter):
+    """
+    Löst Titel über die MediaWiki-API auf (bis zu TITLES_PER_QUERY pro Anfrage), inklusive
+    Normalisierung und Weiterleitungen. Gibt ein Dictionary Titel -> (kanonischer Titel,
+    Revisions-ID) zurück; fehlende Seiten und Begriffsklärungen werden ausgelassen.
+    """
+    resolved = {}
+    for start in range(0, len(titles), TITLES_PER_QUERY):
+        batch = titles[start:start + TITLES_PER_QUERY]
+        params = {
+            'action': 'query',
+            'titles': '|'.join(batch),
+            'redirects': 1,
+            'prop': 'info|pageprops',
+            'ppprop': 'disambiguation',
+            'format': 'json',
+            'formatversion': 2,
+        }
+        try:
+            response = get_client().get(WIKIPEDIA_API_URL, params=params, rate_limiter=rate_limiter)
+            response.raise_for_status()
+            query = response.json().get('query', {})
+        except Exception as e:
+            print(f"   [ERROR] Auflösung von {len(batch)} Titeln fehlgeschlagen: {e}")
+            continue
+
+        # Kette Eingabe -> normalisierter Titel -> Weiterleitungsziel nachverfolgen
+        mapping = {entry['from']: entry['to'] for entry in query.get('normalized', [])}
+        redirects = {entry['from']: entry['to'] for entry in query.get('redirects', [])}
+        pages = {
+            page['title']: page for page in query.get('pages', [])
+            if not page.get('missing') and not page.get('invalid')
+            and 'disambiguation' not in page.get('pageprops', {})
+        }
+        for title in batch:
+            target = mapping.get(title, title)
+            target = redirects.get(target, target)
+            if target in pages:
+                resolved[title] = (target, pages[target]['lastrevid'])
+    return resolved
+
+# ==============================================================================
+# 3. PERSISTENTER CACHE
+# ==============================================================================
+
+class IndustryPageCache:
+    """
+    Merkt sich pro Branche die aufgelöste Seite und pro Seite den Text der zuletzt extrahierten
+    Revision. Unveränderte Artikel werden so weder erneut geladen noch erneut extrahiert.
+    """
+
+    def __init__(self, db_file=PAGE_CACHE_DB_FILE):
+        self.conn = sqlite3.connect(db_file)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS labels (
+                label       TEXT PRIMARY KEY,
+                title       TEXT,
+                revision_id INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                title       TEXT PRIMARY KEY,
+                revision_id INTEGER,
+                text        TEXT
+            );
+        """)
+
+    def get_labels(self, labels):
+        """Zuletzt aufgelöste Seite pro Branche: Dictionary Branche -> (Titel, Revisions-ID)."""
+        rows = self.conn.execute("SELECT label, title, revision_id FROM labels").fetchall()
+        labels = set(labels)
+        return {label: (title, revision_id) for label, title, revision_id in rows if label in labels}
+
+    def set_label(self, label, title, revision_id):
+        self.conn.execute("INSERT OR REPLACE INTO labels VALUES (?, ?, ?)", (label, title, revision_id))
+        self.conn.commit()
+
+    def get_text(self, title, revision_id):
+        """Gibt (gefunden, Text) zurück. Text ist None, wenn die Seite zu wenig Text hatte."""
+        row = self.conn.execute(
+            "SELECT text FROM pages WHERE title = ? AND revision_id = ?", (title, revision_id)
+        ).fetchone()
+        return (True, row[0]) if row else (False, None)
+
+    def store_text(self, title, revision_id, text):
+        self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)", (title, revision_id, text))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def resolve_industries(industries, cache, rate_limiter):
     """
-    Sucht die Wikipedia-Seite für eine bestimmte Branche und extrahiert den Text.
+    Ordnet jeder Branche (kanonischer Titel, Revisions-ID) zu. Bereits aufgelöste Branchen werden
+    nur über ihre gespeicherte Seite geprüft (gebündelt, ohne Kandidaten); erst wenn sich deren
+    Revision geändert hat oder die Seite nicht mehr direkt auflösbar ist, wird die Branche neu
+    aufgelöst. Begriffsklärungen und fehlende Seiten werden mit den weiteren Kandidaten aus
+    `candidate_titles` erneut versucht.
     """
-    if not industry_name or industry_name.lower() == 'n/a':
-        return None
+    cached = cache.get_labels(industries)
+    latest = resolve_titles(list(dict.fromkeys(title for title, _ in cached.values())), rate_limiter)
+    resolved = {industry: page for industry, page in cached.items() if latest.get(page[0]) == page}
+    print(f"[INFO] {len(resolved)} Branchen unverändert, {len(industries) - len(resolved)} werden aufgelöst.")
 
-    # Bereitet den Branchennamen für die URL vor (z.B. "software industry" -> "software_industry")
-    formatted_name = industry_name.replace(' ', '_')
-    # Stellt sicher, dass Sonderzeichen korrekt kodiert werden
-    url_path = quote(formatted_name)
-    url = f"{WIKIPEDIA_BASE_URL}{url_path}"
+    remaining = {industry: candidate_titles(industry) for industry in industries if industry not in resolved}
+    while remaining:
+        current = {industry: candidates.pop(0) for industry, candidates in remaining.items()}
+        pages = resolve_titles(list(dict.fromkeys(current.values())), rate_limiter)
+        for industry, title in current.items():
+            if title in pages:
+                resolved[industry] = pages[title]
+                cache.set_label(industry, *pages[title])
+        remaining = {industry: candidates for industry, candidates in remaining.items()
+                     if industry not in resolved and candidates}
+    return resolved
 
-    print(f"   -> Versuche, Text von {url} zu extrahieren...")
+# ==============================================================================
+# 4. FUNKTION ZUM SCRAPEN EINER EINZELNEN WIKIPEDIA-SEITE
+# ==============================================================================
+
+def scrape_industry_page(title, revision_id, rate_limiter=None):
+    """
+    Lädt eine bestimmte Revision einer Wikipedia-Seite und extrahiert den Text.
+    Gibt (geladen, Text) zurück; bei geladen=False soll es ein späterer Lauf erneut versuchen.
+    """
+    # Stellt sicher, dass Sonderzeichen korrekt kodiert werden ("Software industry" -> "Software_industry")
+    url = f"{WIKIPEDIA_BASE_URL}{quote(title.replace(' ', '_'))}"
+
+    print(f"   -> Versuche, Text von {url} (Revision {revision_id}) zu extrahieren...")
 
     try:
-        # Lade den HTML-Inhalt von der URL herunter
-        downloaded = trafilatura.fetch_url(url)
+        # Lade den HTML-Inhalt der Revision herunter
+        downloaded = get_client().fetch_text(
+            url, params={'oldid': revision_id}, ttl=REVISION_CACHE_TTL, rate_limiter=rate_limiter
+        )
         if not downloaded:
-            print(f"   [FAIL] Konnte die Seite für '{industry_name}' nicht herunterladen.")
-            return None
+            print(f"   [FAIL] Konnte die Seite '{title}' nicht herunterladen.")
+            return False, None
 
         # Extrahiere den Haupttext mit hoher Präzision
         main_text = trafilatura.extract(downloaded, include_comments=False, favor_precision=True)
 
         if main_text and len(main_text) > 100:
-            print(f"   [SUCCESS] {len(main_text)} Zeichen für '{industry_name}' extrahiert.")
-            return main_text
+            print(f"   [SUCCESS] {len(main_text)} Zeichen für '{title}' extrahiert.")
+            return True, main_text
         else:
-            print(f"   [SKIP] Nicht genügend relevanter Text für '{industry_name}' gefunden.")
-            return None
+            print(f"   [SKIP] Nicht genügend relevanter Text für '{title}' gefunden.")
+            return True, None
 
     except Exception as e:
-        print(f"   [ERROR] Unerwarteter Fehler bei '{industry_name}': {e}")
-        return None
+        print(f"   [ERROR] Unerwarteter Fehler bei '{title}': {e}")
+        return False, None
+
+def save_descriptions(industry_descriptions, path=OUTPUT_JSON_FILE):
+    """Schreibt die JSON-Datei atomar, damit ein abgebrochener Lauf nie eine halbe Datei hinterlässt."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(industry_descriptions.items())), f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+def load_descriptions(path=OUTPUT_JSON_FILE):
+    """Lädt die Beschreibungen eines früheren (ggf. abgebrochenen) Laufs."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 # ==============================================================================
-# 3. HAUPTPROGRAMM
+# 5. HAUPTPROGRAMM
 # ==============================================================================
 
 if __name__ == "__main__":
@@ -77,19 +235,55 @@ if __name__ == "__main__":
         all_industries.update(industries)
 
     # 3. Entferne 'N/A' und konvertiere die Menge in eine sortierte Liste für konsistente Reihenfolge
-    unique_industries = sorted([ind for ind in all_industries if ind.lower() != 'n/a'])
+    unique_industries = sorted([ind for ind in all_industries if ind and ind.lower() != 'n/a'])
 
-    industry_descriptions = {}
+    industry_descriptions = load_descriptions()
+    cache = IndustryPageCache()
+    rate_limiter = RateLimiter(MAX_REQUESTS_PER_SECOND)
 
+    # 4. Branchen zu Seiten auflösen (gebündelt, inkl. Weiterleitungen und Begriffsklärungen)
+    resolved = resolve_industries(unique_industries, cache, rate_limiter)
     for industry in unique_industries:
-        print(f"\nVerarbeite Branche: '{industry}'")
-        description = scrape_industry_page(industry)
-        if description:
-            industry_descriptions[industry] = description
-        time.sleep(1) # Kurze Pause, um die Server nicht zu überlasten
+        if industry not in resolved:
+            print(f"   [SKIP] Keine passende Wikipedia-Seite für '{industry}' gefunden.")
+
+    # Mehrere Branchen können auf dieselbe Seite zeigen; jede Seite wird nur einmal geladen
+    labels_by_page = {}
+    for industry, page in resolved.items():
+        labels_by_page.setdefault(page, []).append(industry)
+
+    def store(labels, text):
+        for label in labels:
+            if text:
+                industry_descriptions[label] = text
+            else:
+                industry_descriptions.pop(label, None)
+
+    # 5. Unveränderte Revisionen direkt aus dem Cache übernehmen, den Rest parallel laden
+    to_fetch = {}
+    for (title, revision_id), labels in labels_by_page.items():
+        found, text = cache.get_text(title, revision_id)
+        if found:
+            store(labels, text)
+        else:
+            to_fetch[(title, revision_id)] = labels
+    print(f"[INFO] {len(labels_by_page) - len(to_fetch)} Seiten unverändert, {len(to_fetch)} werden geladen.")
+    save_descriptions(industry_descriptions)
 
-    # Speichere das Dictionary als JSON-Datei
-    with open(OUTPUT_JSON_FILE, 'w', encoding='utf-8') as f:
-        json.dump(industry_descriptions, f, ensure_ascii=False, indent=4)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(scrape_industry_page, title, revision_id, rate_limiter): (title, revision_id)
+            for title, revision_id in to_fetch
+        }
+        for future in as_completed(futures):
+            title, revision_id = futures[future]
+            fetched, text = future.result()
+            if not fetched:
+                continue
+            cache.store_text(title, revision_id, text)
+            store(to_fetch[(title, revision_id)], text)
+            # Nach jeder Seite speichern, damit ein abgebrochener Lauf seine Arbeit behält
+            save_descriptions(industry_descriptions)
 
-    print(f"\n[SUCCESS] {len(industry_descriptions)} Branchenbeschreibungen wurden in '{OUTPUT_JSON_FILE}' gespeichert.")
\ No newline at end of file
+    cache.close()
+    print(f"\n[SUCCESS] {len(industry_descriptions)} Branchenbeschreibungen wurden in '{OUTPUT_JSON_FILE}' gespeichert.")
@@ -1,7 +1,13 @@
+import os
+import sys
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 
+# Gemeinsamer HTTP-Client (Cache, Verbindungspool, Replay-Modus) aus dem Projektordner
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from http_client import get_client
+
 # 1. URL der Nasdaq-100-Liste
 url = "https://en.wikipedia.org/wiki/Nasdaq-100"
 
@@ -11,7 +17,7 @@ try:
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
-    response = requests.get(url, headers=headers, timeout=15)
+    response = get_client().get(url, headers=headers, timeout=15)
     response.raise_for_status() #
 except requests.exceptions.RequestException as e:
     print(f"Fehler beim Abrufen der URL: {e}")
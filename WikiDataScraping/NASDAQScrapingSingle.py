@@ -1,9 +1,15 @@
 #Code um die einzelnen Unternehmen aus der Wikidata zu scrapen und mit der 
 #bisherigen liste zu mergen uum eine fertige Liste zu haben import requests
 #
+import os
+import sys
 import requests
 import pandas as pd
-import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Gemeinsamer HTTP-Client (Cache, Verbindungspool, Replay-Modus) aus dem Projektordner
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from http_client import RateLimiter, get_client
 
 WIKIDATA_ENDPOINT = 'https://query.wikidata.org/sparql'
 WIKIDATA_SEARCH_API = 'https://www.wikidata.org/w/api.php'
@@ -11,7 +17,16 @@ USER_AGENT_HEADER = {'User-Agent': 'DataScienceProject/1.0 (Student Project)'}
 # Globales, höheres Timeout setzen
 GLOBAL_TIMEOUT = 30 
 
-def get_wikidata_qid(company_name):
+# Anzahl paralleler QID-Suchen und Obergrenze der Anfragen pro Sekunde an die Wikidata-API
+MAX_WORKERS = 8
+MAX_REQUESTS_PER_SECOND = 5
+
+# Wie viele QIDs in einer SPARQL-Abfrage (VALUES-Klausel) abgefragt werden
+SPARQL_BATCH_SIZE = 100
+
+EMPTY_METADATA = {'Industry': 'N/A', 'Founding_Year': 'N/A', 'Website': 'N/A'}
+
+def get_wikidata_qid(company_name, session=None, rate_limiter=None):
     """Sucht die Wikidata Q-ID basierend auf dem Firmennamen (schnelle API)."""
     params = {
         'action': 'wbsearchentities',
@@ -22,11 +37,12 @@ def get_wikidata_qid(company_name):
     }
     try:
         # Hinzufügen des Headers zur Anfrage
-        response = requests.get(
+        response = (session or get_client()).get(
             WIKIDATA_SEARCH_API, 
             params=params, 
             headers=USER_AGENT_HEADER, # <<< WICHTIG: Fügt den User-Agent hinzu
-            timeout=GLOBAL_TIMEOUT
+            timeout=GLOBAL_TIMEOUT,
+            rate_limiter=rate_limiter
         )
         response.raise_for_status() # Löst den 403-Fehler aus, wenn er auftritt
         data = response.json()
@@ -41,88 +57,98 @@ def get_wikidata_qid(company_name):
         print(f"  Fehler bei der QID-Suche für {company_name}: {e}")
     return None
 
-def fetch_wikidata_metadata_by_qid(qid, company_name):
-    """Ruft Metadaten mit der exakten Q-ID über SPARQL ab (schnell)."""
-    sparql_query = f"""
-    SELECT ?item ?inception ?industryLabel ?website WHERE {{
-      VALUES ?item {{ wd:{qid} }}
-      
-      OPTIONAL {{ ?item wdt:P571 ?inception. }}
-      OPTIONAL {{ ?item wdt:P452 ?industry. }}
-      OPTIONAL {{ ?item wdt:P856 ?website. }}
-      
-      SERVICE wikibase:label {{ 
-        bd:serviceParam wikibase:language "en". 
-        ?industry rdfs:label ?industryLabel.
-      }}
-    }}
+def find_qids_concurrently(company_names, session, max_workers=MAX_WORKERS):
+    """Sucht die QIDs aller Firmen parallel; das Ergebnis hat die Reihenfolge von `company_names`."""
+    rate_limiter = RateLimiter(MAX_REQUESTS_PER_SECOND)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda name: get_wikidata_qid(name, session, rate_limiter), company_names))
+
+def fetch_wikidata_metadata_batch(qids, session):
     """
-    
-    try:
-        response = requests.get(
-            WIKIDATA_ENDPOINT,
-            params={'query': sparql_query, 'format': 'json'},
-            headers={'Accept': 'application/sparql-results+json', 'User-Agent': 'DataScienceProject/1.0'},
-            timeout=GLOBAL_TIMEOUT
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        bindings = data['results']['bindings']
-        
-        if bindings:
-            # Initialisiere die Metadaten mit Werten aus dem ersten Ergebnis
-            first_result = bindings[0]
-            inception_date = first_result.get('inception', {}).get('value', '')
-            inception_year = inception_date.split('-')[0] if inception_date else 'N/A'
-            website = first_result.get('website', {}).get('value', 'N/A')
-
-            # Sammle ALLE Branchen aus allen zurückgegebenen Zeilen
-            # set() wird verwendet, um Duplikate zu vermeiden
-            all_industries = set()
-            for result in bindings:
-                industry = result.get('industryLabel', {}).get('value')
-                if industry:
-                    all_industries.add(industry)
-            
-            return {
-                'Wikidata_ID': qid,
-                'Industry': ', '.join(sorted(list(all_industries))) if all_industries else 'N/A',
-                'Founding_Year': inception_year,
-                'Website': website
+    Ruft die Metadaten vieler Q-IDs mit einer SPARQL-Abfrage pro SPARQL_BATCH_SIZE QIDs ab.
+    Gibt ein Dictionary QID -> {'Industry', 'Founding_Year', 'Website'} zurück.
+    """
+    metadata = {}
+    unique_qids = list(dict.fromkeys(qids))
+    for start in range(0, len(unique_qids), SPARQL_BATCH_SIZE):
+        batch = unique_qids[start:start + SPARQL_BATCH_SIZE]
+        values = ' '.join(f'wd:{qid}' for qid in batch)
+        sparql_query = f"""
+        SELECT ?item ?inception ?industryLabel ?website WHERE {{
+          VALUES ?item {{ {values} }}
+          
+          OPTIONAL {{ ?item wdt:P571 ?inception. }}
+          OPTIONAL {{ ?item wdt:P452 ?industry. }}
+          OPTIONAL {{ ?item wdt:P856 ?website. }}
+          
+          SERVICE wikibase:label {{ 
+            bd:serviceParam wikibase:language "en". 
+            ?industry rdfs:label ?industryLabel.
+          }}
+        }}
+        """
+
+        try:
+            # POST, da die Abfrage mit vielen QIDs für eine GET-URL zu lang werden kann
+            response = session.post(
+                WIKIDATA_ENDPOINT,
+                data={'query': sparql_query, 'format': 'json'},
+                headers={'Accept': 'application/sparql-results+json', **USER_AGENT_HEADER},
+                timeout=GLOBAL_TIMEOUT
+            )
+            response.raise_for_status()
+            bindings = response.json()['results']['bindings']
+        except Exception as e:
+            print(f"  Fehler bei der SPARQL-Abfrage für {len(batch)} QIDs: {e}")
+            continue
+
+        # Zeilen nach Firma gruppieren: Gründungsjahr und Website aus der ersten Zeile,
+        # Branchen aus allen Zeilen (set() vermeidet Duplikate)
+        grouped = {}
+        for result in bindings:
+            qid = result['item']['value'].rsplit('/', 1)[-1]
+            if qid not in grouped:
+                inception_date = result.get('inception', {}).get('value', '')
+                grouped[qid] = {
+                    'industries': set(),
+                    'Founding_Year': inception_date.split('-')[0] if inception_date else 'N/A',
+                    'Website': result.get('website', {}).get('value', 'N/A'),
+                }
+            industry = result.get('industryLabel', {}).get('value')
+            if industry:
+                grouped[qid]['industries'].add(industry)
+
+        for qid, entry in grouped.items():
+            metadata[qid] = {
+                'Industry': ', '.join(sorted(entry['industries'])) if entry['industries'] else 'N/A',
+                'Founding_Year': entry['Founding_Year'],
+                'Website': entry['Website'],
             }
-            
-    except Exception as e:
-        print(f"  Fehler bei der SPARQL-Abfrage für QID {qid}: {e}")
-    
-    return {'Wikidata_ID': qid, 'Industry': 'N/A', 'Founding_Year': 'N/A', 'Website': 'N/A'}
+    return metadata
 
-# 3. Haupt-Loop (Wiederholungsversuche eingebaut)
+# 3. Haupt-Loop: QIDs parallel suchen, Metadaten gebündelt abfragen
 def process_companies(companies_df):
+    session = get_client()
+    company_names = companies_df['Company'].tolist()
+
+    print(f"-> Suche QIDs für {len(company_names)} Firmen...")
+    qids = find_qids_concurrently(company_names, session)
+
+    print("-> Frage Metadaten per SPARQL ab...")
+    metadata_by_qid = fetch_wikidata_metadata_batch([qid for qid in qids if qid], session)
+
     metadata_list = []
-    
-    for index, row in companies_df.iterrows():
+    for (index, row), qid in zip(companies_df.iterrows(), qids):
         company_name = row['Company']
-        ticker = row['Ticker']
-        
-        print(f"-> Verarbeite {company_name} ({ticker})...")
-        
-        # 1. QID finden
-        qid = get_wikidata_qid(company_name)
-        
         if qid:
-            # 2. Metadaten mit QID abfragen (mit Retry)
-            metadata = fetch_wikidata_metadata_by_qid(qid, company_name)
+            metadata = {'Wikidata_ID': qid, **metadata_by_qid.get(qid, EMPTY_METADATA)}
         else:
             print(f"   [SKIP] Konnte keine QID für {company_name} finden.")
-            metadata = {'Wikidata_ID': 'N/A', 'Industry': 'N/A', 'Founding_Year': 'N/A', 'Website': 'N/A'}
-            
-        metadata['Ticker'] = ticker
+            metadata = {'Wikidata_ID': 'N/A', **EMPTY_METADATA}
+
+        metadata['Ticker'] = row['Ticker']
         metadata['Company'] = company_name
         metadata_list.append(metadata)
-        
-        # Wichtig: Kurze Pause, um Server nicht zu überlasten
-        time.sleep(1) 
     
     return pd.DataFrame(metadata_list)
 
@@ -0,0 +1,261 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+# ==============================================================================
+# 1. KONFIGURATION
+# ==============================================================================
+
+# Verzeichnis des gemeinsamen HTTP-Caches (Index + Antwort-Bodies). Für Tests kann es per
+# Umgebungsvariable auf einen Ordner mit aufgezeichneten Fixtures zeigen.
+HTTP_CACHE_DIR = os.environ.get(
+    'HTTP_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'http_cache')
+)
+
+# Modus des Caches:
+#   'record' - aus dem Cache lesen, solange die TTL gilt, sonst abrufen und speichern (Standard)
+#   'replay' - nur aus dem Cache lesen (unabhängig von der TTL), niemals ins Netz gehen
+#   'off'    - Cache komplett umgehen
+HTTP_CACHE_MODE = os.environ.get('HTTP_CACHE_MODE', 'record')
+
+# Standard-Gültigkeit eines Cache-Eintrags in Sekunden
+DEFAULT_TTL = 24 * 3600
+
+DEFAULT_TIMEOUT = 30
+
+# Statuscodes, bei denen die Session selbst wiederholt (429 = Rate-Limit, z.B. bei Wikidata)
+RETRY_STATUS = (429, 500, 502, 503, 504)
+POOL_SIZE = 20
+USER_AGENT = 'DataScienceProject/1.0 (Student Project)'
+
+# Parameter, die nicht in den Cache-Schlüssel eingehen (z.B. API-Keys: ein Wechsel des Keys
+# soll keinen erneuten Abruf auslösen und Keys sollen nicht im Index landen)
+IGNORED_PARAMS = {'apiKey', 'apikey', 'api_key', 'token'}
+
+# Nur diese Antworten werden gespeichert; 429 und 5xx sind vorübergehend und werden nie gecacht
+CACHEABLE_STATUS = set(range(200, 300)) | {301, 404, 410}
+
+class CacheMissError(requests.RequestException):
+    """Im Replay-Modus liegt für die Anfrage keine aufgezeichnete Antwort vor."""
+
+class RateLimiter:
+    """Thread-sicherer Limiter: höchstens `rate` Anfragen pro Sekunde über alle Threads."""
+
+    def __init__(self, rate):
+        self.min_interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        # Zeitfenster unter dem Lock reservieren, aber außerhalb davon schlafen
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        time.sleep(max(0.0, slot - now))
+
+# ==============================================================================
+# 2. CACHE
+# ==============================================================================
+
+def request_key(method, url, params=None, data=None):
+    """Stabiler Schlüssel einer Anfrage aus Methode, URL, sortierten Parametern und Body."""
+    def normalize(values):
+        if not values:
+            return ''
+        if isinstance(values, (str, bytes)):
+            return values if isinstance(values, str) else values.decode('utf-8', 'replace')
+        items = values.items() if isinstance(values, dict) else values
+        return urlencode(sorted((k, v) for k, v in items if k not in IGNORED_PARAMS))
+
+    raw = '\n'.join([method.upper(), url, normalize(params), normalize(data)])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    Persistenter, inhaltsadressierter Antwort-Cache. Die Bodies liegen einmalig unter ihrem
+    SHA-256 im Ordner `blobs/` (identische Antworten verschiedener Anfragen teilen sich eine
+    Datei), ein SQLite-Index ordnet jedem Anfrage-Schlüssel Status, Header und Body-Hash zu.
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), timeout=30, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key        TEXT PRIMARY KEY,
+                method     TEXT,
+                url        TEXT,
+                status     INTEGER,
+                reason     TEXT,
+                headers    TEXT,
+                body_hash  TEXT,
+                final_url  TEXT,
+                fetched_at REAL
+            )
+        """)
+        self.conn.commit()
+
+    def _blob_path(self, body_hash):
+        return os.path.join(self.blob_dir, body_hash[:2], body_hash)
+
+    def get(self, key, ttl=None):
+        """Liefert den Eintrag als Dictionary (inkl. Body) oder None. Mit ttl=None gilt jeder Eintrag."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT status, reason, headers, body_hash, final_url, fetched_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, reason, headers, body_hash, final_url, fetched_at = row
+        if ttl is not None and time.time() - fetched_at >= ttl:
+            return None
+        try:
+            with open(self._blob_path(body_hash), 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        return {'status': status, 'reason': reason, 'headers': json.loads(headers),
+                'body': body, 'final_url': final_url, 'fetched_at': fetched_at}
+
+    def put(self, key, method, url, response):
+        """Speichert eine Antwort; der Body wird nur geschrieben, wenn sein Inhalt noch unbekannt ist."""
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(body_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Atomar schreiben, damit parallele Prozesse nie eine halbe Datei lesen
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        headers = {k: v for k, v in response.headers.items()
+                   if k.lower() not in ('content-encoding', 'transfer-encoding', 'content-length', 'set-cookie')}
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method, url, response.status_code, response.reason, json.dumps(headers),
+                 body_hash, response.url, time.time())
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+def _response_from_entry(entry):
+    """Baut aus einem Cache-Eintrag ein requests.Response, damit Aufrufer nichts ändern müssen."""
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.reason = entry['reason']
+    response.headers = CaseInsensitiveDict(entry['headers'])
+    response._content = entry['body']
+    response.url = entry['final_url']
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+# ==============================================================================
+# 3. CLIENT
+# ==============================================================================
+
+class HttpClient:
+    """
+    Gemeinsamer HTTP-Client aller Scraper: eine Session mit Keep-Alive-Verbindungspool und
+    Wiederholungen bei 429/5xx (Retry-After wird beachtet), davor der persistente Antwort-Cache.
+    Bleibt es beim Fehler, bekommt der Aufrufer die letzte Antwort (kein RetryError).
+    """
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, mode=HTTP_CACHE_MODE, user_agent=USER_AGENT):
+        if mode not in ('record', 'replay', 'off'):
+            raise ValueError(f"Unbekannter Cache-Modus: {mode}")
+        self.mode = mode
+        self.cache = ResponseCache(cache_dir) if mode != 'off' else None
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=1, status_forcelist=RETRY_STATUS,
+                      allowed_methods=None, respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['User-Agent'] = user_agent
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, method, url, params=None, data=None, headers=None, ttl=DEFAULT_TTL,
+                timeout=DEFAULT_TIMEOUT, rate_limiter=None):
+        """
+        Führt eine Anfrage aus und gibt ein requests.Response zurück (bei Cache-Treffern mit
+        `from_cache = True`). Mit ttl=0 wird der Cache für diese Anfrage nur beschrieben.
+        Ein `rate_limiter` bremst nur echte Netzwerkzugriffe, Cache-Treffer kommen sofort.
+        """
+        key = request_key(method, url, params, data)
+        if self.cache:
+            entry = self.cache.get(key, None if self.mode == 'replay' else ttl)
+            if entry:
+                self.hits += 1
+                return _response_from_entry(entry)
+            if self.mode == 'replay':
+                raise CacheMissError(f"Keine aufgezeichnete Antwort für {method} {url}")
+
+        self.misses += 1
+        if rate_limiter:
+            rate_limiter.wait()
+        response = self.session.request(method, url, params=params, data=data, headers=headers, timeout=timeout)
+        response.from_cache = False
+        if self.cache and response.status_code in CACHEABLE_STATUS:
+            self.cache.put(key, method.upper(), url, response)
+        return response
+
+    def mount_without_retries(self, prefix):
+        """
+        Keine automatischen Wiederholungen für URLs mit diesem Anfang, z.B. wenn der Aufrufer
+        429 selbst behandelt (der News-Collector wechselt dann den API-Key).
+        """
+        self.session.mount(prefix, HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0))
+
+    def get(self, url, params=None, headers=None, ttl=DEFAULT_TTL, timeout=DEFAULT_TIMEOUT, rate_limiter=None):
+        return self.request('GET', url, params=params, headers=headers, ttl=ttl, timeout=timeout,
+                            rate_limiter=rate_limiter)
+
+    def post(self, url, data=None, headers=None, ttl=DEFAULT_TTL, timeout=DEFAULT_TIMEOUT, rate_limiter=None):
+        return self.request('POST', url, data=data, headers=headers, ttl=ttl, timeout=timeout,
+                            rate_limiter=rate_limiter)
+
+    def fetch_text(self, url, params=None, ttl=DEFAULT_TTL, rate_limiter=None):
+        """Ersatz für trafilatura.fetch_url: HTML einer Seite oder None bei Fehlern."""
+        try:
+            response = self.get(url, params=params, ttl=ttl, rate_limiter=rate_limiter)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        return response.text
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Gemeinsamer Client des Prozesses (Modus und Verzeichnis aus den Umgebungsvariablen)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client